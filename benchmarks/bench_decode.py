@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: decodificación de payloads para DynamoDB.
+
+Compara el camino anterior del worker (json.loads + _convert_floats_to_decimal,
+que recorre y copia el árbol y hace str(float) por cada número) con
+decode_payload (Decimal en el propio parseo), seguidos de process_lab_result.
+
+Uso:
+    python benchmarks/bench_decode.py
+"""
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# worker.py lee su configuración al importarse
+for var, value in {
+    "LAB_RESULTS_QUEUE_URL": "https://sqs.local/lab-results",
+    "NOTIFY_QUEUE_URL": "https://sqs.local/notify",
+    "RAW_BUCKET": "bench-raw",
+    "LAB_RESULTS_TABLE": "bench-lab-results",
+}.items():
+    os.environ.setdefault(var, value)
+
+from services.processor.payload import decode_payload
+from services.processor.process_utils import process_lab_result
+from services.processor.worker import _convert_floats_to_decimal
+
+
+def make_payload(n_results: int) -> bytes:
+    return json.dumps(
+        {
+            "patient_id": "P123456",
+            "lab_id": "LAB001",
+            "lab_name": "Quest Diagnostics",
+            "test_type": "comprehensive_panel",
+            "test_date": "2024-01-15T10:30:00Z",
+            "results": [
+                {
+                    "test_code": f"T{i:04d}",
+                    "test_name": f"Analyte {i}",
+                    "value": 10.0 + i * 0.37,
+                    "unit": "mg/dL",
+                    "reference_range": "4.5-11.0",
+                    "is_abnormal": i % 9 == 0,
+                }
+                for i in range(n_results)
+            ],
+            "notes": "benchmark",
+        }
+    ).encode("utf-8")
+
+
+def old_path(raw: bytes):
+    return _convert_floats_to_decimal(process_lab_result(json.loads(raw.decode("utf-8")), result_id="R"))
+
+
+def new_path(raw: bytes):
+    return process_lab_result(decode_payload(raw), result_id="R")
+
+
+def _peak_kib(fn, raw: bytes) -> float:
+    tracemalloc.start()
+    fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    print(f"{'analitos':>9} {'anterior µs':>12} {'decode µs':>10} {'speedup':>8} {'pico ant KiB':>13} {'pico nuevo KiB':>15}")
+    for n in (1, 10, 100, 1000, 5000):
+        raw = make_payload(n)
+        number = max(5, 20000 // (n + 10))
+        t_old = min(timeit.repeat(lambda: old_path(raw), number=number, repeat=5)) / number
+        t_new = min(timeit.repeat(lambda: new_path(raw), number=number, repeat=5)) / number
+        print(
+            f"{n:>9} {t_old * 1e6:>12.1f} {t_new * 1e6:>10.1f} {t_old / t_new:>7.2f}x "
+            f"{_peak_kib(old_path, raw):>13.1f} {_peak_kib(new_path, raw):>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: costo del validador de ingest por request.
+
+Compara validate_lab_result (todas las entradas, tipos, fechas y tamaños)
+con el chequeo anterior (solo claves de primer nivel) y con json.loads del
+mismo body, que la Lambda ya paga en cada request.
+
+Uso:
+    python benchmarks/bench_validation.py
+"""
+import json
+import os
+import sys
+import timeit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.validation import validate_lab_result
+
+
+def make_body(n_results: int) -> str:
+    return json.dumps(
+        {
+            "patient_id": "P123456",
+            "lab_id": "LAB001",
+            "lab_name": "Quest Diagnostics",
+            "test_type": "comprehensive_panel",
+            "test_date": "2024-01-15T10:30:00Z",
+            "results": [
+                {
+                    "test_code": f"T{i:04d}",
+                    "test_name": f"Analyte {i}",
+                    "value": 10.0 + i * 0.37,
+                    "unit": "mg/dL",
+                    "reference_range": "4.5-11.0",
+                    "is_abnormal": i % 9 == 0,
+                }
+                for i in range(n_results)
+            ],
+            "notes": "benchmark",
+        }
+    )
+
+
+def old_validate(body: dict):
+    required = ["patient_id", "lab_id", "lab_name", "test_type", "test_date", "results"]
+    missing = [f for f in required if f not in body]
+    if missing:
+        return False, f"Missing fields: {', '.join(missing)}"
+    if not isinstance(body.get("results"), list) or not body["results"]:
+        return False, "Field 'results' must be a non-empty list"
+    return True, None
+
+
+def _best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'analitos':>9} {'json.loads µs':>14} {'anterior µs':>12} {'validador µs':>13} {'% de loads':>11}")
+    for n in (1, 10, 100, 1000, 5000):
+        raw = make_body(n)
+        body = json.loads(raw)
+        assert validate_lab_result(body) == []
+        number = max(5, 20000 // (n + 10))
+        t_loads = _best(lambda: json.loads(raw), number)
+        t_old = _best(lambda: old_validate(body), number)
+        t_new = _best(lambda: validate_lab_result(body), number)
+        print(
+            f"{n:>9} {t_loads * 1e6:>14.1f} {t_old * 1e6:>12.2f} {t_new * 1e6:>13.1f} "
+            f"{t_new / t_loads * 100:>10.0f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Presupuesto de cold start de las Lambdas.
+
+Por cada handler (lambda/<nombre>/app.py) levanta un intérprete nuevo con
+`python -X importtime`, como hace el runtime de Lambda en un cold start, y
+mide:
+
+  init        ejecutar app.py (imports + código de módulo), en ms
+  imports     tiempo acumulado de cada import de primer nivel de app.py
+              (el detalle de -X importtime, ordenado de mayor a menor)
+  clientes    cuánto cuesta construir cada cliente / resource diferido
+              (services.common.aws.Lazy) la primera vez que se usa;
+              "import boto3" va aparte porque lo paga solo el primero
+
+No hace llamadas a AWS: construir un cliente no abre conexiones, así que
+alcanza con una región y credenciales falsas.
+
+Uso:
+    python benchmarks/cold_start.py                  # las cuatro Lambdas
+    python benchmarks/cold_start.py ingest --runs 5  # mediana de 5 arranques
+    python benchmarks/cold_start.py --top 20 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LAMBDAS = ("ingest", "report", "notify", "data_lifecycle")
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "cold-start",
+    "AWS_SECRET_ACCESS_KEY": "cold-start",
+    "RAW_BUCKET": "cold-raw",
+    "REPORT_BUCKET": "cold-reports",
+    "LAB_RESULTS_QUEUE_URL": "https://sqs.local/lab-results",
+    "LAB_RESULTS_TABLE": "cold-lab-results",
+    "PATIENTS_TABLE": "cold-patients",
+    "ACCESS_AUDIT_TABLE": "cold-access-audit",
+    "NOTIFY_TOPIC_ARN": "arn:aws:sns:us-east-1:000000000000:cold-notify",
+}
+
+INIT_MARK = "# cold_start:init"
+CLIENTS_MARK = "# cold_start:clients"
+
+# Corre en el proceso hijo; imprime el resultado como JSON por stdout
+_CHILD = f"""
+import importlib.util, json, sys, time
+sys.stderr.write({INIT_MARK!r} + "\\n")
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("app", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+init_ms = (time.perf_counter() - start) * 1000
+sys.stderr.write({CLIENTS_MARK!r} + "\\n")
+
+from services.common.aws import Lazy
+clients = {{}}
+lazies = [(name, value) for name, value in vars(module).items() if isinstance(value, Lazy)]
+if lazies:
+    start = time.perf_counter()
+    import boto3
+    clients["import boto3"] = (time.perf_counter() - start) * 1000
+for name, value in lazies:
+    start = time.perf_counter()
+    value.get()
+    clients[name] = (time.perf_counter() - start) * 1000
+print(json.dumps({{"init_ms": init_ms, "clients": clients}}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Imports de primer nivel entre las marcas de init: modulo -> ms acumulados."""
+    lines = stderr.splitlines()
+    try:
+        section = lines[lines.index(INIT_MARK) + 1 : lines.index(CLIENTS_MARK)]
+    except ValueError:
+        return {}
+
+    rows = []
+    for line in section:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1000))
+    if not rows:
+        return {}
+    # -X importtime indenta los imports anidados; los de menor sangría son
+    # los que hizo app.py directamente
+    top_level = min(depth for depth, _, _ in rows)
+    return {name: ms for depth, name, ms in rows if depth == top_level}
+
+
+def measure(name: str) -> Dict:
+    env = {**os.environ, **ENV, "PYTHONPATH": PROJECT_ROOT, "PYTHONDONTWRITEBYTECODE": "1"}
+    app = os.path.join(PROJECT_ROOT, "lambda", name, "app.py")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, app],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name}: el proceso hijo falló\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def _median_run(name: str, runs: int) -> Dict:
+    samples = [measure(name) for _ in range(runs)]
+    med = lambda values: round(statistics.median(values), 2)  # noqa: E731
+    return {
+        "init_ms": med([s["init_ms"] for s in samples]),
+        "imports": {k: med([s["imports"].get(k, 0.0) for s in samples]) for k in samples[0]["imports"]},
+        "clients": {k: med([s["clients"].get(k, 0.0) for s in samples]) for k in samples[0]["clients"]},
+    }
+
+
+def _print_report(name: str, result: Dict, top: int):
+    print(f"\n== {name}: init {result['init_ms']:.1f} ms")
+    imports: List = sorted(result["imports"].items(), key=lambda kv: kv[1], reverse=True)
+    for module, ms in imports[:top]:
+        print(f"   import  {module:<48} {ms:>8.1f} ms")
+    if len(imports) > top:
+        print(f"   ... {len(imports) - top} imports más")
+    for client, ms in result["clients"].items():
+        print(f"   primer uso {client:<45} {ms:>8.1f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("lambdas", nargs="*", metavar="lambda", help=f"default: {' '.join(LAMBDAS)}")
+    parser.add_argument("--runs", type=int, default=3, help="arranques por Lambda (se reporta la mediana)")
+    parser.add_argument("--top", type=int, default=10, help="imports a mostrar por Lambda")
+    parser.add_argument("--json", action="store_true", help="imprime el resultado como JSON")
+    args = parser.parse_args(argv)
+    unknown = set(args.lambdas) - set(LAMBDAS)
+    if unknown:
+        parser.error(f"Lambdas desconocidas: {', '.join(sorted(unknown))}")
+
+    results = {name: _median_run(name, max(1, args.runs)) for name in args.lambdas or LAMBDAS}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            _print_report(name, result, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Harness de throughput end-to-end: ingest -> worker -> notify, sin AWS.
+
+Corre el código real de los tres componentes contra los stand-ins en
+memoria de benchmarks/local_aws.py:
+
+  productores   lambda/ingest/app.lambda_handler (POST /api/v1/ingest)
+  workers       services/processor/worker.receive_messages + process_batch
+  notify        lambda/notify/app.lambda_handler con lotes de notify_queue
+
+Empuja --count resultados a --rate por segundo (0 = sin límite) y reporta
+throughput, latencia end-to-end (desde el POST hasta que notify publicó en
+SNS) p50/p90/p99, latencia del handler de ingest y llamadas a AWS por
+resultado. --aws-latency-ms simula la latencia de red de cada llamada, que
+es lo que hace que la concurrencia del worker importe.
+
+Uso:
+    python benchmarks/e2e_harness.py --count 2000 --rate 200 --workers 2 --concurrency 8
+    python benchmarks/e2e_harness.py --count 500 --aws-latency-ms 10 --analytes 2000
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "RAW_BUCKET": "local-raw",
+    "LAB_RESULTS_QUEUE_URL": "https://sqs.local/lab-results",
+    "NOTIFY_QUEUE_URL": "https://sqs.local/notify",
+    "LAB_RESULTS_TABLE": "local-lab-results",
+    "PATIENTS_TABLE": "local-patients",
+    "ACCESS_AUDIT_TABLE": "local-access-audit",
+    "NOTIFY_TOPIC_ARN": "arn:aws:sns:us-east-1:000000000000:local-notify",
+    # El harness mide la latencia de ingest por su cuenta
+    "INGEST_LATENCY_LOG": "false",
+}
+for var, value in ENV.items():
+    os.environ.setdefault(var, value)
+
+from benchmarks.local_aws import CallCounter, FakeDynamo, FakeS3, FakeSNS, FakeSQS  # noqa: E402
+from services.common.audit import AUDIT_KEY_ATTRS  # noqa: E402
+from services.processor import worker  # noqa: E402
+
+PATIENTS = [f"P{i:05d}" for i in range(200)]
+
+
+def _load_lambda(name: str):
+    path = os.path.join(PROJECT_ROOT, "lambda", name, "app.py")
+    spec = importlib.util.spec_from_file_location(f"harness_lambda_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+ingest = _load_lambda("ingest")
+notify = _load_lambda("notify")
+
+
+# ---------------------------------------------------------------------------
+# Entorno local
+# ---------------------------------------------------------------------------
+
+class LocalAWS:
+    def __init__(self, latency: float):
+        self.counter = CallCounter()
+        self.s3 = FakeS3(self.counter, latency)
+        self.sqs = FakeSQS(self.counter, latency)
+        self.sns = FakeSNS(self.counter, latency)
+        self.dynamo = FakeDynamo(
+            self.counter,
+            {
+                ENV["LAB_RESULTS_TABLE"]: ("result_id", "patient_id"),
+                ENV["PATIENTS_TABLE"]: ("patient_id",),
+                ENV["ACCESS_AUDIT_TABLE"]: AUDIT_KEY_ATTRS,
+            },
+            latency,
+        )
+
+    def install(self):
+        """Apunta los clientes module-level de los tres componentes a los fakes."""
+        ingest.s3 = worker.s3 = self.s3
+        ingest.sqs = worker.sqs = self.sqs
+        ingest.dynamo = worker.dynamo = self.dynamo
+        worker.lab_results_table = self.dynamo.Table(ENV["LAB_RESULTS_TABLE"])
+        notify.sns = self.sns
+        notify.patients_table = self.dynamo.Table(ENV["PATIENTS_TABLE"])
+        # Los sinks quedan ligados a flush_after al importar: se cambia su cliente
+        for sink in (ingest.audit, worker.audit, notify.audit):
+            sink.dynamo = self.dynamo
+            sink._table = None
+
+    def seed_patients(self):
+        for pid in PATIENTS:
+            self.dynamo._put(
+                ENV["PATIENTS_TABLE"],
+                {"patient_id": pid, "first_name": "Paciente", "email": f"{pid.lower()}@example.com"},
+            )
+
+
+def make_payload(rng: random.Random, analytes: int) -> dict:
+    """Panel realista; con analytes=0 se mezcla el tamaño (la mayoría chicos)."""
+    if analytes <= 0:
+        roll = rng.random()
+        analytes = rng.randint(3, 20) if roll < 0.7 else rng.randint(50, 200) if roll < 0.95 else rng.randint(1000, 2000)
+    results = []
+    for i in range(analytes):
+        value = round(rng.uniform(2.0, 15.0), 2)
+        results.append(
+            {
+                "test_code": f"T{i:04d}",
+                "test_name": f"Analyte {i}",
+                "value": value,
+                "unit": "mg/dL",
+                "reference_range": "4.5-11.0",
+                "is_abnormal": not 4.5 <= value <= 11.0,
+            }
+        )
+    return {
+        "patient_id": rng.choice(PATIENTS),
+        "lab_id": "LAB001",
+        "lab_name": "Lab Central",
+        "test_type": "comprehensive_panel",
+        "test_date": "2024-01-15T10:30:00Z",
+        "results": results,
+        "notes": "harness",
+    }
+
+
+def _ingest_event(body: dict) -> dict:
+    return {
+        "httpMethod": "POST",
+        "path": "/api/v1/ingest",
+        "requestContext": {"identity": {"sourceIp": "127.0.0.1"}},
+        "body": json.dumps(body),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.aws = LocalAWS(args.aws_latency_ms / 1000.0)
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.started: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+        self.ingest_latencies: List[float] = []
+        self.rejected = 0
+        self.notified = 0
+
+    # -- productores --
+
+    def _producer(self, indexes, t0: float, seed: int):
+        rng = random.Random(seed)
+        rate = self.args.rate
+        for i in indexes:
+            if rate > 0:
+                delay = t0 + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            event = _ingest_event(make_payload(rng, self.args.analytes))
+            start = time.perf_counter()
+            resp = ingest.lambda_handler(event, None)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.ingest_latencies.append(elapsed)
+                if resp["statusCode"] == 202:
+                    self.started[json.loads(resp["body"])["result_id"]] = start
+                else:
+                    self.rejected += 1
+
+    # -- workers --
+
+    def _worker(self, executor):
+        while not self.stop.is_set():
+            messages = worker.receive_messages()
+            if messages:
+                worker.process_batch(messages, executor)
+
+    # -- notify (event source mapping de SQS -> Lambda) --
+
+    def _notifier(self):
+        sqs = self.aws.sqs
+        url = ENV["NOTIFY_QUEUE_URL"]
+        while not self.stop.is_set():
+            resp = sqs.receive_message(QueueUrl=url, MaxNumberOfMessages=10, WaitTimeSeconds=20, VisibilityTimeout=30)
+            messages = resp.get("Messages", [])
+            if not messages:
+                continue
+            notify.lambda_handler({"Records": [{"body": m["Body"]} for m in messages]}, None)
+            done = time.perf_counter()
+            sqs.delete_message_batch(
+                QueueUrl=url,
+                Entries=[{"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]} for i, m in enumerate(messages)],
+            )
+            with self.lock:
+                # El 202 puede llegar después que la notificación: se cruzan al final
+                for m in messages:
+                    self.finished[json.loads(m["Body"])["result_id"]] = done
+                self.notified += len(messages)
+
+    def run(self) -> dict:
+        args = self.args
+        self.aws.install()
+        self.aws.seed_patients()
+        self.aws.counter.reset()
+
+        executor = ThreadPoolExecutor(max_workers=args.concurrency) if args.concurrency > 1 else None
+        threads = [threading.Thread(target=self._worker, args=(executor,), daemon=True) for _ in range(args.workers)]
+        threads.append(threading.Thread(target=self._notifier, daemon=True))
+        for t in threads:
+            t.start()
+
+        t0 = time.perf_counter()
+        producers = [
+            threading.Thread(target=self._producer, args=(range(p, args.count, args.producers), t0, args.seed + p))
+            for p in range(args.producers)
+        ]
+        for p in producers:
+            p.start()
+        for p in producers:
+            p.join()
+
+        expected = args.count - self.rejected
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if self.notified >= expected:
+                    break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+
+        self.stop.set()
+        for t in threads:
+            t.join(timeout=5)
+        if executor:
+            executor.shutdown()
+        worker.audit.flush()
+        return self._report(elapsed, expected)
+
+    def _report(self, elapsed: float, expected: int) -> dict:
+        calls = self.aws.counter.snapshot()
+        latencies = [
+            self.finished[rid] - start for rid, start in self.started.items() if rid in self.finished
+        ]
+        completed = len(latencies)
+        per_result = {op: n / max(1, completed) for op, n in sorted(calls.items())}
+        return {
+            "sent": self.args.count,
+            "rejected": self.rejected,
+            "completed": completed,
+            "lost": expected - completed,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(completed / elapsed, 1) if elapsed else 0.0,
+            "e2e_ms": _percentiles(latencies),
+            "ingest_ms": _percentiles(self.ingest_latencies),
+            "aws_calls_per_result": {op: round(v, 3) for op, v in per_result.items()},
+            "aws_calls_per_result_total": round(sum(per_result.values()), 3),
+            "notifications_published": len(self.aws.sns.published),
+            "worker_stages": worker.timers.snapshot(),
+        }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {"p50": pct(50), "p90": pct(90), "p99": pct(99), "max": round(ordered[-1] * 1000, 2)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="resultados a enviar")
+    parser.add_argument("--rate", type=float, default=0, help="resultados/s (0 = lo más rápido posible)")
+    parser.add_argument("--producers", type=int, default=4, help="hilos llamando al handler de ingest")
+    parser.add_argument("--workers", type=int, default=1, help="loops receive + process_batch (receivers)")
+    parser.add_argument("--concurrency", type=int, default=worker.WORKER_CONCURRENCY, help="hilos por lote")
+    parser.add_argument("--analytes", type=int, default=0, help="analitos por resultado (0 = mezcla realista)")
+    parser.add_argument("--aws-latency-ms", type=float, default=0.0, help="latencia simulada por llamada")
+    parser.add_argument("--timeout", type=float, default=120.0, help="espera máxima a que drene el pipeline")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte como JSON")
+    args = parser.parse_args(argv)
+
+    # worker.py configura logging en INFO al importarse
+    logging.getLogger().setLevel(logging.WARNING)
+    report = Harness(args).run()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"enviados={report['sent']} rechazados={report['rejected']} completados={report['completed']} "
+              f"perdidos={report['lost']} en {report['elapsed_s']} s")
+        print(f"throughput: {report['throughput_per_s']} resultados/s")
+        print(f"e2e ms:     {report['e2e_ms']}")
+        print(f"ingest ms:  {report['ingest_ms']}")
+        print(f"llamadas AWS por resultado: {report['aws_calls_per_result_total']}")
+        for op, v in report["aws_calls_per_result"].items():
+            print(f"  {op:<40} {v:>8.3f}")
+        print("etapas del worker (ms):")
+        for stage, st in report["worker_stages"].items():
+            print(f"  {stage:<10} n={st['count']:<6} avg={st['avg_ms']:<8} p50={st['p50_ms']:<6} p99={st['p99_ms']}")
+    return 0 if report["lost"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
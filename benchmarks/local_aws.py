@@ -0,0 +1,318 @@
+"""
+Stand-ins en memoria de S3, SQS, DynamoDB y SNS para correr el pipeline
+sin cuenta de AWS (ver benchmarks/e2e_harness.py).
+
+Implementan solo las operaciones que usan ingest, worker y notify, con la
+misma forma de request/response que boto3. Todas cuentan llamadas por
+operación (CallCounter) y pueden simular latencia de red por llamada.
+
+Lo que sí replican porque afecta el comportamiento:
+  - SQS: visibilidad (un mensaje recibido no se vuelve a entregar hasta que
+    vence o se borra), long polling acotado, SentTimestamp.
+  - DynamoDB: rechaza floats igual que el serializer de boto3, y
+    BatchWriteItem / BatchGetItem con sus límites de 25 / 100 claves.
+  - S3: NoSuchKey como ClientError, Body como stream.
+"""
+import collections
+import io
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+
+class CallCounter:
+    """Cuenta llamadas por "servicio.operacion" (thread-safe)."""
+
+    def __init__(self):
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class _FakeService:
+    service = ""
+
+    def __init__(self, counter: CallCounter, latency: float = 0.0):
+        self.counter = counter
+        self.latency = latency
+
+    def _call(self, operation: str):
+        self.counter.add(f"{self.service}.{operation}")
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def _client_error(code: str, operation: str, message: str = "") -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message or code}}, operation)
+
+
+# ---------------------------------------------------------------------------
+# S3
+# ---------------------------------------------------------------------------
+
+class FakeS3(_FakeService):
+    service = "s3"
+
+    def __init__(self, counter: CallCounter, latency: float = 0.0):
+        super().__init__(counter, latency)
+        self.objects: Dict[tuple, bytes] = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._call("PutObject")
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.encode("utf-8")
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._call("GetObject")
+        data = self.objects.get((Bucket, Key))
+        if data is None:
+            raise _client_error("NoSuchKey", "GetObject")
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+
+# ---------------------------------------------------------------------------
+# SQS
+# ---------------------------------------------------------------------------
+
+class _Queue:
+    def __init__(self):
+        self.visible = collections.deque()
+        # receipt_handle -> (message, deadline)
+        self.in_flight: Dict[str, tuple] = {}
+
+
+class FakeSQS(_FakeService):
+    service = "sqs"
+
+    # Tope del long polling simulado (el harness no necesita esperar 20 s)
+    MAX_WAIT = 0.05
+
+    def __init__(self, counter: CallCounter, latency: float = 0.0):
+        super().__init__(counter, latency)
+        self._queues: Dict[str, _Queue] = collections.defaultdict(_Queue)
+        self._cond = threading.Condition()
+
+    def _enqueue(self, url: str, body: str) -> str:
+        message_id = str(uuid.uuid4())
+        msg = {
+            "MessageId": message_id,
+            "Body": body,
+            "Attributes": {"SentTimestamp": str(int(time.time() * 1000))},
+        }
+        self._queues[url].visible.append(msg)
+        return message_id
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        self._call("SendMessage")
+        with self._cond:
+            message_id = self._enqueue(QueueUrl, MessageBody)
+            self._cond.notify_all()
+        return {"MessageId": message_id}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self._call("SendMessageBatch")
+        with self._cond:
+            ok = [{"Id": e["Id"], "MessageId": self._enqueue(QueueUrl, e["MessageBody"])} for e in Entries]
+            self._cond.notify_all()
+        return {"Successful": ok, "Failed": []}
+
+    def _requeue_expired(self, queue: _Queue):
+        now = time.monotonic()
+        for handle, (msg, deadline) in list(queue.in_flight.items()):
+            if deadline <= now:
+                del queue.in_flight[handle]
+                queue.visible.append(msg)
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0, VisibilityTimeout=30, **kwargs):
+        self._call("ReceiveMessage")
+        deadline = time.monotonic() + min(WaitTimeSeconds, self.MAX_WAIT)
+        with self._cond:
+            queue = self._queues[QueueUrl]
+            while True:
+                self._requeue_expired(queue)
+                if queue.visible:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {"Messages": []}
+                self._cond.wait(remaining)
+
+            out = []
+            while queue.visible and len(out) < MaxNumberOfMessages:
+                msg = queue.visible.popleft()
+                handle = str(uuid.uuid4())
+                queue.in_flight[handle] = (msg, time.monotonic() + VisibilityTimeout)
+                out.append({**msg, "ReceiptHandle": handle})
+        return {"Messages": out}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self._call("DeleteMessageBatch")
+        with self._cond:
+            queue = self._queues[QueueUrl]
+            for e in Entries:
+                queue.in_flight.pop(e["ReceiptHandle"], None)
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self._call("ChangeMessageVisibilityBatch")
+        with self._cond:
+            queue = self._queues[QueueUrl]
+            for e in Entries:
+                entry = queue.in_flight.get(e["ReceiptHandle"])
+                if entry:
+                    queue.in_flight[e["ReceiptHandle"]] = (entry[0], time.monotonic() + e["VisibilityTimeout"])
+            self._cond.notify_all()
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+    def get_queue_attributes(self, QueueUrl, AttributeNames=None):
+        self._call("GetQueueAttributes")
+        with self._cond:
+            queue = self._queues[QueueUrl]
+            return {
+                "Attributes": {
+                    "ApproximateNumberOfMessages": str(len(queue.visible)),
+                    "ApproximateNumberOfMessagesNotVisible": str(len(queue.in_flight)),
+                }
+            }
+
+    def depth(self, url: str) -> int:
+        with self._cond:
+            queue = self._queues[url]
+            return len(queue.visible) + len(queue.in_flight)
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB (resource)
+# ---------------------------------------------------------------------------
+
+def _check_types(value: Any, path: str = "Item"):
+    # Igual que boto3.dynamodb.types.TypeSerializer
+    if isinstance(value, float):
+        raise TypeError(f"Float types are not supported. Use Decimal types instead. ({path})")
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _check_types(v, f"{path}.{k}")
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            _check_types(v, f"{path}[{i}]")
+
+
+class FakeTable:
+    def __init__(self, db: "FakeDynamo", name: str):
+        self.db = db
+        self.name = name
+
+    def put_item(self, Item, **kwargs):
+        self.db._call("PutItem")
+        self.db._put(self.name, Item)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self.db._call("GetItem")
+        item = self.db._get(self.name, Key)
+        return {"Item": item} if item is not None else {}
+
+    def query(self, KeyConditionExpression, **kwargs):
+        self.db._call("Query")
+        # Solo igualdades sobre atributos (Key("x").eq(v) [& Key("y").eq(w)])
+        conditions = {}
+        pending = [KeyConditionExpression]
+        while pending:
+            expr = pending.pop().get_expression()
+            if expr["operator"] == "AND":
+                pending.extend(expr["values"])
+            else:
+                key, value = expr["values"]
+                conditions[key.name] = value
+        with self.db._lock:
+            items = [
+                dict(item)
+                for item in self.db.tables[self.name].values()
+                if all(item.get(k) == v for k, v in conditions.items())
+            ]
+        return {"Items": items, "Count": len(items)}
+
+
+class FakeDynamo(_FakeService):
+    service = "dynamodb"
+
+    def __init__(self, counter: CallCounter, key_attrs: Dict[str, tuple], latency: float = 0.0):
+        """key_attrs: tabla -> atributos de su clave primaria."""
+        super().__init__(counter, latency)
+        self.key_attrs = key_attrs
+        self.tables: Dict[str, Dict[tuple, dict]] = collections.defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def _key(self, table: str, item: dict) -> tuple:
+        return tuple(item[a] for a in self.key_attrs[table])
+
+    def _put(self, table: str, item: dict):
+        _check_types(item)
+        with self._lock:
+            self.tables[table][self._key(table, item)] = dict(item)
+
+    def _get(self, table: str, key: dict) -> Optional[dict]:
+        with self._lock:
+            item = self.tables[table].get(self._key(table, key))
+            return dict(item) if item is not None else None
+
+    def Table(self, name: str) -> FakeTable:
+        return FakeTable(self, name)
+
+    def batch_write_item(self, RequestItems):
+        self._call("BatchWriteItem")
+        requests = [r for reqs in RequestItems.values() for r in reqs]
+        if len(requests) > 25:
+            raise _client_error("ValidationException", "BatchWriteItem", "Too many items requested")
+        for table, reqs in RequestItems.items():
+            for req in reqs:
+                self._put(table, req["PutRequest"]["Item"])
+        return {"UnprocessedItems": {}}
+
+    def batch_get_item(self, RequestItems):
+        self._call("BatchGetItem")
+        if sum(len(spec["Keys"]) for spec in RequestItems.values()) > 100:
+            raise _client_error("ValidationException", "BatchGetItem", "Too many items requested")
+        responses = {}
+        for table, spec in RequestItems.items():
+            found = [self._get(table, key) for key in spec["Keys"]]
+            attrs = spec.get("ProjectionExpression")
+            items = [item for item in found if item is not None]
+            if attrs:
+                names = [a.strip() for a in attrs.split(",")]
+                items = [{k: item[k] for k in names if k in item} for item in items]
+            responses[table] = items
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+# ---------------------------------------------------------------------------
+# SNS
+# ---------------------------------------------------------------------------
+
+class FakeSNS(_FakeService):
+    service = "sns"
+
+    def __init__(self, counter: CallCounter, latency: float = 0.0):
+        super().__init__(counter, latency)
+        self.published = []
+        self._lock = threading.Lock()
+
+    def publish(self, TopicArn, Message, Subject=None, **kwargs):
+        self._call("Publish")
+        with self._lock:
+            self.published.append({"TopicArn": TopicArn, "Subject": Subject, "Message": Message})
+        return {"MessageId": str(uuid.uuid4())}
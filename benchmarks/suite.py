@@ -0,0 +1,311 @@
+"""
+Suite de micro-benchmarks de los caminos calientes en Python puro.
+
+Casos (cada uno con payloads sintéticos de 1 a 5000 analitos):
+  - process_lab_result            (services/processor/process_utils.py)
+  - _convert_floats_to_decimal    (services/processor/worker.py)
+  - validate_payload              (lambda/ingest/app.py)
+  - _generate_fake_pdf_bytes      (lambda/report/app.py, desde el item de DynamoDB)
+  - _get_method_and_path          (lambda/ingest/app.py, eventos v1 y v2)
+
+Por caso y tamaño reporta µs por llamada y el pico de memoria de una
+llamada (tracemalloc). Los baselines viven en benchmarks/baselines.json; si
+un caso pasa del umbral contra su baseline el proceso sale con código 1.
+
+Para que el gate no dependa del ruido del host:
+  - `number` se calibra para que cada repetición dure al menos
+    BENCH_MIN_REPEAT_SECONDS (los casos rápidos ya no se miden en pocos µs).
+  - Cada repetición mide un loop de referencia en Python puro y enseguida
+    el caso; el gate compara la mediana del cociente caso / referencia, no
+    µs absolutos: si el host anda más lento (frecuencia, vecinos ruidosos)
+    se mueven los dos. µs/llamada (mediana) se sigue reportando.
+
+Uso:
+    python benchmarks/suite.py                       # compara contra baselines
+    python benchmarks/suite.py --update-baselines    # reescribe baselines.json
+    python benchmarks/suite.py -k pdf --sizes 1,100  # filtra casos / tamaños
+
+Los tiempos dependen de la máquina: los baselines hay que regenerarlos en el
+mismo tipo de host donde se van a comparar (el archivo guarda versión de
+Python y plataforma, y se avisa si no coinciden).
+"""
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+SIZES = (1, 10, 100, 1000, 5000)
+
+# Umbrales de regresión (nuevo / baseline)
+TIME_THRESHOLD = float(os.environ.get("BENCH_TIME_THRESHOLD", "1.30"))
+MEMORY_THRESHOLD = float(os.environ.get("BENCH_MEMORY_THRESHOLD", "1.10"))
+# Holgura absoluta para tamaños chicos (ruido de tracemalloc / timer)
+MEMORY_SLACK_BYTES = 2048
+TIME_SLACK_US = 0.5
+
+# Medición (ver docstring)
+REPEATS = int(os.environ.get("BENCH_REPEATS", "9"))
+MIN_REPEAT_SECONDS = float(os.environ.get("BENCH_MIN_REPEAT_SECONDS", "0.05"))
+
+# Los módulos leen su configuración al importarse
+for var, value in {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "LAB_RESULTS_QUEUE_URL": "https://sqs.local/lab-results",
+    "NOTIFY_QUEUE_URL": "https://sqs.local/notify",
+    "RAW_BUCKET": "bench-raw",
+    "REPORT_BUCKET": "bench-reports",
+    "LAB_RESULTS_TABLE": "bench-lab-results",
+    "PATIENTS_TABLE": "bench-patients",
+}.items():
+    os.environ.setdefault(var, value)
+
+from services.processor.process_utils import process_lab_result  # noqa: E402
+from services.processor.worker import _convert_floats_to_decimal  # noqa: E402
+
+
+def _load_lambda(name: str):
+    """Importa lambda/<name>/app.py (el directorio `lambda` no es importable)."""
+    path = os.path.join(PROJECT_ROOT, "lambda", name, "app.py")
+    spec = importlib.util.spec_from_file_location(f"bench_lambda_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+ingest = _load_lambda("ingest")
+report = _load_lambda("report")
+
+
+# ---------------------------------------------------------------------------
+# Payloads sintéticos
+# ---------------------------------------------------------------------------
+
+def make_payload(n_results: int) -> Dict[str, Any]:
+    return {
+        "patient_id": "P123456",
+        "lab_id": "LAB001",
+        "lab_name": "Quest Diagnostics",
+        "test_type": "comprehensive_panel",
+        "test_date": "2024-01-15T10:30:00Z",
+        "results": [
+            {
+                "test_code": f"T{i:04d}",
+                "test_name": f"Analyte {i}",
+                "value": 10.0 + i * 0.37,
+                "unit": "mg/dL",
+                "reference_range": "4.5-11.0",
+                "is_abnormal": i % 9 == 0,
+            }
+            for i in range(n_results)
+        ],
+        "notes": "benchmark",
+    }
+
+
+def _event_v1(n: int) -> dict:
+    return {
+        "httpMethod": "POST",
+        "path": "/prod/api/v1/ingest",
+        "headers": {f"X-Header-{i}": "v" for i in range(min(n, 50))},
+        "body": "{}",
+    }
+
+
+def _event_v2(n: int) -> dict:
+    return {
+        "rawPath": "/api/v1/status/R1",
+        "requestContext": {"http": {"method": "GET", "path": "/api/v1/status/R1", "sourceIp": "10.0.0.1"}},
+        "headers": {f"x-header-{i}": "v" for i in range(min(n, 50))},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Casos: setup(n) -> argumento; run(argumento) -> resultado
+# ---------------------------------------------------------------------------
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    sizes: tuple = SIZES
+
+
+def _item_for_report(n: int) -> dict:
+    item = _convert_floats_to_decimal(process_lab_result(make_payload(n), result_id="R1"))
+    return {"patient": {"patient_id": "P123456", "first_name": "Ana", "last_name": "Pérez"}, "item": item}
+
+
+CASES: List[Case] = [
+    Case("process_lab_result", make_payload, lambda p: process_lab_result(p, result_id="R1")),
+    Case(
+        "_convert_floats_to_decimal",
+        lambda n: process_lab_result(make_payload(n), result_id="R1"),
+        _convert_floats_to_decimal,
+    ),
+    Case("validate_payload", make_payload, ingest.validate_payload),
+    Case(
+        "_generate_fake_pdf_bytes",
+        _item_for_report,
+        lambda a: report._generate_fake_pdf_bytes(a["patient"], a["item"]),
+    ),
+    Case("_get_method_and_path[v1]", _event_v1, ingest._get_method_and_path, sizes=(1, 50)),
+    Case("_get_method_and_path[v2]", _event_v2, ingest._get_method_and_path, sizes=(1, 50)),
+]
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def _reference_loop() -> float:
+    # Mezcla de lo que hacen los casos: dicts, floats y strings
+    acc = 0.0
+    row: Dict[str, float] = {}
+    for i in range(2000):
+        key = f"k{i % 50}"
+        row[key] = i * 0.37
+        acc += row[key]
+    return acc
+
+
+def _calibrate(timer: timeit.Timer) -> int:
+    """`number` para que una repetición dure al menos MIN_REPEAT_SECONDS (como Timer.autorange)."""
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_REPEAT_SECONDS:
+            return number
+        number = max(number * 2, int(number * MIN_REPEAT_SECONDS / max(elapsed, 1e-9)))
+
+
+def measure(case: Case, n: int) -> Dict[str, float]:
+    arg = case.setup(n)
+    # Ninguno de los casos muta su entrada; se verifica para no medir basura
+    snapshot = copy.deepcopy(arg)
+
+    tracemalloc.start()
+    case.run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    case_timer = timeit.Timer(lambda: case.run(arg))
+    reference_timer = timeit.Timer(_reference_loop)
+    number = _calibrate(case_timer)
+    reference_number = _calibrate(reference_timer)
+
+    # Referencia y caso alternados en cada repetición: una ráfaga de ruido
+    # del host afecta a los dos y el cociente casi no se mueve
+    per_call, ratios = [], []
+    for _ in range(REPEATS):
+        reference = reference_timer.timeit(reference_number) / reference_number
+        elapsed = case_timer.timeit(number) / number
+        per_call.append(elapsed)
+        ratios.append(elapsed / reference)
+    if arg != snapshot:
+        raise RuntimeError(f"{case.name} modificó su entrada; el benchmark no es válido")
+    return {
+        "us_per_call": round(statistics.median(per_call) * 1e6, 3),
+        "ratio": round(statistics.median(ratios), 6),
+        "peak_bytes": peak,
+    }
+
+
+def _environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "platform": platform.platform(terse=True)}
+
+
+def load_baselines() -> Dict[str, Any]:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float]) -> List[str]:
+    """Devuelve las regresiones (vacío si está dentro de los umbrales)."""
+    problems = []
+    t_new, t_old = current["us_per_call"], baseline["us_per_call"]
+    if baseline.get("ratio") and current.get("ratio"):
+        # Baseline llevado a la velocidad del host en esta corrida:
+        # ratio_baseline * (µs de la referencia ahora)
+        t_old = baseline["ratio"] * t_new / current["ratio"]
+    if t_new > t_old * TIME_THRESHOLD + TIME_SLACK_US:
+        problems.append(f"tiempo {t_old:.1f} -> {t_new:.1f} µs ({t_new / t_old:.2f}x)")
+    m_new, m_old = current["peak_bytes"], baseline["peak_bytes"]
+    if m_new > m_old * MEMORY_THRESHOLD + MEMORY_SLACK_BYTES:
+        problems.append(f"memoria {m_old / 1024:.1f} -> {m_new / 1024:.1f} KiB")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("-k", dest="keyword", default="", help="solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--sizes", default="", help="tamaños separados por coma (default: todos)")
+    args = parser.parse_args(argv)
+
+    only_sizes = {int(s) for s in args.sizes.split(",") if s}
+    baselines = load_baselines()
+    cases_baseline = baselines.get("cases", {})
+
+    if baselines and baselines.get("environment") != _environment() and not args.update_baselines:
+        print(
+            f"AVISO: baselines generados en {baselines.get('environment')}, "
+            f"esta corrida es {_environment()}; los tiempos pueden no ser comparables"
+        )
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    regressions = []
+    print(f"{'caso':<30} {'analitos':>8} {'µs/llamada':>12} {'pico KiB':>10} {'baseline µs':>12}  estado")
+    for case in CASES:
+        if args.keyword and args.keyword not in case.name:
+            continue
+        for n in case.sizes:
+            if only_sizes and n not in only_sizes:
+                continue
+            current = measure(case, n)
+            results.setdefault(case.name, {})[str(n)] = current
+
+            base = cases_baseline.get(case.name, {}).get(str(n))
+            status, base_us = "nuevo", "-"
+            if base:
+                base_us = f"{base['us_per_call']:.1f}"
+                problems = compare(current, base)
+                status = "ok" if not problems else "REGRESIÓN: " + "; ".join(problems)
+                if problems:
+                    regressions.append((case.name, n))
+            print(
+                f"{case.name:<30} {n:>8} {current['us_per_call']:>12.1f} "
+                f"{current['peak_bytes'] / 1024:>10.1f} {base_us:>12}  {status}"
+            )
+
+    if args.update_baselines:
+        merged = dict(cases_baseline)
+        for name, by_size in results.items():
+            merged.setdefault(name, {}).update(by_size)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump({"environment": _environment(), "cases": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines actualizados en {BASELINES_PATH}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regresiones sobre el umbral (tiempo x{TIME_THRESHOLD}, memoria x{MEMORY_THRESHOLD})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
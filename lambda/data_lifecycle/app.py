@@ -2,17 +2,21 @@ import os
 import json
 from datetime import datetime, timezone
 
-import boto3
-from boto3.dynamodb.conditions import Attr
+from services.common.audit import AuditSink, flush_after
+from services.common.aws import lazy_resource, lazy_table
 
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
 
 LAB_RESULTS_TABLE = os.environ["LAB_RESULTS_TABLE"]
 ACCESS_AUDIT_TABLE = os.environ["ACCESS_AUDIT_TABLE"]
 
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
-lab_results_table = dynamo.Table(LAB_RESULTS_TABLE)
-access_audit_table = dynamo.Table(ACCESS_AUDIT_TABLE)
+# Se construyen en el primer uso y quedan cacheados en el contenedor
+dynamo = lazy_resource("dynamodb", region_name=REGION_NAME)
+lab_results_table = lazy_table(dynamo, LAB_RESULTS_TABLE)
+
+# Los DATA_*_DELETE se escriben con strict=True; flush_after cubre
+# cualquier evento en buffer
+audit = AuditSink(ACCESS_AUDIT_TABLE, dynamo)
 
 
 def _now_iso():
@@ -22,21 +26,23 @@ def _now_iso():
 def _put_audit_delete(result_id: str, patient_id: str, mode: str, details: str = ""):
     """
     Registra en access_audit que se hizo una acción de lifecycle
-    (anonimización / marcado / etc.).
+    (anonimización / marcado / etc.). Síncrono (strict): si falla, la
+    ejecución falla en vez de seguir borrando sin registro.
     """
-    item = {
-        "audit_id": f"lifecycle-{result_id}",
-        "timestamp": _now_iso(),
-        "action": f"DATA_{mode}_DELETE",
-        "actor_id": "system_lifecycle",
-        "patient_id": patient_id,
-        "result_id": result_id,
-        "details": details,
-        "source": "lifecycle_lambda",
-    }
-    access_audit_table.put_item(Item=item)
+    audit.emit(
+        f"DATA_{mode}_DELETE",
+        "system_lifecycle",
+        strict=True,
+        audit_id=f"lifecycle-{result_id}",
+        timestamp=_now_iso(),
+        patient_id=patient_id,
+        result_id=result_id,
+        details=details,
+        source="lifecycle_lambda",
+    )
 
 
+@flush_after(audit)
 def lambda_handler(event, context):
     """
     Ejecutado periódicamente por EventBridge (p.ej. diario).
@@ -50,6 +56,8 @@ def lambda_handler(event, context):
           -> dejar que TTL borre físicamente, pero marcar gdpr_delete_requested = false
              y auditar la intención.
     """
+    from boto3.dynamodb.conditions import Attr
+
     # Escanear items con gdpr_delete_requested = true
     resp = lab_results_table.scan(
         FilterExpression=Attr("gdpr_delete_requested").eq(True)
@@ -1,38 +1,86 @@
+import base64
+import hashlib
 import json
 import uuid
 import os
+import time
 from datetime import datetime, timezone
-
-import boto3
-from boto3.dynamodb.conditions import Key
-
-s3 = boto3.client("s3")
-sqs = boto3.client("sqs")
-dynamo = boto3.resource("dynamodb")
+from email.utils import format_datetime
+
+from services.common.audit import AuditSink, AuditThrottle, build_audit_item, flush_after
+from services.common.aws import Lazy, lazy_client, lazy_resource
+from services.common.models import LabResult
+from services.common.sqs_batch import send_message_batch
+from services.common.ttl_cache import TTLCache
+from services.common.validation import validate_lab_result
+
+# POST /api/v1/ingest/batch: máximo de resultados por request y PUTs a S3
+# en paralelo (el pool de conexiones de S3 se dimensiona igual)
+INGEST_BATCH_MAX_ENTRIES = int(os.environ.get("INGEST_BATCH_MAX_ENTRIES", "500"))
+INGEST_BATCH_CONCURRENCY = max(1, int(os.environ.get("INGEST_BATCH_CONCURRENCY", "16")))
+# POST /api/v1/status/batch: máximo de ids por request y queries en paralelo
+# (dimensiona el pool de DynamoDB)
+STATUS_BATCH_MAX_IDS = int(os.environ.get("STATUS_BATCH_MAX_IDS", "500"))
+STATUS_BATCH_CONCURRENCY = max(1, int(os.environ.get("STATUS_BATCH_CONCURRENCY", "16")))
+
+# Se construyen en el primer uso: health no toca S3 ni SQS
+s3 = lazy_client("s3", INGEST_BATCH_CONCURRENCY)
+sqs = lazy_client("sqs")
+dynamo = lazy_resource("dynamodb", STATUS_BATCH_CONCURRENCY)
 
 RAW_BUCKET = os.environ["RAW_BUCKET"]
 LAB_RESULTS_QUEUE_URL = os.environ["LAB_RESULTS_QUEUE_URL"]
 LAB_RESULTS_TABLE = os.environ.get("LAB_RESULTS_TABLE")
 ACCESS_AUDIT_TABLE = os.environ.get("ACCESS_AUDIT_TABLE")
 
+# Claim-check: payloads hasta este tamaño viajan dentro del mensaje SQS
+# (el worker no tiene que ir a S3). El límite de SQS es 256 KiB por
+# mensaje; 0 desactiva el envío inline.
+INLINE_PAYLOAD_MAX_BYTES = int(os.environ.get("INLINE_PAYLOAD_MAX_BYTES", str(64 * 1024)))
+
+# GET /api/v1/status: los estados terminales no vuelven a cambiar, así que
+# se cachean en el contenedor y se responden sin ir a DynamoDB
+STATUS_CACHE_STATES = {"PROCESSED"}
+STATUS_CACHE_TTL = float(os.environ.get("STATUS_CACHE_TTL", "300"))
+STATUS_CACHE_MAX_ENTRIES = int(os.environ.get("STATUS_CACHE_MAX_ENTRIES", "5000"))
+# Polls repetidos del mismo result_id desde la misma IP dentro de esta
+# ventana se cuentan en vez de escribir un registro de auditoría cada uno
+STATUS_AUDIT_WINDOW = float(os.environ.get("STATUS_AUDIT_WINDOW", "60"))
+
+# Eventos en buffer; se escriben en lote al final de cada invocación
+audit = AuditSink(ACCESS_AUDIT_TABLE, dynamo)
+
+status_cache = TTLCache(STATUS_CACHE_MAX_ENTRIES, STATUS_CACHE_TTL)
+
+
+def _new_side_effects_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+
 
-def _response(status_code: int, body: dict) -> dict:
+# handle_ingest: PUT a S3 y SendMessage corren acá mientras el hilo del
+# request escribe la auditoría. Uno por contenedor, reusado entre
+# invocaciones.
+side_effects_pool = Lazy(_new_side_effects_pool, name="ingest_side_effects")
+
+# Una línea INGEST_LATENCY por request con el desglose de tiempos
+INGEST_LATENCY_LOG = os.environ.get("INGEST_LATENCY_LOG", "true").lower() == "true"
+
+
+def _response(status_code: int, body: dict, headers: dict | None = None) -> dict:
     return {
         "statusCode": status_code,
-        "headers": {"Content-Type": "application/json"},
+        "headers": {"Content-Type": "application/json", **(headers or {})},
         "body": json.dumps(body),
     }
 
 
-def validate_payload(body: dict) -> tuple[bool, str | None]:
-    required = ["patient_id", "lab_id", "lab_name", "test_type", "test_date", "results"]
-    missing = [f for f in required if f not in body]
-    if missing:
-        return False, f"Missing fields: {', '.join(missing)}"
-
-    if not isinstance(body.get("results"), list) or not body["results"]:
-        return False, "Field 'results' must be a non-empty list"
-
+def validate_payload(body: dict | LabResult) -> tuple[bool, str | None]:
+    # Acepta el dict raw o un LabResult
+    errors = validate_lab_result(body)
+    if errors:
+        return False, "; ".join(errors)
     return True, None
 
 
@@ -44,36 +92,45 @@ def _put_audit_event(
     result_id: str | None = None,
     justification: str | None = None,
     break_glass: bool = False,
+    strict: bool = False,
+    **extra,
 ) -> None:
     """
-    Inserta un registro en la tabla access_audit (si está configurada).
-    Si no hay tabla, simplemente no hace nada.
+    Registra un evento en la tabla access_audit (si está configurada).
+    Con strict=True se escribe antes de responder; si no, va al buffer
+    que se vacía al final de la invocación.
     """
-    if not ACCESS_AUDIT_TABLE:
-        return
-
-    table = dynamo.Table(ACCESS_AUDIT_TABLE)
-
-    now = datetime.now(timezone.utc)
-    iso_now = now.isoformat()
-    audit_id = str(uuid.uuid4())
-
-    item = {
-        "audit_id": audit_id,
-        "timestamp": iso_now,
-        "action": action,         # e.g. "INGEST_CREATE", "RESULT_STATUS_READ"
-        "actor_id": actor_id,     # e.g. "external_lab:LAB001"
-        "source_ip": source_ip or "unknown",
-        "patient_id": patient_id,
-        "result_id": result_id,
-        "justification": justification,
-        "break_glass": break_glass,
-    }
+    audit.emit(
+        action,         # e.g. "INGEST_CREATE", "RESULT_STATUS_READ"
+        actor_id,       # e.g. "external_lab:LAB001"
+        strict=strict,
+        source_ip=source_ip or "unknown",
+        patient_id=patient_id,
+        result_id=result_id,
+        justification=justification,
+        break_glass=break_glass,
+        **extra,
+    )
 
-    # quitar campos None
-    item = {k: v for k, v in item.items() if v is not None}
 
-    table.put_item(Item=item)
+def _audit_suppressed_reads(key: tuple, suppressed: int) -> None:
+    """
+    Conteo de una ventana de status_audit_throttle que se cerró sin otra
+    lectura del mismo result_id/IP que lo lleve (p. ej. el cliente dejó
+    de hacer polling): se registra aparte para no perder esas lecturas.
+    """
+    result_id, source_ip = key
+    _put_audit_event(
+        action="RESULT_STATUS_READS_SUPPRESSED",
+        actor_id="external_lab_or_monitor",
+        source_ip=source_ip,
+        result_id=result_id,
+        suppressed_reads=suppressed,
+    )
+
+
+# Lecturas de status por (result_id, IP); flush_after barre las ventanas vencidas
+status_audit_throttle = AuditThrottle(STATUS_AUDIT_WINDOW, on_expire=_audit_suppressed_reads)
 
 
 def handle_health(event, context):
@@ -86,91 +143,462 @@ def handle_health(event, context):
     return _response(200, {"status": "ok", "service": "ingest"})
 
 
+def _status_view(result_id: str, item: dict | None) -> tuple[dict, dict]:
+    """Body y headers de caché (ETag / Last-Modified) de un status."""
+    if item is None:
+        body = {"result_id": result_id, "status": "PENDING"}
+        basis = f"{result_id}|PENDING"
+    else:
+        body = {
+            "result_id": result_id,
+            "status": item.get("status", "UNKNOWN"),
+            "patient_id": item.get("patient_id"),
+            "test_type": item.get("test_type"),
+            "test_date": item.get("test_date"),
+            "has_abnormal": item.get("has_abnormal", False),
+        }
+        # El worker reescribe updated_at en cada escritura del item
+        basis = f"{result_id}|{body['status']}|{item.get('updated_at')}"
+
+    headers = {"ETag": f'"{hashlib.sha1(basis.encode("utf-8")).hexdigest()[:20]}"'}
+    last_modified = _http_date(item.get("updated_at")) if item else None
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if body["status"] in STATUS_CACHE_STATES:
+        headers["Cache-Control"] = f"private, max-age={int(STATUS_CACHE_TTL)}"
+    else:
+        headers["Cache-Control"] = "no-cache"
+    return body, headers
+
+
+def _http_date(iso_value) -> str | None:
+    if not isinstance(iso_value, str):
+        return None
+    try:
+        value = datetime.fromisoformat(iso_value[:-1] + "+00:00" if iso_value.endswith("Z") else iso_value)
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Comparación débil (RFC 9110): W/"x" y "x" son el mismo tag
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
+
+
+def _lookup_status(result_id: str) -> tuple[dict, dict]:
+    """(body, headers) del status; los terminales salen de status_cache."""
+    cached = status_cache.get(result_id)
+    if cached is not None:
+        return cached
+
+    # Import diferido: solo esta ruta arma condiciones de DynamoDB
+    from boto3.dynamodb.conditions import Key
+
+    table = dynamo.Table(LAB_RESULTS_TABLE)
+    resp = table.query(KeyConditionExpression=Key("result_id").eq(result_id))
+    items = resp.get("Items", [])
+
+    view = _status_view(result_id, items[0] if items else None)
+    if view[0]["status"] in STATUS_CACHE_STATES:
+        status_cache.put(result_id, view)
+    return view
+
+
 def handle_status(event, context, path: str):
     if not LAB_RESULTS_TABLE:
         return _response(500, {"error": "LAB_RESULTS_TABLE not configured"})
 
     # path esperado: /api/v1/status/{result_id}
     result_id = path.rsplit("/", 1)[-1]
-
-    table = dynamo.Table(LAB_RESULTS_TABLE)
-    resp = table.query(KeyConditionExpression=Key("result_id").eq(result_id))
-    items = resp.get("Items", [])
+    body, headers = _lookup_status(result_id)
 
     source_ip = _get_source_ip(event)
+    suppressed = status_audit_throttle.admit((result_id, source_ip))
+    if suppressed is not None:
+        _put_audit_event(
+            action="RESULT_STATUS_READ",
+            actor_id="external_lab_or_monitor",
+            source_ip=source_ip,
+            result_id=result_id,
+            # Lecturas del mismo result_id/IP colapsadas desde el registro anterior
+            suppressed_reads=suppressed or None,
+        )
+
+    if _etag_matches(_get_header(event, "If-None-Match"), headers["ETag"]):
+        return {"statusCode": 304, "headers": headers, "body": ""}
+    return _response(200, body, headers)
+
+
+def handle_status_batch(event, context, path: str):
+    """
+    POST /api/v1/status/batch con {"result_ids": [...]}: el status de
+    muchos resultados en una invocación. Las queries van en paralelo
+    (STATUS_BATCH_CONCURRENCY) y pasan por la misma caché que GET
+    /status; se escribe un solo registro de auditoría para todo el lote.
+    Responde {"statuses": {result_id: status}} (y "errors" si alguno falló).
+    """
+    if not LAB_RESULTS_TABLE:
+        return _response(500, {"error": "LAB_RESULTS_TABLE not configured"})
+
+    try:
+        raw = event.get("body") or "{}"
+        if event.get("isBase64Encoded"):
+            raw = base64.b64decode(raw)
+        body = json.loads(raw)
+    except (ValueError, TypeError):
+        return _response(400, {"error": "invalid_json"})
+
+    ids = body.get("result_ids") if isinstance(body, dict) else None
+    if (
+        not isinstance(ids, list)
+        or not ids
+        or not all(isinstance(i, str) and i.strip() and len(i) <= 128 for i in ids)
+    ):
+        return _response(400, {"error": "Field 'result_ids' must be a non-empty list of strings"})
+
+    result_ids = list(dict.fromkeys(ids))
+    if len(result_ids) > STATUS_BATCH_MAX_IDS:
+        return _response(
+            413,
+            {"error": "batch_too_large", "max_ids": STATUS_BATCH_MAX_IDS, "received": len(result_ids)},
+        )
+
+    # Import diferido: concurrent.futures solo hace falta en las rutas batch
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(STATUS_BATCH_CONCURRENCY, len(result_ids))) as pool:
+        futures = {result_id: pool.submit(_lookup_status, result_id) for result_id in result_ids}
+
+    statuses: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    for result_id, future in futures.items():
+        if future.exception() is not None:
+            print(f"ERROR consultando status de result_id={result_id}: {future.exception()!r}")
+            errors[result_id] = "lookup_failed"
+        else:
+            statuses[result_id] = future.result()[0]["status"]
+
     _put_audit_event(
-        action="RESULT_STATUS_READ",
+        action="RESULT_STATUS_BATCH_READ",
         actor_id="external_lab_or_monitor",
-        source_ip=source_ip,
-        result_id=result_id,
+        source_ip=_get_source_ip(event),
+        result_ids=result_ids,
+        result_count=len(result_ids),
     )
 
-    if not items:
-        return _response(200, {"result_id": result_id, "status": "PENDING"})
+    out: dict = {"statuses": statuses}
+    if errors:
+        out["errors"] = errors
+    return _response(200, out)
 
-    item = items[0]
-    return _response(
-        200,
-        {
-            "result_id": result_id,
-            "status": item.get("status", "UNKNOWN"),
-            "patient_id": item.get("patient_id"),
-            "test_type": item.get("test_type"),
-            "test_date": item.get("test_date"),
-            "has_abnormal": item.get("has_abnormal", False),
-        },
-    )
+
+def _timed(fn, *args, **kwargs) -> float:
+    """Ejecuta fn y devuelve cuánto tardó, en ms (propaga la excepción)."""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return round((time.perf_counter() - start) * 1000, 2)
 
 
 def handle_ingest(event, context, path: str):
+    """
+    POST /api/v1/ingest. Efectos y orden:
+
+      - raw a S3 y auditoría INGEST_CREATE (strict) siempre en paralelo.
+      - payload inline: SendMessage también en paralelo; el worker no lee
+        S3, así que no depende del PUT. Si el PUT falla con el mensaje ya
+        encolado se reintenta una vez (la copia raw es de cumplimiento).
+      - payload por referencia (s3_key): SendMessage recién cuando el PUT
+        y la auditoría terminaron bien; si no, el worker iría a buscar un
+        objeto inexistente o procesaría un resultado sin INGEST_CREATE
+        (igual que handle_ingest_batch, que no encola lo no auditado).
+
+    El 202 sale solo si los tres quedaron durables. Si algo falla se
+    responde 500 con el error del primer paso que falló (storage_failed,
+    enqueue_failed, audit_failed) y "enqueued", para que el cliente sepa
+    si el resultado igual se va a procesar y no lo reenvíe a ciegas; la
+    auditoría registra además un INGEST_FAILED con el detalle.
+
+    Por request se loguea una línea INGEST_LATENCY con el tiempo de cada
+    paso (los pasos en paralelo se solapan: total < suma).
+    """
+    start = time.perf_counter()
     try:
         raw_body = event.get("body") or "{}"
         body = json.loads(raw_body)
     except json.JSONDecodeError:
         return _response(400, {"error": "invalid_json"})
 
-    ok, error = validate_payload(body)
-    if not ok:
-        return _response(400, {"error": error})
+    # Se rechaza en el borde antes de pagar S3 + SQS + worker; todos los
+    # errores van juntos en "details"
+    errors = validate_lab_result(body)
+    if errors:
+        return _response(400, {"error": "; ".join(errors), "details": errors})
+
+    result_id, s3_key, raw_bytes, msg = _prepare_entry(body)
+    inline = "payload" in msg
+    source_ip = _get_source_ip(event)
+    actor_id = f"external_lab:{body.get('lab_id')}"
+    timings: dict = {"validate_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def enqueue():
+        sqs.send_message(QueueUrl=LAB_RESULTS_QUEUE_URL, MessageBody=json.dumps(msg))
+
+    # guardar raw en S3 (cumplimiento / trazabilidad); se escribe siempre,
+    # aunque el payload viaje inline
+    store_future = side_effects_pool.submit(_timed, _store_raw, s3_key, raw_bytes)
+    enqueue_future = side_effects_pool.submit(_timed, enqueue) if inline else None
+
+    failures: dict[str, str] = {}
+    try:
+        timings["audit_ms"] = _timed(
+            _put_audit_event,
+            action="INGEST_CREATE",
+            actor_id=actor_id,
+            source_ip=source_ip,
+            patient_id=body["patient_id"],
+            result_id=result_id,
+            justification="system_ingest",
+            strict=True,
+        )
+    except Exception as e:
+        failures["audit_failed"] = repr(e)
+
+    try:
+        timings["s3_ms"] = store_future.result()
+    except Exception as e:
+        failures["storage_failed"] = repr(e)
+
+    enqueued = False
+    try:
+        if enqueue_future is not None:
+            timings["sqs_ms"] = enqueue_future.result()
+            enqueued = True
+        elif "storage_failed" not in failures and "audit_failed" not in failures:
+            timings["sqs_ms"] = _timed(enqueue)
+            enqueued = True
+    except Exception as e:
+        failures["enqueue_failed"] = repr(e)
+
+    if enqueued and "storage_failed" in failures:
+        # Inline: el worker ya puede procesar el resultado sin el raw, pero
+        # la copia en S3 es la de cumplimiento. raw_bytes sigue en memoria,
+        # así que se reintenta el PUT una vez antes de responder.
+        try:
+            timings["s3_retry_ms"] = _timed(_store_raw, s3_key, raw_bytes)
+            del failures["storage_failed"]
+        except Exception as e:
+            failures["storage_failed"] = repr(e)
+            print(f"ALERTA raw sin copia en S3 result_id={result_id} s3_key={s3_key} (ya encolado): {e!r}")
+
+    timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    if INGEST_LATENCY_LOG:
+        print(
+            "INGEST_LATENCY "
+            + json.dumps({"result_id": result_id, "mode": "inline" if inline else "s3", **timings, "ok": not failures})
+        )
+
+    if failures:
+        error = next(e for e in ("storage_failed", "enqueue_failed", "audit_failed") if e in failures)
+        print(f"ERROR ingest result_id={result_id} enqueued={enqueued}: {failures}")
+        _put_audit_event(
+            action="INGEST_FAILED",
+            actor_id=actor_id,
+            source_ip=source_ip,
+            patient_id=body["patient_id"],
+            result_id=result_id,
+            justification="system_ingest",
+            details=json.dumps({"errors": sorted(failures), "enqueued": enqueued}),
+        )
+        return _response(500, {"error": error, "result_id": result_id, "enqueued": enqueued})
+
+    return _response(202, {"result_id": result_id, "status": "QUEUED"})
 
-    # result_id global para todo el flujo
+
+def _prepare_entry(body: dict) -> tuple[str, str, bytes, dict]:
+    """
+    Asigna el result_id global del flujo y arma lo que se guarda en S3
+    y el mensaje para lab_results_queue.
+    """
     result_id = str(uuid.uuid4())
     body["result_id"] = result_id
 
     s3_key = f"raw/{result_id}.json"
+    raw_bytes = json.dumps(body).encode("utf-8")
 
-    # guardar raw en S3 (cumplimiento / trazabilidad)
+    msg = {
+        "result_id": result_id,
+        "s3_key": s3_key,
+        "patient_id": body["patient_id"],
+    }
+    if len(raw_bytes) <= INLINE_PAYLOAD_MAX_BYTES:
+        # payload pequeño: va en el mensaje y el worker se salta el GET
+        msg["payload"] = body
+    return result_id, s3_key, raw_bytes, msg
+
+
+def _store_raw(s3_key: str, raw_bytes: bytes) -> None:
     s3.put_object(
         Bucket=RAW_BUCKET,
         Key=s3_key,
-        Body=json.dumps(body).encode("utf-8"),
+        Body=raw_bytes,
         ServerSideEncryption="AES256",
         Metadata={"received_at": datetime.now(timezone.utc).isoformat()},
     )
 
-    # encolar para procesamiento
-    msg = {
-        "result_id": result_id,
-        "s3_key": s3_key,
-        "patient_id": body["patient_id"],
-    }
-    sqs.send_message(
-        QueueUrl=LAB_RESULTS_QUEUE_URL,
-        MessageBody=json.dumps(msg),
-    )
 
-    # auditoría
+def _parse_batch_body(event: dict) -> list:
+    """
+    Body de /ingest/batch: un array JSON o NDJSON (un resultado por
+    línea). Devuelve una lista de (entrada, error_de_parseo) en orden.
+    """
+    raw_body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        raw_body = base64.b64decode(raw_body).decode("utf-8")
+
+    text = raw_body.strip()
+    if text.startswith("["):
+        try:
+            entries = json.loads(text)
+        except json.JSONDecodeError:
+            raise ValueError("invalid_json")
+        return [(entry, None) for entry in entries]
+
+    parsed = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            parsed.append((json.loads(line), None))
+        except json.JSONDecodeError as e:
+            parsed.append((None, f"invalid_json: {e.msg}"))
+    return parsed
+
+
+def handle_ingest_batch(event, context, path: str):
+    """
+    POST /api/v1/ingest/batch: muchos resultados en una sola invocación.
+    Valida cada entrada, guarda los raw en S3 en paralelo, escribe la
+    auditoría en lote y encola con SendMessageBatch. Responde el estado
+    de cada entrada en el mismo orden en que llegó: QUEUED, REJECTED
+    (validación) o FAILED (error del lado del servidor).
+    """
+    try:
+        parsed = _parse_batch_body(event)
+    except ValueError as e:
+        return _response(400, {"error": str(e)})
+
+    if not parsed:
+        return _response(400, {"error": "empty_batch"})
+    if len(parsed) > INGEST_BATCH_MAX_ENTRIES:
+        return _response(
+            413,
+            {"error": "batch_too_large", "max_entries": INGEST_BATCH_MAX_ENTRIES, "received": len(parsed)},
+        )
+
+    results: list[dict] = []
+    accepted = {}   # índice -> (result_id, s3_key, raw_bytes, msg, body)
+    for index, (body, parse_error) in enumerate(parsed):
+        errors = [parse_error] if parse_error else validate_lab_result(body)
+        if errors:
+            results.append({"index": index, "status": "REJECTED", "error": "; ".join(errors), "details": errors})
+            continue
+        result_id, s3_key, raw_bytes, msg = _prepare_entry(body)
+        accepted[index] = (result_id, s3_key, raw_bytes, msg, body)
+        results.append({"index": index, "result_id": result_id, "status": "QUEUED"})
+
     source_ip = _get_source_ip(event)
-    _put_audit_event(
-        action="INGEST_CREATE",
-        actor_id=f"external_lab:{body.get('lab_id')}",
-        source_ip=source_ip,
-        patient_id=body["patient_id"],
-        result_id=result_id,
-        justification="system_ingest",
-    )
 
-    return _response(202, {"result_id": result_id, "status": "QUEUED"})
+    def _fail(index: int, error: str):
+        result_id, _, _, _, body = accepted[index]
+        # Igual que handle_ingest: cada falla deja un INGEST_FAILED (buffer)
+        _put_audit_event(
+            action="INGEST_FAILED",
+            actor_id=f"external_lab:{body.get('lab_id')}",
+            source_ip=source_ip,
+            patient_id=body["patient_id"],
+            result_id=result_id,
+            justification="system_ingest_batch",
+            details=json.dumps({"errors": [error], "enqueued": False}),
+        )
+        results[index] = {
+            "index": index,
+            "result_id": result_id,
+            "status": "FAILED",
+            "error": error,
+        }
+        del accepted[index]
+
+    # 1) raw a S3 en paralelo (cada PUT es independiente)
+    if accepted:
+        # Import diferido: concurrent.futures solo hace falta en esta ruta
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(INGEST_BATCH_CONCURRENCY, len(accepted))) as pool:
+            futures = {
+                index: pool.submit(_store_raw, entry[1], entry[2])
+                for index, entry in accepted.items()
+            }
+        for index, future in futures.items():
+            if future.exception() is not None:
+                print(f"ERROR guardando raw {accepted[index][1]}: {future.exception()!r}")
+                _fail(index, "storage_failed")
+
+    # 2) INGEST_CREATE de lo que quedó en S3, durable antes de encolar
+    #    (como el strict=True de handle_ingest, pero en un BatchWriteItem):
+    #    lo que no se pudo auditar no se encola
+    audit_failed = audit.write_batch(
+        {
+            index: build_audit_item(
+                "INGEST_CREATE",
+                f"external_lab:{body.get('lab_id')}",
+                source_ip=source_ip or "unknown",
+                patient_id=body["patient_id"],
+                result_id=result_id,
+                justification="system_ingest_batch",
+                break_glass=False,
+            )
+            for index, (result_id, _, _, _, body) in accepted.items()
+        }
+    )
+    for index, error in audit_failed.items():
+        print(f"ERROR auditando result_id={accepted[index][0]}: {error}")
+        _fail(index, "audit_failed")
+
+    # 3) encolar solo lo que quedó en S3 y auditado
+    failed = send_message_batch(
+        sqs,
+        LAB_RESULTS_QUEUE_URL,
+        {str(index): json.dumps(entry[3]) for index, entry in accepted.items()},
+    )
+    for key, error in failed.items():
+        print(f"ERROR encolando result_id={accepted[int(key)][0]}: {error}")
+        _fail(int(key), "enqueue_failed")
+
+    failed_count = sum(1 for r in results if r["status"] == "FAILED")
+    summary = {
+        "accepted": len(accepted),
+        "rejected": len(results) - len(accepted) - failed_count,
+        "failed": failed_count,
+        "results": results,
+    }
+    # 202 si algo quedó encolado. Si no entró nada: 503 cuando alguna
+    # entrada válida falló en S3 / SQS (el cliente puede reintentar) y
+    # 400 cuando todas las rechazó la validación.
+    if accepted:
+        status = 202
+    elif failed_count:
+        status = 503
+    else:
+        status = 400
+    return _response(status, summary)
 
 
 def _get_method_and_path(event: dict) -> tuple[str, str]:
@@ -204,6 +632,15 @@ def _get_method_and_path(event: dict) -> tuple[str, str]:
     return method, path
 
 
+def _get_header(event: dict, name: str) -> str | None:
+    # API Gateway v1 respeta el case del cliente; v2 lo pasa a minúsculas
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
 def _get_source_ip(event: dict) -> str | None:
     # v1
     ip = (
@@ -223,6 +660,7 @@ def _get_source_ip(event: dict) -> str | None:
     return ip
 
 
+@flush_after(audit, status_audit_throttle)
 def lambda_handler(event, context):
     """
     Envolvemos todo en try/except para devolver detalles del error
@@ -236,10 +674,18 @@ def lambda_handler(event, context):
         if method == "GET" and path.endswith("/api/v1/health"):
             return handle_health(event, context)
 
+        # POST /api/v1/status/batch
+        if method == "POST" and path.endswith("/api/v1/status/batch"):
+            return handle_status_batch(event, context, path)
+
         # GET /api/v1/status/{result_id}
         if method == "GET" and "/api/v1/status/" in path:
             return handle_status(event, context, path)
 
+        # POST /api/v1/ingest/batch
+        if method == "POST" and path.endswith("/api/v1/ingest/batch"):
+            return handle_ingest_batch(event, context, path)
+
         # POST /api/v1/ingest
         if method == "POST" and path.endswith("/api/v1/ingest"):
             return handle_ingest(event, context, path)
@@ -1,9 +1,8 @@
 import json
 import os
-from datetime import datetime, timezone
-import uuid
 
-import boto3
+from services.common.audit import AuditSink, flush_after
+from services.common.aws import lazy_client, lazy_resource, lazy_table
 
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
 
@@ -11,14 +10,13 @@ PATIENTS_TABLE = os.environ["PATIENTS_TABLE"]
 ACCESS_AUDIT_TABLE = os.environ["ACCESS_AUDIT_TABLE"]
 NOTIFY_TOPIC_ARN = os.environ["NOTIFY_TOPIC_ARN"]
 
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
-patients_table = dynamo.Table(PATIENTS_TABLE)
-access_audit_table = dynamo.Table(ACCESS_AUDIT_TABLE)
-sns = boto3.client("sns", region_name=REGION_NAME)
+# Se construyen en el primer uso y quedan cacheados en el contenedor
+dynamo = lazy_resource("dynamodb", region_name=REGION_NAME)
+patients_table = lazy_table(dynamo, PATIENTS_TABLE)
+sns = lazy_client("sns", region_name=REGION_NAME)
 
-
-def _now_iso():
-    return datetime.now(timezone.utc).isoformat()
+# Eventos en buffer; se escriben en lote al final de cada invocación
+audit = AuditSink(ACCESS_AUDIT_TABLE, dynamo)
 
 
 def _put_audit_event(
@@ -28,21 +26,18 @@ def _put_audit_event(
     status: str,
     details: str | None = None,
 ):
-    item = {
-        "audit_id": str(uuid.uuid4()),
-        "timestamp": _now_iso(),
-        "action": action,              # e.g. NOTIFICATION_SENT / NOTIFICATION_FAILED
-        "actor_id": "system_notify",
-        "patient_id": patient_id,
-        "result_id": result_id,
-        "notification_status": status,
-        "details": details,
-        "source": "notification_lambda",
-    }
-    item = {k: v for k, v in item.items() if v is not None}
-    access_audit_table.put_item(Item=item)
-
-
+    audit.emit(
+        action,                        # e.g. NOTIFICATION_SENT / NOTIFICATION_FAILED
+        "system_notify",
+        patient_id=patient_id,
+        result_id=result_id,
+        notification_status=status,
+        details=details,
+        source="notification_lambda",
+    )
+
+
+@flush_after(audit)
 def lambda_handler(event, context):
     """
     Event source: SQS notify_queue
@@ -2,26 +2,29 @@ import os
 import json
 from datetime import datetime, timezone
 
-import boto3
 from botocore.exceptions import ClientError
 
+from services.common.aws import lazy_client, lazy_resource, lazy_table
+from services.common.models import LabResult
+
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
 
 LAB_RESULTS_TABLE = os.environ["LAB_RESULTS_TABLE"]
 PATIENTS_TABLE = os.environ["PATIENTS_TABLE"]
 REPORT_BUCKET = os.environ["REPORT_BUCKET"]
 
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
-lab_results_table = dynamo.Table(LAB_RESULTS_TABLE)
-patients_table = dynamo.Table(PATIENTS_TABLE)
-s3 = boto3.client("s3", region_name=REGION_NAME)
+# Se construyen en el primer uso y quedan cacheados en el contenedor
+dynamo = lazy_resource("dynamodb", region_name=REGION_NAME)
+lab_results_table = lazy_table(dynamo, LAB_RESULTS_TABLE)
+patients_table = lazy_table(dynamo, PATIENTS_TABLE)
+s3 = lazy_client("s3", region_name=REGION_NAME)
 
 
 def _now_iso():
     return datetime.now(timezone.utc).isoformat()
 
 
-def _generate_fake_pdf_bytes(patient: dict, result: dict) -> bytes:
+def _generate_fake_pdf_bytes(patient: dict, result: LabResult | dict) -> bytes:
     """
     Para no meter librerías externas (reportlab, etc.), generamos un "PDF"
     muy simple. Para el proyecto basta con que sea un archivo descargable
@@ -48,7 +51,8 @@ def _generate_fake_pdf_bytes(patient: dict, result: dict) -> bytes:
         "",
     ]
 
-    for r in result.get("results", []):
+    entries = result.entries if isinstance(result, LabResult) else result.get("results", [])
+    for r in entries:
         line = (
             f"- {r.get('test_code')} | {r.get('test_name')} | "
             f"{r.get('value')} {r.get('unit')} "
@@ -104,15 +108,16 @@ def lambda_handler(event, context):
     resp_r = lab_results_table.get_item(
         Key={"result_id": result_id, "patient_id": patient_id}
     )
-    result = resp_r.get("Item")
-    if not result:
+    item = resp_r.get("Item")
+    if not item:
         return {
             "statusCode": 404,
             "body": json.dumps({"error": "result_not_found"}),
         }
 
-    # Generar contenido "PDF"
-    pdf_bytes = _generate_fake_pdf_bytes(patient, result)
+    # Generar contenido "PDF" directo desde el item: convertirlo a
+    # LabResult solo sumaría copias, porque el item sigue vivo igual
+    pdf_bytes = _generate_fake_pdf_bytes(patient, item)
 
     # Guardar en S3, prefijo por paciente
     key = f"reports/{patient_id}/{result_id}.pdf"
@@ -5,12 +5,18 @@ Usa los datos del enunciado del proyecto.
 """
 
 import os
-import boto3
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.aws import resource  # noqa: E402
 
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
 PATIENTS_TABLE = os.environ["PATIENTS_TABLE"]
 
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
+dynamo = resource("dynamodb", region_name=REGION_NAME)
 table = dynamo.Table(PATIENTS_TABLE)
 
 SAMPLE_PATIENTS = [
@@ -1,6 +1,13 @@
-import boto3
+import os
+import sys
 
-dynamo = boto3.resource("dynamodb")
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.aws import resource
+
+dynamo = resource("dynamodb")
 table = dynamo.Table("healthcare-lab-patients")  
 
 PATIENTS = [
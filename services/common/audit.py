@@ -0,0 +1,262 @@
+"""
+Sink de auditoría compartido (tabla access_audit) para todos los servicios:
+ingest, notify, report/lifecycle Lambdas, portal y worker.
+
+Dos modos de escritura:
+  - emit(..., strict=True): put_item síncrono; el evento queda durable
+    antes de que el caller responda (accesos a PHI, creación de datos).
+    write_batch() es lo mismo para muchos eventos con un BatchWriteItem.
+  - emit(...): el evento se guarda en un buffer y se escribe en lote con
+    BatchWriteItem cuando el buffer llega a 25 eventos, cuando pasan
+    max_delay segundos (hilo de fondo, solo en servicios de larga vida) o
+    al final de la invocación Lambda (ver flush_after).
+
+Si no hay tabla configurada el sink no hace nada (escenario dev).
+Las Lambdas necesitan el paquete services/common dentro de su zip.
+"""
+import atexit
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, List, Optional
+
+from services.common.dynamo_batch import DYNAMO_BATCH_SIZE, batch_write_items
+
+# Clave primaria de access_audit
+AUDIT_KEY_ATTRS = ("audit_id", "timestamp")
+
+
+def build_audit_item(action: str, actor_id: str, **fields) -> dict:
+    """Arma un registro de auditoría (sin escribirlo); descarta los None."""
+    item = {
+        "audit_id": fields.pop("audit_id", None) or str(uuid.uuid4()),
+        "timestamp": fields.pop("timestamp", None) or datetime.now(timezone.utc).isoformat(),
+        "action": action,
+        "actor_id": actor_id,
+        **fields,
+    }
+    return {k: v for k, v in item.items() if v is not None}
+
+
+class AuditSink:
+    def __init__(
+        self,
+        table_name: Optional[str],
+        dynamo=None,
+        max_batch: int = DYNAMO_BATCH_SIZE,
+        max_delay: Optional[float] = None,
+        on_flush: Optional[Callable[[float], None]] = None,
+    ):
+        """
+        table_name: tabla access_audit (None = deshabilitado).
+        dynamo:     boto3 resource de DynamoDB.
+        max_batch:  eventos en buffer que disparan un flush.
+        max_delay:  si se indica, un hilo de fondo hace flush como mucho
+                    cada max_delay segundos (no usar en Lambda), y lo
+                    pendiente se escribe al salir del proceso (atexit).
+        on_flush:   se llama con la duración (s) de cada flush con eventos.
+        """
+        self.table_name = table_name
+        self.dynamo = dynamo
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._table = None
+        self._timer = None
+
+        if table_name and max_delay:
+            self._timer = threading.Thread(target=self._flush_periodically, name="audit-flush", daemon=True)
+            self._timer.start()
+            # El hilo es daemon: sin esto, lo que quedó en el buffer se pierde al salir
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.table_name)
+
+    def _get_table(self):
+        if self._table is None:
+            self._table = self.dynamo.Table(self.table_name)
+        return self._table
+
+    def emit(self, action: str, actor_id: str, strict: bool = False, **fields) -> Optional[dict]:
+        """
+        Registra un evento. Con strict=True se escribe ya (y propaga el
+        error si falla); si no, queda en el buffer.
+        """
+        if not self.enabled:
+            return None
+
+        item = build_audit_item(action, actor_id, **fields)
+
+        if strict:
+            self._get_table().put_item(Item=item)
+            return item
+
+        with self._lock:
+            self._buffer.append(item)
+            full = len(self._buffer) >= self.max_batch
+
+        if full:
+            self.flush()
+        return item
+
+    def write_batch(self, items: Dict[Hashable, dict]) -> Dict[Hashable, str]:
+        """
+        Versión en lote de emit(strict=True): escribe ya, con
+        BatchWriteItem, items armados con build_audit_item (sin pasar por
+        el buffer). Devuelve {clave: error} de los que no quedaron
+        escritos, para que el caller no confirme esas operaciones.
+        """
+        if not self.enabled or not items:
+            return {}
+        rows = [(key, self.table_name, item) for key, item in items.items()]
+        try:
+            return batch_write_items(self.dynamo, rows, {self.table_name: AUDIT_KEY_ATTRS})
+        except Exception as e:
+            return {key: str(e) for key in items}
+
+    def flush(self) -> int:
+        """
+        Escribe todo lo pendiente con BatchWriteItem. Devuelve cuántos
+        eventos quedaron escritos. Los que fallan tras los reintentos se
+        loguean completos para no perder la traza de auditoría.
+        """
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+        if not pending:
+            return 0
+
+        with self._flush_lock:
+            start = time.perf_counter()
+            rows = [(i, self.table_name, item) for i, item in enumerate(pending)]
+            try:
+                failed = batch_write_items(self.dynamo, rows, {self.table_name: AUDIT_KEY_ATTRS})
+            except Exception as e:
+                failed = {i: str(e) for i in range(len(pending))}
+            if self.on_flush:
+                self.on_flush(time.perf_counter() - start)
+
+        for i, error in failed.items():
+            logging.error(
+                f"AUDIT_WRITE_FAILED {json.dumps(pending[i], default=str)} error={error}"
+            )
+        return len(pending) - len(failed)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.max_delay)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error en flush periódico de auditoría: {e}")
+
+
+class AuditThrottle:
+    """
+    Colapsa eventos repetidos (misma clave) dentro de una ventana: se
+    audita el primero y los siguientes solo se cuentan. El conteo se
+    reporta por la primera vía que ocurra:
+      - admit() lo devuelve cuando la misma clave abre una ventana nueva
+        (el caller lo pone en el evento que sí escribe);
+      - sweep() llama a on_expire(key, suppressed) por cada ventana ya
+        cerrada con eventos suprimidos (flush_after lo corre al final de
+        cada invocación), o al descartar una clave por maxsize.
+    Lo que se pierde si el proceso / contenedor muere es el conteo de las
+    ventanas que seguían abiertas o que cerraron sin otro sweep después.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+        on_expire: Optional[Callable[[Hashable, int], None]] = None,
+    ):
+        self.window = window
+        self.maxsize = maxsize
+        self._clock = clock
+        self.on_expire = on_expire
+        # key -> [inicio de la ventana, suprimidos], en orden de inicio
+        self._seen: dict = {}
+        self._lock = threading.Lock()
+
+    def admit(self, key) -> Optional[int]:
+        """None si el evento se suprime; si no, cuántos se suprimieron antes."""
+        if self.window <= 0:
+            return 0
+        now = self._clock()
+        evicted = []
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry and now - entry[0] < self.window:
+                entry[1] += 1
+                return None
+            suppressed = entry[1] if entry else 0
+            self._seen.pop(key, None)
+            self._seen[key] = [now, 0]
+            if len(self._seen) > self.maxsize:
+                # Descarta la clave más vieja (orden de inserción)
+                oldest = next(iter(self._seen))
+                evicted.append((oldest, self._seen.pop(oldest)[1]))
+        self._report(evicted)
+        return suppressed
+
+    def sweep(self) -> int:
+        """
+        Cierra las ventanas vencidas y reporta (on_expire) las que
+        tuvieron eventos suprimidos. Devuelve cuántas reportó.
+        """
+        if not self.on_expire:
+            # Sin a quién reportar, el conteo queda para el próximo admit()
+            return 0
+        now = self._clock()
+        expired = []
+        with self._lock:
+            # Las ventanas están en orden de inicio: basta con recorrer
+            # desde el principio hasta la primera que sigue abierta
+            while self._seen:
+                key, (start, suppressed) = next(iter(self._seen.items()))
+                if now - start < self.window:
+                    break
+                del self._seen[key]
+                expired.append((key, suppressed))
+        return self._report(expired)
+
+    def _report(self, entries: list) -> int:
+        reported = 0
+        for key, suppressed in entries:
+            if suppressed and self.on_expire:
+                self.on_expire(key, suppressed)
+                reported += 1
+        return reported
+
+
+def flush_after(sink: AuditSink, *throttles: AuditThrottle):
+    """
+    Decorador para lambda_handler: al terminar cada invocación (antes de
+    que Lambda congele el contenedor) corre sweep() de los throttles, para
+    que los conteos de ventanas cerradas vayan al sink, y hace flush.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            try:
+                return handler(event, context)
+            finally:
+                for throttle in throttles:
+                    try:
+                        throttle.sweep()
+                    except Exception as e:
+                        logging.error(f"Error cerrando ventanas de auditoría: {e}")
+                sink.flush()
+        return wrapper
+    return decorator
@@ -0,0 +1,266 @@
+"""
+Fábrica compartida de clientes / resources de boto3.
+
+Todos los servicios (worker, portal, Lambdas, scripts) crean sus clientes
+con client() / resource() o sus variantes diferidas, en vez de llamar a
+boto3 directamente, y así comparten la misma configuración:
+
+  - Una sola boto3.Session por proceso (se recrea después de un fork, p.
+    ej. en los hijos del supervisor). Crear clientes desde la misma
+    sesión no es thread-safe, así que se serializa con un lock.
+  - max_pool_connections según la concurrencia que declara el caller
+    (mínimo 10, el default de botocore).
+  - Reintentos en modo "adaptive" (backoff + rate limiting del lado del
+    cliente cuando AWS responde throttling). AWS_RETRY_MODE y
+    AWS_MAX_ATTEMPTS los pueden cambiar, con los nombres de botocore.
+  - TCP keep-alive en las conexiones del pool.
+
+Clientes diferidos
+------------------
+En las Lambdas todo lo que se construye al importar se paga en cada cold
+start, aunque la ruta invocada no lo use (health no toca S3 ni SQS):
+
+    s3 = lazy_client("s3")
+    dynamo = lazy_resource("dynamodb")
+    lab_results_table = lazy_table(dynamo, LAB_RESULTS_TABLE)
+
+Cada uno se construye una sola vez, en el primer acceso a un atributo
+(s3.put_object, dynamo.Table, ...), y queda cacheado para las siguientes
+invocaciones del mismo contenedor. boto3 tampoco se importa hasta ese
+momento. Los tests / el harness pueden seguir reemplazando el atributo
+del módulo (ingest.s3 = FakeS3(...)) sin construir nada.
+
+Métricas del pool
+-----------------
+Opcionales: install_pool_metrics() envuelve _get_conn / _put_conn de
+urllib3 (pools de botocore) para todo el proceso. Es API privada de
+urllib3, así que solo la activa quien lee la métrica (el worker, ver
+WORKER_POOL_METRICS); las Lambdas y el portal no la instalan. Si la
+versión de urllib3 no tiene esos métodos, no se instala y lo avisa.
+pool_stats acumula:
+
+  checkouts   conexiones pedidas al pool
+  starved     pedidos con el pool vacío (todas las conexiones en uso)
+  discarded   conexiones cerradas al devolverlas porque el pool ya estaba lleno
+  wait_s      tiempo total dentro de _get_conn
+
+Los pools de botocore no bloquean: con el pool vacío urllib3 abre una
+conexión nueva (TCP + TLS) en vez de esperar y la descarta al devolverla.
+Por eso la señal de que falta pool es `starved` / `discarded` más que el
+tiempo de espera. add_pool_observer() recibe cada checkout (segundos,
+starved) para llevarlo a las métricas del servicio.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# botocore lee estas mismas variables; acá solo cambian los defaults
+AWS_RETRY_MODE = os.environ.get("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "5"))
+AWS_TCP_KEEPALIVE = os.environ.get("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+
+# Default de botocore; nunca se configura un pool más chico
+DEFAULT_POOL_CONNECTIONS = 10
+
+_session = None
+_session_pid: Optional[int] = None
+_session_lock = threading.RLock()
+
+
+def get_session():
+    """La boto3.Session del proceso (una nueva si el proceso es un fork)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            import boto3
+
+            _session = boto3.session.Session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def client_config(concurrency: Optional[int] = None, **overrides):
+    """
+    botocore Config compartida. `concurrency` es cuántas llamadas en vuelo
+    puede tener el caller con este cliente; el pool se dimensiona a eso.
+    """
+    from botocore.config import Config
+
+    options: Dict[str, Any] = {
+        "max_pool_connections": max(DEFAULT_POOL_CONNECTIONS, concurrency or 0),
+        "retries": {"mode": AWS_RETRY_MODE, "max_attempts": AWS_MAX_ATTEMPTS},
+        "tcp_keepalive": AWS_TCP_KEEPALIVE,
+    }
+    options.update(overrides)
+    return Config(**options)
+
+
+def client(service: str, concurrency: Optional[int] = None, region_name: Optional[str] = None, **config):
+    """session.client(service) con la configuración compartida."""
+    cfg = client_config(concurrency, **config)
+    with _session_lock:
+        return get_session().client(service, region_name=region_name, config=cfg)
+
+
+def resource(service: str, concurrency: Optional[int] = None, region_name: Optional[str] = None, **config):
+    """session.resource(service) con la configuración compartida."""
+    cfg = client_config(concurrency, **config)
+    with _session_lock:
+        return get_session().resource(service, region_name=region_name, config=cfg)
+
+
+# ---------------------------------------------------------------------------
+# Diferidos
+# ---------------------------------------------------------------------------
+
+class Lazy:
+    """Proxy que llama a `factory()` una vez y delega todo en el resultado."""
+
+    __slots__ = ("_factory", "_obj", "_lock", "name")
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+        self.name = name
+
+    @property
+    def resolved(self) -> bool:
+        return self._obj is not None
+
+    def get(self) -> Any:
+        obj = self._obj
+        if obj is None:
+            # Los batch de ingest usan el cliente desde varios hilos
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._factory()
+                obj = self._obj
+        return obj
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = "construido" if self.resolved else "pendiente"
+        return f"<Lazy {self.name or self._factory!r} ({state})>"
+
+
+def lazy_client(service: str, concurrency: Optional[int] = None, region_name: Optional[str] = None, **config) -> Lazy:
+    """client(service, ...) diferido hasta el primer uso."""
+    return Lazy(lambda: client(service, concurrency, region_name, **config), name=f"client:{service}")
+
+
+def lazy_resource(service: str, concurrency: Optional[int] = None, region_name: Optional[str] = None, **config) -> Lazy:
+    """resource(service, ...) diferido hasta el primer uso."""
+    return Lazy(lambda: resource(service, concurrency, region_name, **config), name=f"resource:{service}")
+
+
+def lazy_table(dynamo: Any, table_name: str) -> Lazy:
+    """dynamo.Table(table_name) diferido (no fuerza a construir el resource)."""
+    return Lazy(lambda: dynamo.Table(table_name), name=f"table:{table_name}")
+
+
+# ---------------------------------------------------------------------------
+# Métricas del pool de conexiones
+# ---------------------------------------------------------------------------
+
+class PoolStats:
+    """Contadores de los pools de urllib3 del proceso (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observers: List[Callable[[float, bool], None]] = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.starved = 0
+            self.discarded = 0
+            self.wait_s = 0.0
+            self.max_wait_s = 0.0
+
+    def add_observer(self, observer: Callable[[float, bool], None]):
+        with self._lock:
+            self._observers.append(observer)
+
+    def record_checkout(self, seconds: float, starved: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.starved += starved
+            self.wait_s += seconds
+            if seconds > self.max_wait_s:
+                self.max_wait_s = seconds
+            observers = list(self._observers)
+        for observer in observers:
+            observer(seconds, starved)
+
+    def record_discard(self):
+        with self._lock:
+            self.discarded += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "starved": self.starved,
+                "discarded": self.discarded,
+                "wait_ms": round(self.wait_s * 1000, 3),
+                "max_wait_ms": round(self.max_wait_s * 1000, 3),
+            }
+
+
+pool_stats = PoolStats()
+_pool_patch_lock = threading.Lock()
+_pool_patched = False
+
+
+def add_pool_observer(observer: Callable[[float, bool], None]):
+    """observer(segundos en _get_conn, pool_vacío) por cada checkout."""
+    pool_stats.add_observer(observer)
+
+
+def install_pool_metrics() -> bool:
+    """
+    Activa pool_stats en los pools de urllib3 del proceso (idempotente).
+    Vale también para los clientes ya creados. Devuelve False si esta
+    versión de urllib3 no expone los métodos que se envuelven.
+    """
+    global _pool_patched
+    if _pool_patched:
+        return True
+    with _pool_patch_lock:
+        if _pool_patched:
+            return True
+        from urllib3.connectionpool import HTTPConnectionPool
+
+        get_conn = getattr(HTTPConnectionPool, "_get_conn", None)
+        put_conn = getattr(HTTPConnectionPool, "_put_conn", None)
+        if get_conn is None or put_conn is None:
+            logging.warning("urllib3 sin _get_conn/_put_conn: métricas del pool desactivadas")
+            return False
+
+        def _get_conn(self, timeout=None):
+            # El pool arranca lleno de placeholders (None): vacío quiere
+            # decir que todas las conexiones están prestadas
+            pool = self.pool
+            starved = pool is not None and pool.empty()
+            start = time.perf_counter()
+            try:
+                return get_conn(self, timeout)
+            finally:
+                pool_stats.record_checkout(time.perf_counter() - start, starved)
+
+        def _put_conn(self, conn):
+            pool = self.pool
+            if conn is not None and pool is not None and pool.full():
+                pool_stats.record_discard()
+            return put_conn(self, conn)
+
+        HTTPConnectionPool._get_conn = _get_conn
+        HTTPConnectionPool._put_conn = _put_conn
+        _pool_patched = True
+        return True
@@ -0,0 +1,195 @@
+import logging
+import random
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+# Límite de DynamoDB para BatchWriteItem
+DYNAMO_BATCH_SIZE = 25
+
+# Errores que indican que hay que bajar el ritmo y reintentar
+THROTTLING_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# Errores de red / timeout de botocore: transitorios, se reintentan con
+# el mismo backoff que el throttling
+CONNECTION_ERRORS = (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError, ConnectionClosedError)
+
+# Error que se reporta para filas que siguen sin procesar tras reintentos
+UNPROCESSED_WRITE_ERROR = "UnprocessedItems after retries"
+
+_serializer = TypeSerializer()
+
+
+def error_text(exc: BaseException) -> str:
+    """Error para los dicts {owner: error}: nombre de la excepción + mensaje."""
+    return f"{type(exc).__name__}: {exc}"
+
+
+def serialization_errors(rows: List[Tuple[Hashable, str, dict]]) -> Dict[Hashable, str]:
+    """
+    Serializa cada fila como lo haría boto3 y devuelve {owner: error} de
+    las que DynamoDB no acepta (float, NaN / Infinity, tipos no
+    soportados). Fuera del lote, una fila así hace fallar la llamada
+    entera en vez de solo a su owner.
+    """
+    failed: Dict[Hashable, str] = {}
+    for owner, _table, item in rows:
+        if owner in failed:
+            continue
+        try:
+            _serializer.serialize(item)
+        except (TypeError, ValueError, ArithmeticError) as e:
+            failed[owner] = error_text(e)
+    return failed
+
+
+def _row_key(table: str, item: dict, key_attrs: Dict[str, Sequence[str]]) -> Tuple:
+    return (table,) + tuple(item.get(a) for a in key_attrs[table])
+
+
+def batch_write_items(
+    dynamo,
+    rows: List[Tuple[Hashable, str, dict]],
+    key_attrs: Dict[str, Sequence[str]],
+    max_retries: int = 5,
+    base_delay: float = 0.05,
+    on_throttle: Optional[Callable[[], None]] = None,
+    validate: bool = True,
+) -> Dict[Hashable, str]:
+    """
+    Escribe filas en DynamoDB con BatchWriteItem (25 por llamada).
+
+    rows:      [(owner, nombre_tabla, item)]; owner identifica a quién
+               pertenece la fila (p.ej. el MessageId de SQS).
+    key_attrs: {nombre_tabla: atributos de la clave primaria}, para saber
+               a qué owner corresponde cada UnprocessedItem.
+
+    Los UnprocessedItems, los errores de throttling y los de red se
+    reintentan con backoff exponencial (con jitter); on_throttle se llama
+    cada vez que DynamoDB pide bajar el ritmo. Devuelve {owner: error} de
+    los owners con alguna fila que no quedó escrita.
+
+    validate: serializar antes cada fila (serialization_errors) para que
+    una fila inválida falle solo a su owner, cuyas filas no se escriben.
+    Con False el caller ya lo hizo.
+    """
+    failed: Dict[Hashable, str] = serialization_errors(rows) if validate else {}
+
+    # BatchWriteItem no admite dos puts con la misma clave en una misma
+    # llamada, así que deduplicamos (gana la última fila).
+    owners_by_key: Dict[Tuple, List[Hashable]] = {}
+    pending: Dict[Tuple, Tuple[str, dict]] = {}
+    for owner, table, item in rows:
+        if owner in failed:
+            continue
+        key = _row_key(table, item, key_attrs)
+        owners_by_key.setdefault(key, []).append(owner)
+        pending[key] = (table, item)
+
+    def _fail(key: Tuple, error: str):
+        for owner in owners_by_key[key]:
+            failed[owner] = error
+
+    keys = list(pending)
+    for start in range(0, len(keys), DYNAMO_BATCH_SIZE):
+        chunk = {k: pending[k] for k in keys[start:start + DYNAMO_BATCH_SIZE]}
+
+        for attempt in range(max_retries + 1):
+            request_items: Dict[str, List[dict]] = {}
+            for table, item in chunk.values():
+                request_items.setdefault(table, []).append({"PutRequest": {"Item": item}})
+
+            throttled = True
+            try:
+                resp = dynamo.batch_write_item(RequestItems=request_items)
+            except CONNECTION_ERRORS as e:
+                if attempt == max_retries:
+                    for k in chunk:
+                        _fail(k, error_text(e))
+                    chunk = {}
+                    break
+                unprocessed = request_items
+                throttled = False
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code not in THROTTLING_ERRORS or attempt == max_retries:
+                    for k in chunk:
+                        _fail(k, str(e))
+                    chunk = {}
+                    break
+                unprocessed = request_items
+            else:
+                unprocessed = resp.get("UnprocessedItems") or {}
+
+            chunk = {
+                _row_key(table, req["PutRequest"]["Item"], key_attrs): (table, req["PutRequest"]["Item"])
+                for table, reqs in unprocessed.items()
+                for req in reqs
+            }
+            if not chunk:
+                break
+            if on_throttle and throttled:
+                on_throttle()
+
+            if attempt < max_retries:
+                delay = base_delay * (2 ** attempt)
+                logging.warning(
+                    f"{len(chunk)} fila(s) sin procesar en BatchWriteItem, reintento en {delay:.2f}s"
+                )
+                time.sleep(delay + random.uniform(0, delay))
+
+        for k in chunk:
+            _fail(k, UNPROCESSED_WRITE_ERROR)
+
+    return failed
+
+
+# Límite de DynamoDB para BatchGetItem
+DYNAMO_GET_BATCH_SIZE = 100
+
+
+def batch_get_keys(
+    dynamo,
+    table: str,
+    keys: List[dict],
+    projection: Optional[Sequence[str]] = None,
+    max_retries: int = 3,
+    base_delay: float = 0.05,
+) -> List[dict]:
+    """
+    Lee claves de una tabla con BatchGetItem (100 por llamada) y devuelve
+    los items encontrados (en cualquier orden). Las UnprocessedKeys se
+    reintentan con backoff; las que siguen sin leerse se tratan como no
+    encontradas. Los errores de la llamada se propagan.
+    """
+    found: List[dict] = []
+    for start in range(0, len(keys), DYNAMO_GET_BATCH_SIZE):
+        spec = {"Keys": keys[start:start + DYNAMO_GET_BATCH_SIZE]}
+        if projection:
+            spec["ProjectionExpression"] = ", ".join(projection)
+
+        for attempt in range(max_retries + 1):
+            resp = dynamo.batch_get_item(RequestItems={table: spec})
+            found.extend(resp.get("Responses", {}).get(table, []))
+            unprocessed = (resp.get("UnprocessedKeys") or {}).get(table)
+            if not unprocessed or not unprocessed.get("Keys"):
+                break
+            if attempt == max_retries:
+                logging.warning(f"{len(unprocessed['Keys'])} clave(s) sin leer en BatchGetItem tras reintentos")
+                break
+            spec = unprocessed
+            delay = base_delay * (2 ** attempt)
+            time.sleep(delay + random.uniform(0, delay))
+    return found
@@ -0,0 +1,141 @@
+"""
+Modelo compacto de resultados de laboratorio con __slots__.
+
+Los resultados viajan entre ingest, worker, portal y report como dicts con
+las mismas claves repetidas en cada entrada; con paneles grandes eso pesa.
+ResultEntry / LabResult guardan los campos en slots (sin __dict__ por
+instancia) y se convierten de/hacia el formato JSON raw y el item de
+DynamoDB (que en esta tabla tienen la misma forma).
+
+Para no tener que reescribir el código que trabaja con dicts, ambos tipos
+aceptan obj.get(clave, default), obj[clave] y `clave in obj`, así que
+funciones como validate_payload, is_out_of_range o _generate_fake_pdf_bytes
+los pueden usar tal cual.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class _Missing:
+    """Marca un campo que no venía en el origen (distinto de null)."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING: Any = _Missing()
+
+
+class _SlottedRecord:
+    __slots__ = ("extra",)
+
+    # Campos conocidos, en el orden en que se serializan
+    FIELDS: tuple = ()
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, MISSING))
+        # Claves que no conocemos se conservan (round-trip sin pérdidas)
+        self.extra: Optional[Dict[str, Any]] = fields or None
+
+    # ---- acceso estilo dict ----
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def keys(self) -> Iterator[str]:
+        for name in self.FIELDS:
+            if getattr(self, name) is not MISSING:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __eq__(self, other):
+        if not isinstance(other, type(self)):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in self.FIELDS if getattr(self, name) is not MISSING}
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+
+class ResultEntry(_SlottedRecord):
+    """Una entrada de `results` (un analito)."""
+
+    FIELDS = ("test_code", "test_name", "value", "unit", "reference_range", "is_abnormal")
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultEntry":
+        return cls(**data)
+
+
+class LabResult(_SlottedRecord):
+    """Un resultado de laboratorio completo (payload raw o item de DynamoDB)."""
+
+    FIELDS = (
+        "result_id",
+        "patient_id",
+        "lab_id",
+        "lab_name",
+        "test_type",
+        "test_date",
+        "results",
+        "notes",
+        "status",
+        "created_at",
+        "updated_at",
+        "out_of_range",
+        "has_abnormal",
+    )
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_raw(cls, data: Dict[str, Any]) -> "LabResult":
+        """Desde el JSON que manda el laboratorio."""
+        fields = dict(data)
+        results = fields.get("results")
+        if isinstance(results, list):
+            fields["results"] = [
+                ResultEntry.from_dict(r) if isinstance(r, dict) else r for r in results
+            ]
+        return cls(**fields)
+
+    # El item de DynamoDB tiene la misma forma que el raw normalizado
+    from_item = from_raw
+
+    def to_raw(self) -> Dict[str, Any]:
+        """Al formato JSON raw (o item de DynamoDB): entradas como dicts."""
+        out = self.to_dict()
+        results = out.get("results")
+        if isinstance(results, list):
+            out["results"] = [r.to_dict() if isinstance(r, ResultEntry) else r for r in results]
+        return out
+
+    to_item = to_raw
+
+    @property
+    def entries(self) -> List[ResultEntry]:
+        results = self.get("results")
+        return results if isinstance(results, list) else []
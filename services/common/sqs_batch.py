@@ -0,0 +1,138 @@
+import logging
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from botocore.exceptions import ClientError
+
+from services.common.dynamo_batch import CONNECTION_ERRORS, error_text
+
+# Límite de SQS para SendMessageBatch / DeleteMessageBatch /
+# ChangeMessageVisibilityBatch.
+SQS_BATCH_SIZE = 10
+
+# SendMessageBatch además limita la suma de los bodies a 256 KiB
+SQS_BATCH_MAX_BYTES = 256 * 1024
+
+
+def _body_size(params: dict) -> int:
+    body = params.get("MessageBody")
+    return len(body.encode("utf-8")) if body else 0
+
+
+def _chunks(items: List[Tuple[str, dict]], size: int, max_bytes: int = SQS_BATCH_MAX_BYTES) -> Iterable[List]:
+    """Trozos de hasta `size` entradas cuyos MessageBody suman <= max_bytes."""
+    chunk: List[Tuple[str, dict]] = []
+    chunk_bytes = 0
+    for item in items:
+        item_bytes = _body_size(item[1])
+        if chunk and (len(chunk) == size or chunk_bytes + item_bytes > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(item)
+        chunk_bytes += item_bytes
+    if chunk:
+        yield chunk
+
+
+def _run_batches(
+    call: Callable[[List[dict]], dict],
+    entries: Dict[str, dict],
+    retries: int = 1,
+) -> Dict[str, str]:
+    """
+    Ejecuta una API *Batch de SQS en trozos de 10 entradas (y 256 KiB
+    de bodies).
+
+    entries: {clave_del_caller: parámetros de la entrada (sin Id)}
+    Devuelve {clave_del_caller: error} con las entradas que fallaron.
+
+    Las entradas que fallan por culpa de SQS (SenderFault = False) y los
+    trozos que fallan por red / timeout se reintentan `retries` veces;
+    las que son culpa nuestra no.
+    """
+    failed: Dict[str, str] = {}
+    pending: List[Tuple[str, dict]] = list(entries.items())
+
+    for attempt in range(retries + 1):
+        retry: List[Tuple[str, dict]] = []
+
+        for chunk in _chunks(pending, SQS_BATCH_SIZE):
+            # El Id de SQS solo admite [A-Za-z0-9_-]{1,80}, así que usamos
+            # la posición dentro del trozo y traducimos de vuelta.
+            request = [dict(params, Id=str(i)) for i, (_, params) in enumerate(chunk)]
+            try:
+                resp = call(request)
+            except CONNECTION_ERRORS as e:
+                if attempt < retries:
+                    retry.extend(chunk)
+                else:
+                    for key, _ in chunk:
+                        failed[key] = error_text(e)
+                continue
+            except ClientError as e:
+                for key, _ in chunk:
+                    failed[key] = str(e)
+                continue
+
+            for f in resp.get("Failed", []):
+                key, params = chunk[int(f["Id"])]
+                error = f"{f.get('Code')}: {f.get('Message', '')}"
+                if not f.get("SenderFault") and attempt < retries:
+                    retry.append((key, params))
+                else:
+                    failed[key] = error
+
+        if not retry:
+            break
+        logging.warning(f"Reintentando {len(retry)} entrada(s) fallidas del batch SQS")
+        pending = retry
+
+    return failed
+
+
+def send_message_batch(sqs, queue_url: str, bodies: Dict[str, str]) -> Dict[str, str]:
+    """
+    Envía {clave: MessageBody} con SendMessageBatch.
+    Devuelve {clave: error} de los mensajes que no se pudieron encolar.
+    """
+    if not bodies:
+        return {}
+
+    entries = {key: {"MessageBody": body} for key, body in bodies.items()}
+    return _run_batches(
+        lambda batch: sqs.send_message_batch(QueueUrl=queue_url, Entries=batch),
+        entries,
+    )
+
+
+def delete_message_batch(sqs, queue_url: str, receipt_handles: Dict[str, str]) -> Dict[str, str]:
+    """
+    Borra {clave: ReceiptHandle} con DeleteMessageBatch.
+    Devuelve {clave: error} de los mensajes que no se pudieron borrar.
+    """
+    if not receipt_handles:
+        return {}
+
+    entries = {key: {"ReceiptHandle": rh} for key, rh in receipt_handles.items()}
+    return _run_batches(
+        lambda batch: sqs.delete_message_batch(QueueUrl=queue_url, Entries=batch),
+        entries,
+    )
+
+
+def change_visibility_batch(sqs, queue_url: str, entries: Dict[str, Tuple[str, int]]) -> Dict[str, str]:
+    """
+    Cambia el VisibilityTimeout de {clave: (ReceiptHandle, segundos)} con
+    ChangeMessageVisibilityBatch.
+    Devuelve {clave: error} de los mensajes que no se pudieron cambiar.
+    """
+    if not entries:
+        return {}
+
+    params = {
+        key: {"ReceiptHandle": rh, "VisibilityTimeout": timeout}
+        for key, (rh, timeout) in entries.items()
+    }
+    return _run_batches(
+        lambda batch: sqs.change_message_visibility_batch(QueueUrl=queue_url, Entries=batch),
+        params,
+    )
@@ -0,0 +1,57 @@
+"""
+Cache en memoria con TTL y tamaño máximo.
+
+Pensado para lo que vive dentro de un contenedor Lambda (o un proceso de
+larga vida) entre invocaciones: cada contenedor tiene el suyo, no se
+comparte ni se invalida desde afuera, así que solo sirve para datos que
+ya no cambian o que pueden estar hasta `ttl` segundos desactualizados.
+"""
+import collections
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Entradas con vencimiento; al llenarse descarta la más vieja (thread-safe)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (vence, valor), en orden de inserción
+        self._data: "collections.OrderedDict[Hashable, tuple]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
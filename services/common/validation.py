@@ -0,0 +1,264 @@
+"""
+Validación del payload de resultados en el borde (ingest API).
+
+El esquema se compila una sola vez al importar. Cada check lleva además
+una expresión equivalente y, con ellas, se genera una sola función por
+esquema (_compile_predicate) que decide si una entrada es válida sin
+llamadas por campo. Solo las entradas que fallan ese camino rápido pasan
+por los checks detallados, que son los que arman los mensajes.
+
+Se reportan todos los errores a la vez (hasta MAX_ERRORS), con la ruta del
+campo: "results[3].value: must be a number or a non-empty string".
+"""
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from services.common.models import LabResult
+
+# Límites del payload
+MAX_RESULTS = 5000
+MAX_ERRORS = 50
+
+_DATE_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}"
+    r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:\d{2})?)?$"
+)
+
+# check(value) -> mensaje de error o None
+Check = Callable[[Any], Optional[str]]
+
+
+# Rango de los números de DynamoDB: hasta 38 dígitos significativos y
+# magnitud entre 1e-130 y 9.99...e125. Un int más grande no entra en
+# 38 dígitos (10**50 tiene 51) y un float fuera de rango lo rechaza
+# DynamoDB al escribir, ya en el worker.
+_INT_LIMIT = 10 ** 38
+_FLOAT_MIN = 1e-130
+_FLOAT_MAX = 1e126
+_DECIMAL_MIN = Decimal("1e-130")
+_DECIMAL_MAX = Decimal("1e126")
+_MAX_DIGITS = 38
+_NUMBER_RANGE_ERROR = "is out of range (at most 38 digits, magnitude between 1e-130 and 1e126)"
+
+
+def _is_number(value: Any) -> bool:
+    # Sin math.isfinite: con un int enorme lanza OverflowError. Las
+    # comparaciones ya dejan afuera nan e inf.
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -_INT_LIMIT < value < _INT_LIMIT
+    if isinstance(value, float):
+        return value == 0 or _FLOAT_MIN <= abs(value) < _FLOAT_MAX
+    if isinstance(value, Decimal):
+        # Items leídos de DynamoDB (LabResult.from_item o el dict tal cual)
+        if not value.is_finite():
+            return False
+        if value == 0:
+            return True
+        return (
+            _DECIMAL_MIN <= abs(value) < _DECIMAL_MAX
+            and len(value.normalize().as_tuple().digits) <= _MAX_DIGITS
+        )
+    return False
+
+
+def _is_finite_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, Decimal):
+        return value.is_finite()
+    return isinstance(value, int) or (isinstance(value, float) and value - value == 0)
+
+
+def _string_check(max_len: int, allow_empty: bool = False) -> Check:
+    def check(value):
+        if not isinstance(value, str):
+            return "must be a string"
+        if not allow_empty and not value.strip():
+            return "must not be empty"
+        if len(value) > max_len:
+            return f"must be at most {max_len} characters"
+        return None
+
+    check.expr = _string_expr(max_len, allow_empty)
+    return check
+
+
+def _string_expr(max_len: int, allow_empty: bool) -> str:
+    # Misma regla que _string_check, como expresión sobre `v`
+    expr = f"(type(v) is str and len(v) <= {max_len}"
+    if not allow_empty:
+        expr += " and v != '' and not v.isspace()"
+    return expr + ")"
+
+
+def _date_check(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or not _DATE_RE.match(value):
+        return "must be an ISO-8601 date (YYYY-MM-DD[THH:MM[:SS]][Z])"
+    try:
+        # fromisoformat de 3.10 no acepta "Z"
+        datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return "is not a valid date"
+    return None
+
+
+def _value_check(max_len: int) -> Check:
+    # Valores numéricos finitos o cualitativos ("positive", "<0.5")
+    text = _string_check(max_len)
+
+    def check(value):
+        if _is_number(value):
+            return None
+        if isinstance(value, str):
+            return text(value)
+        if _is_finite_number(value):
+            return _NUMBER_RANGE_ERROR
+        return "must be a number or a non-empty string"
+
+    # Mismo rango que _is_number; las comparaciones descartan nan / inf
+    check.expr = (
+        f"((type(v) is int and {-_INT_LIMIT} < v < {_INT_LIMIT}) "
+        f"or (type(v) is float and (v == 0 or {_FLOAT_MIN!r} <= abs(v) < {_FLOAT_MAX!r})) "
+        f"or {_string_expr(max_len, False)} "
+        f"or (type(v) is Decimal and _is_number(v)))"
+    )
+    return check
+
+
+def _bool_check(value: Any) -> Optional[str]:
+    return None if isinstance(value, bool) else "must be a boolean"
+
+
+_bool_check.expr = "(type(v) is bool)"
+
+
+# (campo, requerido, check)
+FieldSpec = Tuple[str, bool, Check]
+
+ENTRY_SCHEMA: Sequence[FieldSpec] = (
+    ("test_code", True, _string_check(32)),
+    ("test_name", False, _string_check(128)),
+    ("value", True, _value_check(64)),
+    ("unit", False, _string_check(32, allow_empty=True)),
+    ("reference_range", False, _string_check(64, allow_empty=True)),
+    ("is_abnormal", False, _bool_check),
+)
+
+PAYLOAD_SCHEMA: Sequence[FieldSpec] = (
+    ("patient_id", True, _string_check(64)),
+    ("lab_id", True, _string_check(64)),
+    ("lab_name", True, _string_check(128)),
+    ("test_type", True, _string_check(64)),
+    ("test_date", True, _date_check),
+    ("notes", False, _string_check(2000, allow_empty=True)),
+)
+
+
+def _compile(schema: Sequence[FieldSpec]) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, Check], ...]]:
+    required = tuple(name for name, req, _ in schema if req)
+    checks = tuple((name, check) for name, _, check in schema)
+    return required, checks
+
+
+def _compile_predicate(schema: Sequence[FieldSpec]) -> Callable[[Any], bool]:
+    """
+    Genera `ok(obj) -> bool` con todos los checks del esquema en línea.
+    Los checks sin `expr` (p. ej. fechas) se llaman como función.
+    """
+    namespace: dict = {"_MISSING": object(), "Decimal": Decimal, "_is_number": _is_number}
+    lines = ["def ok(obj):", "    if type(obj) is not dict:", "        return False", "    get = obj.get"]
+    for i, (name, required, check) in enumerate(schema):
+        expr = getattr(check, "expr", None)
+        if expr is None:
+            namespace[f"_check{i}"] = check
+            expr = f"_check{i}(v) is None"
+        lines.append(f"    v = get({name!r}, _MISSING)")
+        if required:
+            lines.append(f"    if v is _MISSING or not {expr}:")
+        else:
+            lines.append(f"    if v is not _MISSING and not {expr}:")
+        lines.append("        return False")
+    lines.append("    return True")
+    exec("\n".join(lines), namespace)
+    return namespace["ok"]
+
+
+class PayloadValidator:
+    """Validador precompilado; reutilizable y sin estado entre llamadas."""
+
+    def __init__(
+        self,
+        payload_schema: Sequence[FieldSpec] = PAYLOAD_SCHEMA,
+        entry_schema: Sequence[FieldSpec] = ENTRY_SCHEMA,
+        max_results: int = MAX_RESULTS,
+        max_errors: int = MAX_ERRORS,
+    ):
+        self._required, self._checks = _compile(payload_schema)
+        self._entry_required, self._entry_checks = _compile(entry_schema)
+        self._entry_ok = _compile_predicate(entry_schema)
+        self.max_results = max_results
+        self.max_errors = max_errors
+
+    def errors(self, body: Any) -> List[str]:
+        """Todos los errores del payload (lista vacía si es válido)."""
+        if isinstance(body, LabResult):
+            body = body.to_raw()
+        if not isinstance(body, dict):
+            return ["payload: must be a JSON object"]
+
+        errors: List[str] = []
+        missing = [f for f in self._required if f not in body]
+        if "results" not in body:
+            missing.append("results")
+        if missing:
+            errors.append(f"Missing fields: {', '.join(missing)}")
+
+        for name, check in self._checks:
+            if name in body and (error := check(body[name])):
+                errors.append(f"{name}: {error}")
+
+        results = body.get("results")
+        if "results" in body:
+            if not isinstance(results, list) or not results:
+                errors.append("Field 'results' must be a non-empty list")
+            elif len(results) > self.max_results:
+                errors.append(f"Field 'results' must have at most {self.max_results} entries")
+            else:
+                self._entry_errors(results, errors)
+
+        if len(errors) > self.max_errors:
+            errors = errors[: self.max_errors]
+            errors.append("... more errors omitted")
+        return errors
+
+    def _entry_errors(self, results: List[Any], errors: List[str]) -> None:
+        required = self._entry_required
+        checks = self._entry_checks
+        ok = self._entry_ok
+        # Pasado el tope se corta: no tiene sentido recorrer el resto del panel
+        limit = self.max_errors + 1
+        for i, entry in enumerate(results):
+            if ok(entry):
+                continue
+            if not isinstance(entry, dict):
+                errors.append(f"results[{i}]: must be an object")
+            else:
+                for name in required:
+                    if name not in entry:
+                        errors.append(f"results[{i}].{name}: is required")
+                for name, check in checks:
+                    if name in entry and (error := check(entry[name])):
+                        errors.append(f"results[{i}].{name}: {error}")
+            if len(errors) > limit:
+                return
+
+
+LAB_RESULT_VALIDATOR = PayloadValidator()
+
+
+def validate_lab_result(body: Any) -> List[str]:
+    return LAB_RESULT_VALIDATOR.errors(body)
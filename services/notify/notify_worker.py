@@ -1,7 +1,13 @@
 import os
+import sys
 import json
 import time
-import boto3
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.aws import client  # noqa: E402
 
 # === CONFIGURACIÓN DESDE ENV ===
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
@@ -15,7 +21,7 @@ print("=============================\n")
 if not NOTIFY_QUEUE_URL:
     raise RuntimeError("NOTIFY_QUEUE_URL no está definido en las variables de entorno.")
 
-sqs = boto3.client("sqs", region_name=REGION_NAME)
+sqs = client("sqs", region_name=REGION_NAME)
 
 
 def handle_notify_message(body: str):
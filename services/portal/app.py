@@ -1,11 +1,9 @@
 import os
 import json
 from datetime import datetime, timezone
-import uuid
 from decimal import Decimal
 from typing import Optional 
 
-import boto3
 from boto3.dynamodb.conditions import Key, Attr
 from flask import (
     Flask,
@@ -17,6 +15,9 @@ from flask import (
     session,
 )
 
+from services.common.audit import AuditSink
+from services.common.aws import client, resource
+
 app = Flask(__name__)
 
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
@@ -25,11 +26,20 @@ PATIENTS_TABLE = os.environ["PATIENTS_TABLE"]
 ACCESS_AUDIT_TABLE = os.environ["ACCESS_AUDIT_TABLE"]
 REPORT_LAMBDA_NAME = os.environ["REPORT_LAMBDA_NAME"]
 
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
+# Flask atiende cada request en su propio hilo; el pool de conexiones
+# se dimensiona a los requests concurrentes que se esperan
+PORTAL_CONCURRENCY = int(os.environ.get("PORTAL_CONCURRENCY", "16"))
+
+dynamo = resource("dynamodb", PORTAL_CONCURRENCY, region_name=REGION_NAME)
 lab_results_table = dynamo.Table(LAB_RESULTS_TABLE)
 patients_table = dynamo.Table(PATIENTS_TABLE)
 access_audit_table = dynamo.Table(ACCESS_AUDIT_TABLE)
-lambda_client = boto3.client("lambda", region_name=REGION_NAME)
+lambda_client = client("lambda", PORTAL_CONCURRENCY, region_name=REGION_NAME)
+
+# Eventos de bajo riesgo van al buffer (flush cada 2 s, cada 25 eventos
+# y al salir del proceso); los accesos a resultados se escriben con
+# strict=True.
+audit = AuditSink(ACCESS_AUDIT_TABLE, dynamo, max_delay=2.0)
 
 
 # ===================== UTILIDADES =====================
@@ -46,29 +56,26 @@ def _put_audit_event(
     result_id: Optional[str] = None,
     justification: Optional[str] = None,
     break_glass: bool = False,
+    strict: bool = False,
 ):
     """
     Registra un evento en la tabla access_audit.
     Se usa para:
-      - RESULT_VIEW
-      - REPORT_DOWNLOAD
+      - RESULT_VIEW       (strict: durable antes de mostrar el resultado)
+      - REPORT_DOWNLOAD   (strict)
       - PORTAL_HEALTH
       - PORTAL_LOGIN
     """
-    item = {
-        "audit_id": str(uuid.uuid4()),
-        "timestamp": _now_iso(),
-        "action": action,
-        "actor_id": actor_id,
-        "patient_id": patient_id,
-        "result_id": result_id,
-        "justification": justification,
-        "break_glass": break_glass,
-        "source": "portal",
-    }
-    # Quitar None
-    item = {k: v for k, v in item.items() if v is not None}
-    access_audit_table.put_item(Item=item)
+    audit.emit(
+        action,
+        actor_id,
+        strict=strict,
+        patient_id=patient_id,
+        result_id=result_id,
+        justification=justification,
+        break_glass=break_glass,
+        source="portal",
+    )
 
 
 def _get_patient(patient_id: str):
@@ -400,6 +407,7 @@ def result_detail(result_id):
         result_id=result_id,
         justification=reason,
         break_glass=break_glass,
+        strict=True,
     )
 
     html = """
@@ -501,6 +509,7 @@ def download_report(result_id):
         result_id=result_id,
         justification=reason,
         break_glass=break_glass,
+        strict=True,
     )
 
     if not download_url:
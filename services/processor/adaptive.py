@@ -0,0 +1,205 @@
+"""
+Control adaptativo de concurrencia para el worker (WORKER_ADAPTIVE=true).
+
+El controlador combina tres señales:
+  - Profundidad de la cola (ApproximateNumberOfMessages vía
+    GetQueueAttributes) y edad del mensaje más viejo recibido
+    (SentTimestamp de los mensajes; SQS no expone la edad como
+    atributo de la cola, solo como métrica de CloudWatch).
+  - Latencia de procesamiento medida por el propio worker (EWMA).
+  - Errores de throttling de DynamoDB.
+
+Con eso ajusta cuántos mensajes se procesan en paralelo dentro del
+proceso y cuántos mensajes pedir por receive. Cada cambio se loguea con
+su motivo. La concurrencia:
+  - sube un 50% (al menos 1) por refresco mientras haya backlog o
+    mensajes viejos: crecimiento multiplicativo, no el aditivo de AIMD,
+    para alcanzar el máximo en pocos refrescos cuando se junta cola;
+  - baja a la mitad con throttling;
+  - baja de a uno con latencia alta o backlog bajo, y al mínimo con la
+    cola vacía.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+
+class AdjustableLimiter:
+    """Semáforo cuyo límite se puede cambiar en caliente."""
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int):
+        with self._cond:
+            self._limit = limit
+            self._cond.notify_all()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_use >= self._limit:
+                self._cond.wait()
+            self._in_use += 1
+
+    def release(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+
+class AdaptiveController:
+    def __init__(
+        self,
+        sqs,
+        queue_url: str,
+        min_concurrency: int,
+        max_concurrency: int,
+        target_latency: float = 2.0,
+        max_message_age: float = 300.0,
+        refresh_interval: float = 15.0,
+        throttle_cooldown: float = 30.0,
+    ):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.target_latency = target_latency
+        self.max_message_age = max_message_age
+        self.refresh_interval = refresh_interval
+        self.throttle_cooldown = throttle_cooldown
+
+        self.limiter = AdjustableLimiter(self.min_concurrency)
+        self.backlog = 0
+        self.oldest_age = 0.0
+        self.latency_ewma: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._last_throttle = 0.0
+        self._throttles_since_refresh = 0
+
+    # ---------- señales que reporta el worker ----------
+
+    @contextmanager
+    def slot(self):
+        """Ocupa un lugar de procesamiento y mide su latencia."""
+        self.limiter.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_latency(time.monotonic() - start)
+            self.limiter.release()
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * seconds
+
+    def record_throttle(self):
+        with self._lock:
+            self._last_throttle = time.monotonic()
+            self._throttles_since_refresh += 1
+
+    def record_received(self, messages: list):
+        """Actualiza la edad del mensaje más viejo con SentTimestamp."""
+        now_ms = time.time() * 1000
+        ages = [
+            (now_ms - int(m["Attributes"]["SentTimestamp"])) / 1000
+            for m in messages
+            if m.get("Attributes", {}).get("SentTimestamp")
+        ]
+        if ages:
+            with self._lock:
+                self.oldest_age = max(ages)
+
+    # ---------- decisiones ----------
+
+    def receive_params(self) -> dict:
+        """Parámetros para receive_message según el backlog conocido."""
+        if self.backlog > 0:
+            # Hay trabajo: no esperar más de lo necesario
+            return {
+                "MaxNumberOfMessages": 10,
+                "WaitTimeSeconds": 1,
+                "AttributeNames": ["SentTimestamp"],
+            }
+        # Cola vacía: long polling completo (lo más barato en horas valle)
+        return {
+            "MaxNumberOfMessages": 10,
+            "WaitTimeSeconds": 20,
+            "AttributeNames": ["SentTimestamp"],
+        }
+
+    def pause_after_batch(self) -> float:
+        return 0.0 if self.backlog > 0 else 1.0
+
+    def maybe_refresh(self):
+        """Relee la cola y recalcula el límite cada refresh_interval."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+        try:
+            resp = self.sqs.get_queue_attributes(
+                QueueUrl=self.queue_url,
+                AttributeNames=["ApproximateNumberOfMessages"],
+            )
+            self.backlog = int(resp["Attributes"]["ApproximateNumberOfMessages"])
+        except (ClientError, KeyError, ValueError) as e:
+            logging.warning(f"[adaptive] No se pudo leer la profundidad de la cola: {e}")
+
+        self._decide(now)
+
+    def _decide(self, now: float):
+        with self._lock:
+            current = self.limiter.limit
+            latency = self.latency_ewma
+            throttles = self._throttles_since_refresh
+            self._throttles_since_refresh = 0
+            throttled = now - self._last_throttle < self.throttle_cooldown
+
+        lat = "n/a" if latency is None else f"{latency:.2f}s"
+
+        if throttles or throttled:
+            new = max(self.min_concurrency, current // 2)
+            reason = f"throttling de DynamoDB ({throttles} evento(s) recientes)"
+        elif self.backlog == 0:
+            new = self.min_concurrency
+            reason = "cola vacía"
+        elif latency is not None and latency > 2 * self.target_latency:
+            new = max(self.min_concurrency, current - 1)
+            reason = f"latencia {latency:.2f}s > 2x objetivo {self.target_latency:.2f}s"
+        elif self.backlog > current * 10 or self.oldest_age > self.max_message_age:
+            step = max(1, current // 2)
+            new = min(self.max_concurrency, current + step)
+            reason = (
+                f"backlog={self.backlog}, mensaje más viejo={self.oldest_age:.0f}s, "
+                f"latencia={lat}"
+            )
+        elif self.backlog < current * 2:
+            new = max(self.min_concurrency, current - 1)
+            reason = f"backlog bajo ({self.backlog})"
+        else:
+            new = current
+            reason = f"estable (backlog={self.backlog})"
+
+        if new != current:
+            self.limiter.set_limit(new)
+            logging.info(f"[adaptive] concurrencia {current} -> {new}: {reason}")
+        else:
+            logging.debug(f"[adaptive] concurrencia {current} sin cambios: {reason}")
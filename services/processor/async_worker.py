@@ -0,0 +1,102 @@
+"""
+Motor asyncio para el worker de resultados (WORKER_ENGINE=async).
+
+Mantiene WORKER_RECEIVERS long-polls abiertos a la vez y procesa cada
+mensaje como una tarea, limitada por un semáforo de WORKER_CONCURRENCY.
+boto3 es bloqueante, así que cada llamada corre en el pool de hilos del
+event loop; lo que cambia es que ningún poller espera a que termine su
+lote para volver a pedir mensajes, y no hay pausa fija entre lotes.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from services.processor import worker
+
+# Lotes recibidos que pueden estar procesándose a la vez por receiver;
+# evita traer de SQS más mensajes de los que se alcanzan a procesar
+# antes de que venza el VisibilityTimeout.
+BATCHES_IN_FLIGHT_PER_RECEIVER = 2
+
+
+async def _process_message(msg: dict, body, stage_slots: asyncio.Semaphore):
+    async with stage_slots:
+        return await asyncio.to_thread(worker._process_one, msg, body)
+
+
+async def _skip_duplicate():
+    return worker.DUPLICATE
+
+
+async def _handle_batch(messages: list, stage_slots: asyncio.Semaphore, batch_slots: asyncio.Semaphore):
+    worker.begin_batch(messages)
+    try:
+        bodies, duplicates = await asyncio.to_thread(worker.find_duplicates, messages)
+        results = await asyncio.gather(
+            *(
+                _skip_duplicate()
+                if msg["MessageId"] in duplicates
+                else _process_message(msg, bodies.get(msg["MessageId"]), stage_slots)
+                for msg in messages
+            )
+        )
+        await asyncio.to_thread(worker.complete_batch, messages, list(results))
+    except Exception as e:
+        # complete_batch ya registra sus errores; esto es la red de
+        # seguridad para que una tarea rota no tumbe el poller.
+        logging.error(f"Error completando lote asíncrono: {e}")
+    finally:
+        worker.end_batch(messages)
+        batch_slots.release()
+
+
+async def _poller(index: int, stage_slots: asyncio.Semaphore, tasks: set):
+    batch_slots = asyncio.Semaphore(BATCHES_IN_FLIGHT_PER_RECEIVER)
+
+    while not worker.stop_event.is_set():
+        await batch_slots.acquire()
+        messages = await asyncio.to_thread(worker.receive_messages)
+
+        if not messages:
+            batch_slots.release()
+            logging.info(f"[poller-{index}] No hay mensajes en la cola, esperando...")
+            continue
+
+        # Se lanza el lote y se vuelve a hacer polling de inmediato
+        task = asyncio.create_task(_handle_batch(messages, stage_slots, batch_slots))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+
+async def run_engine(receivers: int, concurrency: int):
+    loop = asyncio.get_running_loop()
+    # Hilos suficientes para los long-polls, las etapas por mensaje y la
+    # escritura/ack de los lotes en vuelo.
+    loop.set_default_executor(
+        ThreadPoolExecutor(
+            max_workers=concurrency + receivers * (1 + BATCHES_IN_FLIGHT_PER_RECEIVER),
+            thread_name_prefix="async-worker",
+        )
+    )
+
+    stage_slots = asyncio.Semaphore(concurrency)
+    tasks: set = set()
+
+    await asyncio.gather(*(_poller(i, stage_slots, tasks) for i in range(receivers)))
+
+    # Drenado: los pollers ya no piden mensajes; esperamos los lotes en vuelo
+    if tasks:
+        logging.info(f"Esperando {len(tasks)} lote(s) en vuelo antes de salir...")
+        await asyncio.gather(*tasks)
+
+
+def run_async():
+    logging.info(
+        f"Motor asyncio: {worker.WORKER_RECEIVERS} long-polls, "
+        f"{worker.WORKER_CONCURRENCY} mensajes en paralelo"
+    )
+    asyncio.run(run_engine(worker.WORKER_RECEIVERS, worker.WORKER_CONCURRENCY))
+
+
+if __name__ == "__main__":
+    run_async()
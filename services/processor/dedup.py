@@ -0,0 +1,45 @@
+"""
+Idempotencia del worker ante re-entregas de SQS (at-least-once).
+
+CompletedCache es un LRU en memoria de result_id ya guardados en
+lab_results por este proceso. Lo que no está en el LRU se confirma contra
+la tabla con BatchGetItem (un solo request por lote recibido): si la fila
+existe, el mensaje es un duplicado. El worker escribe el item recién
+después de encolar la notificación y de escribir la auditoría
+(worker._write_results), así que una fila en lab_results es un resultado
+terminado; si algo falla antes, no hay fila y la re-entrega lo procesa
+(y notifica) de nuevo.
+"""
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+
+class CompletedCache:
+    """LRU thread-safe de result_id completados."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, result_id: str) -> bool:
+        with self._lock:
+            if result_id in self._items:
+                self._items.move_to_end(result_id)
+                return True
+            return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def add(self, result_ids: Iterable[str]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for rid in result_ids:
+                self._items[rid] = None
+                self._items.move_to_end(rid)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
@@ -0,0 +1,185 @@
+"""
+Heartbeat de visibilidad para los mensajes en vuelo del worker.
+
+Mientras un mensaje se está procesando, un hilo en segundo plano le
+extiende el VisibilityTimeout (en lotes de 10 con
+ChangeMessageVisibilityBatch) para que no vuelva a ser visible y otro
+worker lo procese en paralelo. Si el procesamiento falla por un error
+transitorio, el mensaje se libera para que se reintente sin esperar el
+timeout completo:
+
+  - red / 5xx: visibilidad 0, se reintenta enseguida.
+  - throttling (incluye UnprocessedItems): visibilidad con backoff
+    exponencial según ApproximateReceiveCount. Reintentar enseguida
+    durante una ráfaga de throttling gasta las recepciones del mensaje
+    (maxReceiveCount) y lo manda a la DLQ aunque sea válido.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, Tuple
+
+from botocore.exceptions import ClientError
+
+from services.common.dynamo_batch import CONNECTION_ERRORS, THROTTLING_ERRORS, UNPROCESSED_WRITE_ERROR
+from services.common.sqs_batch import change_visibility_batch
+
+# Códigos de error de AWS que vale la pena reintentar enseguida
+TRANSIENT_ERROR_CODES = THROTTLING_ERRORS | {
+    "InternalError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "SlowDown",
+    "RequestTimeout",
+}
+
+# Prefijo de los errores de red en los dicts de batch_write_items / SQS (error_text)
+_CONNECTION_ERROR_PREFIXES = tuple(f"{cls.__name__}:" for cls in CONNECTION_ERRORS)
+
+# Los que piden backoff en vez de reintento inmediato (S3 responde SlowDown)
+THROTTLING_CODES = THROTTLING_ERRORS | {"SlowDown"}
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True si el error es de red / throttling / 5xx de AWS."""
+    if isinstance(exc, CONNECTION_ERRORS):
+        return True
+    if isinstance(exc, ClientError):
+        code = exc.response.get("Error", {}).get("Code", "")
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_ERROR_CODES or status >= 500
+    return False
+
+
+def is_transient_write_error(error: str) -> bool:
+    """Igual que is_transient_error, para los errores (str) de batch_write_items."""
+    return (
+        error == UNPROCESSED_WRITE_ERROR
+        or error.startswith(_CONNECTION_ERROR_PREFIXES)
+        or any(code in error for code in TRANSIENT_ERROR_CODES)
+    )
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    """True si AWS pidió bajar el ritmo (subconjunto de is_transient_error)."""
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code", "") in THROTTLING_CODES
+    return False
+
+
+def is_throttling_write_error(error: str) -> bool:
+    """Igual que is_throttling_error, para los errores (str) de batch_write_items / SQS."""
+    return error == UNPROCESSED_WRITE_ERROR or any(code in error for code in THROTTLING_CODES)
+
+
+class VisibilityHeartbeat:
+    def __init__(
+        self,
+        sqs,
+        queue_url: str,
+        visibility_timeout: int = 60,
+        max_extension: int = 900,
+        throttle_backoff: int = 10,
+        max_backoff: int = 300,
+    ):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        # Tope de tiempo en vuelo: un mensaje atascado más que esto se deja
+        # volver a la cola (y eventualmente a la DLQ).
+        self.max_extension = max_extension
+        # Visibilidad al liberar por throttling: throttle_backoff * 2^(n-1)
+        # en la n-ésima recepción, con tope max_backoff
+        self.throttle_backoff = throttle_backoff
+        self.max_backoff = max_backoff
+        # Extendemos a un tercio del timeout para tener margen ante fallos
+        self.interval = max(1.0, visibility_timeout / 3)
+
+        # {MessageId: (ReceiptHandle, recibido_en)}
+        self._in_flight: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="visibility-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def track(self, messages: list):
+        now = time.monotonic()
+        with self._lock:
+            for m in messages:
+                self._in_flight[m["MessageId"]] = (m["ReceiptHandle"], now)
+
+    def untrack(self, messages: list):
+        with self._lock:
+            for m in messages:
+                self._in_flight.pop(m["MessageId"], None)
+
+    def backoff_for(self, message: dict) -> int:
+        """
+        Visibilidad (s) para reintentar un mensaje throttleado. Usa el
+        ApproximateReceiveCount del mensaje (hay que pedirlo en
+        receive_message) y jitter para no reintentar todos a la vez.
+        """
+        try:
+            receives = max(1, int(message.get("Attributes", {}).get("ApproximateReceiveCount", 1)))
+        except (TypeError, ValueError):
+            receives = 1
+        delay = min(self.max_backoff, self.throttle_backoff * 2 ** (receives - 1))
+        return random.randint(max(1, delay // 2), max(1, delay))
+
+    def release(self, messages: list, throttled: list = ()):
+        """
+        Deja de extender y devuelve los mensajes a la cola: `messages`
+        visibles ya mismo, `throttled` después de backoff_for().
+        """
+        if not messages and not throttled:
+            return
+        self.untrack(messages)
+        self.untrack(throttled)
+        entries = {m["MessageId"]: (m["ReceiptHandle"], 0) for m in messages}
+        entries.update({m["MessageId"]: (m["ReceiptHandle"], self.backoff_for(m)) for m in throttled})
+        failed = change_visibility_batch(self.sqs, self.queue_url, entries)
+        for key, error in failed.items():
+            logging.warning(f"No se pudo liberar el mensaje {key}: {error}")
+        released = len(entries) - len(failed)
+        if released:
+            logging.info(
+                f"{released} mensaje(s) liberados para reintento ({len(throttled)} con backoff por throttling)"
+            )
+
+    def extend_now(self):
+        """Extiende la visibilidad de todos los mensajes en vuelo."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, t0) in self._in_flight.items() if now - t0 > self.max_extension]
+            for key in expired:
+                del self._in_flight[key]
+            entries = {k: (rh, self.visibility_timeout) for k, (rh, _) in self._in_flight.items()}
+
+        for key in expired:
+            logging.warning(
+                f"Mensaje {key} lleva más de {self.max_extension}s en vuelo; deja de extenderse"
+            )
+
+        failed = change_visibility_batch(self.sqs, self.queue_url, entries)
+        for key, error in failed.items():
+            # ReceiptHandleIsInvalid / MessageNotInflight: ya se borró o
+            # ya volvió a la cola; no tiene sentido seguir intentando.
+            logging.warning(f"No se pudo extender la visibilidad de {key}: {error}")
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.extend_now()
+            except Exception as e:
+                logging.error(f"Error en heartbeat de visibilidad: {e}")
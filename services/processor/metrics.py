@@ -0,0 +1,295 @@
+"""
+Tiempos por etapa del worker, en histogramas en memoria.
+
+Etapas que registra el worker (en segundos, se reportan en ms):
+  receive    ReceiveMessage (incluye la espera del long polling)
+  parse      decodificar el Body / payload (con Decimal desde el parseo;
+             en payloads de S3 incluye leer el stream del objeto)
+  s3_get     GetObject hasta tener los headers
+  normalize  process_lab_result
+  put        BatchWriteItem de items + auditorías WORKER_PROCESSED
+  notify     SendMessageBatch a notify_queue
+  ack        DeleteMessageBatch
+  audit      flush del buffer de auditoría
+  dedup      chequeo de re-entregas contra lab_results
+  pool_wait     obtener conexión del pool de urllib3 (cada llamada a AWS)
+  pool_starved  idem, solo los checkouts con el pool agotado: cada uno abre
+                una conexión nueva; si crece, falta max_pool_connections
+
+Reporters (WORKER_METRICS_REPORTER, separados por coma):
+  log   una línea por etapa cada WORKER_METRICS_INTERVAL segundos
+  http  texto plano en http://127.0.0.1:WORKER_METRICS_PORT/metrics
+  emf   CloudWatch Embedded Metric Format por stdout (lo toma el agente
+        de CloudWatch / el log group del worker)
+"""
+import bisect
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+# Límites superiores de los buckets, en ms (escala ~logarítmica hasta 60 s)
+BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 20000, 60000,
+)
+
+
+class Histogram:
+    """Histograma de latencias con buckets fijos (thread-safe)."""
+
+    def __init__(self, buckets_ms: Iterable[float] = BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # Un bucket extra para lo que pasa del último límite
+            self.counts = [0] * (len(self.buckets_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """Límite superior del bucket donde cae el percentil p (0-100)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = p / 100.0 * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank and n:
+                    return self.buckets_ms[i] if i < len(self.buckets_ms) else self.max_ms
+            return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            count, total, peak = self.count, self.total_ms, self.max_ms
+        return {
+            "count": count,
+            "avg_ms": round(total / count, 3) if count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(peak, 3),
+        }
+
+
+class StageTimers:
+    """Un Histogram por etapa; las etapas se crean al primer uso."""
+
+    def __init__(self):
+        self._stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(stage, Histogram())
+        return hist
+
+    def record(self, stage: str, seconds: float):
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stages = dict(self._stages)
+        out = {}
+        for name in sorted(stages):
+            out[name] = stages[name].summary()
+            if reset:
+                stages[name].reset()
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Reporters
+# ---------------------------------------------------------------------------
+
+class LogReporter:
+    """Una línea de log por etapa con datos en la ventana."""
+
+    def report(self, snapshot: Dict[str, Dict[str, float]]):
+        for stage, s in snapshot.items():
+            if s["count"]:
+                logging.info(
+                    f"stage={stage} count={s['count']} avg_ms={s['avg_ms']} p50_ms={s['p50_ms']} "
+                    f"p90_ms={s['p90_ms']} p99_ms={s['p99_ms']} max_ms={s['max_ms']}"
+                )
+
+
+class EmfReporter:
+    """CloudWatch Embedded Metric Format: un documento JSON por etapa."""
+
+    def __init__(self, namespace: str = "LabSecure/Worker", stream=None):
+        self.namespace = namespace
+        self.stream = stream or sys.stdout
+
+    def report(self, snapshot: Dict[str, Dict[str, float]]):
+        now_ms = int(time.time() * 1000)
+        for stage, s in snapshot.items():
+            if not s["count"]:
+                continue
+            doc = {
+                "_aws": {
+                    "Timestamp": now_ms,
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": self.namespace,
+                            "Dimensions": [["Stage"]],
+                            "Metrics": [
+                                {"Name": "Count", "Unit": "Count"},
+                                {"Name": "AvgMs", "Unit": "Milliseconds"},
+                                {"Name": "P50Ms", "Unit": "Milliseconds"},
+                                {"Name": "P99Ms", "Unit": "Milliseconds"},
+                                {"Name": "MaxMs", "Unit": "Milliseconds"},
+                            ],
+                        }
+                    ],
+                },
+                "Stage": stage,
+                "Count": s["count"],
+                "AvgMs": s["avg_ms"],
+                "P50Ms": s["p50_ms"],
+                "P99Ms": s["p99_ms"],
+                "MaxMs": s["max_ms"],
+            }
+            self.stream.write(json.dumps(doc) + "\n")
+        self.stream.flush()
+
+
+def render_text(snapshot: Dict[str, Dict[str, float]]) -> str:
+    """Formato texto estilo Prometheus (worker_stage_<campo>{stage="..."})."""
+    lines = []
+    for field in ("count", "avg_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"):
+        for stage, s in snapshot.items():
+            lines.append(f'worker_stage_{field}{{stage="{stage}"}} {s[field]}')
+    return "\n".join(lines) + "\n"
+
+
+class HttpReporter:
+    """
+    Endpoint local de solo lectura. Muestra la ventana en curso: desde el
+    último reporte periódico, o desde el arranque si solo hay http.
+    """
+
+    def __init__(self, timers: StageTimers, port: int, host: str = "127.0.0.1"):
+        timers_ref = timers
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render_text(timers_ref.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsReporter:
+    """
+    Hilo que cada `interval` segundos toma la ventana de los timers
+    (snapshot con reset) y la pasa a los reporters periódicos.
+    """
+
+    def __init__(self, timers: StageTimers, reporters: List, interval: float = 60.0, http: Optional[HttpReporter] = None):
+        self.timers = timers
+        self.reporters = reporters
+        self.interval = interval
+        self.http = http
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-report", daemon=True)
+
+    def start(self):
+        if self.http:
+            self.http.start()
+        if self.reporters:
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        snapshot = self.timers.snapshot(reset=True)
+        for reporter in self.reporters:
+            try:
+                reporter.report(snapshot)
+            except Exception as e:
+                logging.error(f"Error reportando métricas con {type(reporter).__name__}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        if self.reporters:
+            self.flush()
+        if self.http:
+            self.http.stop()
+
+
+def build_reporter(timers: StageTimers, spec: str, interval: float, port: int) -> Optional[MetricsReporter]:
+    """Arma el MetricsReporter según WORKER_METRICS_REPORTER (None si está vacío)."""
+    names = [n.strip().lower() for n in spec.split(",") if n.strip() and n.strip().lower() != "none"]
+    if not names:
+        return None
+    reporters = []
+    http = None
+    for name in names:
+        if name == "log":
+            reporters.append(LogReporter())
+        elif name == "emf":
+            reporters.append(EmfReporter())
+        elif name == "http":
+            try:
+                http = HttpReporter(timers, port)
+            except OSError as e:
+                logging.warning(f"No se pudo abrir el endpoint de métricas en el puerto {port}: {e}")
+        else:
+            logging.warning(f"Reporter de métricas desconocido: {name}")
+    return MetricsReporter(timers, reporters, interval, http)
@@ -0,0 +1,85 @@
+"""
+Lectura en streaming de los payloads raw guardados en S3.
+
+En vez de read() + decode() + json.loads() (bytes, str y árbol en memoria
+a la vez), el body de S3 se parsea de forma incremental en trozos y los
+números con decimales se convierten a Decimal durante el parseo, que es
+lo que DynamoDB necesita. El tamaño leído está acotado por mensaje para
+que un archivo enorme no tumbe al worker cuando corre con mucha
+concurrencia.
+
+Usa ijson si está instalado (parser incremental real); si no, lee por
+trozos con el mismo tope y parsea con json.loads(parse_float=Decimal).
+"""
+import json
+from decimal import Decimal
+from typing import Any, Optional, Union
+
+try:
+    import ijson
+except ImportError:  # dependencia opcional
+    ijson = None
+
+# Tamaño de cada lectura sobre el stream de S3
+CHUNK_SIZE = 64 * 1024
+
+
+class PayloadTooLarge(ValueError):
+    """El payload supera el tope de bytes configurado para el worker."""
+
+
+class _CappedReader:
+    """Envuelve un stream y falla si se leen más de max_bytes."""
+
+    def __init__(self, stream, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = CHUNK_SIZE) -> bytes:
+        if size is None or size < 0:
+            size = CHUNK_SIZE
+        chunk = self.stream.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise PayloadTooLarge(
+                f"payload supera el máximo de {self.max_bytes} bytes"
+            )
+        return chunk
+
+
+def decode_payload(raw: Union[str, bytes]) -> Any:
+    """
+    Decodifica JSON ya listo para DynamoDB: los números con decimales
+    salen como Decimal en el propio parseo, así no hace falta recorrer y
+    copiar el árbol después (_convert_floats_to_decimal).
+    """
+    return json.loads(raw, parse_float=Decimal)
+
+
+def load_json_stream(stream, max_bytes: int, content_length: Optional[int] = None) -> Any:
+    """
+    Parsea el JSON de `stream` (p.ej. obj["Body"] de s3.get_object)
+    sin cargar el texto completo, con números decimales como Decimal.
+    Lanza PayloadTooLarge si el payload supera max_bytes.
+    """
+    if content_length is not None and content_length > max_bytes:
+        raise PayloadTooLarge(
+            f"payload de {content_length} bytes supera el máximo de {max_bytes}"
+        )
+
+    reader = _CappedReader(stream, max_bytes)
+
+    if ijson is not None:
+        # use_float=False: los números no enteros salen como Decimal
+        for document in ijson.items(reader, "", use_float=False):
+            return document
+        raise ValueError("payload JSON vacío")
+
+    buf = bytearray()
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+    return decode_payload(bytes(buf))
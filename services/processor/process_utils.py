@@ -1,25 +1,131 @@
+import re
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
 
+from services.common.models import LabResult
 
-def process_lab_result(data: Dict[str, Any], result_id: Optional[str] = None) -> Dict[str, Any]:
+
+# ===================== RANGOS DE REFERENCIA =====================
+
+_NUMBER = r"[-+]?\d+(?:\.\d+)?"
+# "4.5-11.0", "4.5 - 11.0 mg/dL", "70 to 99"
+_INTERVAL_RE = re.compile(
+    rf"^\s*(?P<low>{_NUMBER})\s*(?:-|–|to|a)\s*(?P<high>{_NUMBER})\s*(?P<unit>\S.*)?$",
+    re.IGNORECASE,
+)
+# "<100", "<= 5.7 %", ">40", "≥ 60"
+_BOUND_RE = re.compile(
+    rf"^\s*(?P<op><=|>=|=<|=>|<|>|≤|≥)\s*(?P<value>{_NUMBER})\s*(?P<unit>\S.*)?$"
+)
+
+
+class ReferenceRange(NamedTuple):
+    """Rango de referencia ya compilado (límites, inclusividad y unidad)."""
+
+    low: Optional[float]
+    high: Optional[float]
+    low_inclusive: bool
+    high_inclusive: bool
+    unit: Optional[str]
+
+    def contains(self, value: float) -> bool:
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.low_inclusive):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.high_inclusive):
+                return False
+        return True
+
+
+@lru_cache(maxsize=4096)
+def parse_reference_range(text: Optional[str]) -> Optional[ReferenceRange]:
     """
-    Normaliza un resultado de laboratorio para guardarlo en DynamoDB.
+    Compila un reference_range de texto. Devuelve None si no es un rango
+    numérico reconocible (p.ej. "negative"). Se cachea por string porque
+    los mismos pocos cientos de rangos se repiten en millones de resultados.
+    """
+    if not isinstance(text, str):
+        return None
 
-    - Asegura que haya un result_id consistente en todo el flujo.
-    - Agrega campos de auditoría (status, created_at, updated_at).
-    - Calcula has_abnormal si algún resultado viene marcado como is_abnormal = True.
+    m = _INTERVAL_RE.match(text)
+    if m:
+        low, high = float(m.group("low")), float(m.group("high"))
+        if low > high:
+            return None
+        return ReferenceRange(low, high, True, True, _normalize_unit(m.group("unit")))
+
+    m = _BOUND_RE.match(text)
+    if m:
+        op = m.group("op")
+        value = float(m.group("value"))
+        unit = _normalize_unit(m.group("unit"))
+        if op in ("<", "<=", "=<", "≤"):
+            return ReferenceRange(None, value, False, op != "<", unit)
+        return ReferenceRange(value, None, op != ">", False, unit)
+
+    return None
+
+
+def _normalize_unit(unit: Optional[str]) -> Optional[str]:
+    if not unit:
+        return None
+    return unit.strip().lower() or None
+
+
+def _numeric_value(value: Any) -> Optional[float]:
+    # bool es subclase de int, pero un True no es un valor de laboratorio
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _range_for_unit(reference_range: Optional[str], unit: Optional[str]) -> Optional[ReferenceRange]:
+    """
+    Rango compilado aplicable a un valor en `unit`; None si el rango no es
+    numérico o si trae una unidad distinta (no comparamos mg/dL con mmol/L).
     """
+    rng = parse_reference_range(reference_range)
+    if rng is None:
+        return None
+    if rng.unit is not None and rng.unit != _normalize_unit(unit):
+        return None
+    return rng
 
-    # Usa el result_id que venga del caller, o el que venga en data,
-    # y si no hay ninguno, genera uno nuevo.
-    rid = result_id or data.get("result_id") or str(uuid.uuid4())
 
-    # Fecha/hora en UTC con timezone-aware (evita warning en Python 3.13+)
-    now = datetime.now(timezone.utc).isoformat()
+def is_out_of_range(entry: Dict[str, Any]) -> Optional[bool]:
+    """
+    Evalúa el value de una entrada contra su reference_range.
+    True = fuera de rango, False = dentro, None = no evaluable.
+    """
+    rng = _range_for_unit(entry.get("reference_range"), entry.get("unit"))
+    if rng is None:
+        return None
+    value = _numeric_value(entry.get("value"))
+    if value is None:
+        return None
+    return not rng.contains(value)
+
+
+def evaluate_reference_ranges(entries: Sequence[Dict[str, Any]]) -> List[Optional[bool]]:
+    """
+    is_out_of_range para un panel completo (o todas las entradas de un
+    lote) en una sola pasada; los rangos compilados salen de la caché.
+    """
+    return [is_out_of_range(e) for e in entries]
+
 
-    item: Dict[str, Any] = {
+# ===================== NORMALIZACIÓN =====================
+
+
+def _base_item(data: Dict[str, Any], rid: str, now: str) -> Dict[str, Any]:
+    return {
         "result_id": rid,
         "patient_id": data["patient_id"],
         "lab_id": data["lab_id"],
@@ -33,13 +139,99 @@ def process_lab_result(data: Dict[str, Any], result_id: Optional[str] = None) ->
         "updated_at": now,
     }
 
+
+def _range_flags(results: Any) -> List[Optional[bool]]:
+    if not isinstance(results, list):
+        return []
+    return evaluate_reference_ranges(results)
+
+
+def _out_of_range_codes(results: List[Dict[str, Any]], flags: Sequence[Optional[bool]]) -> List[Any]:
+    return [r.get("test_code") for r, flag in zip(results, flags) if flag]
+
+
+def process_lab_result(
+    data: Union[Dict[str, Any], LabResult], result_id: Optional[str] = None
+) -> Union[Dict[str, Any], LabResult]:
+    """
+    Normaliza un resultado de laboratorio para guardarlo en DynamoDB.
+
+    Acepta el dict raw o un LabResult; con un LabResult devuelve otro
+    LabResult (las entradas se comparten, no se copian) y el caller usa
+    .to_item() al momento de escribir.
+
+    - Asegura que haya un result_id consistente en todo el flujo.
+    - Agrega campos de auditoría (status, created_at, updated_at).
+    - Evalúa cada value contra su reference_range (out_of_range = test_code
+      de los valores fuera de rango).
+    - Calcula has_abnormal si algún resultado viene marcado como
+      is_abnormal = True o quedó fuera de su rango de referencia.
+    """
+
+    # Usa el result_id que venga del caller, o el que venga en data,
+    # y si no hay ninguno, genera uno nuevo.
+    rid = result_id or data.get("result_id") or str(uuid.uuid4())
+
+    # Fecha/hora en UTC con timezone-aware (evita warning en Python 3.13+)
+    now = datetime.now(timezone.utc).isoformat()
+
+    item = _base_item(data, rid, now)
+
     results = item["results"]
+    range_flags = _range_flags(results)
+    item["out_of_range"] = _out_of_range_codes(results, range_flags)
 
     # has_abnormal = True si cualquier resultado viene con is_abnormal = True
+    # o si el servidor lo encontró fuera de rango
     if isinstance(results, list) and results:
-        item["has_abnormal"] = any(bool(r.get("is_abnormal")) for r in results)
+        item["has_abnormal"] = any(bool(r.get("is_abnormal")) for r in results) or any(range_flags)
     else:
         item["has_abnormal"] = False
 
+    if isinstance(data, LabResult):
+        return LabResult(**item)
     return item
 
+
+def process_lab_results_batch(
+    payloads: Sequence[Dict[str, Any]],
+    result_ids: Optional[Sequence[Optional[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Versión por lotes de process_lab_result: mismo resultado para cada
+    payload (salvo que created_at/updated_at es uno solo para todo el lote).
+
+    Las entradas de todos los payloads se aplanan en una sola columna
+    (lista + offsets por item): los flags is_abnormal y la evaluación de
+    rangos se hacen de una pasada sobre la columna, y has_abnormal se
+    resuelve con any() sobre cada tramo.
+    """
+    if result_ids is None:
+        result_ids = [None] * len(payloads)
+
+    now = datetime.now(timezone.utc).isoformat()
+
+    items = []
+    # offsets[i]:offsets[i+1] son las entradas del item i en `entries`
+    offsets = [0]
+    entries: List[Dict[str, Any]] = []
+    for data, result_id in zip(payloads, result_ids):
+        rid = result_id or data.get("result_id") or str(uuid.uuid4())
+        item = _base_item(data, rid, now)
+        results = item["results"]
+        if isinstance(results, list):
+            entries.extend(results)
+        offsets.append(len(entries))
+        items.append(item)
+
+    flags = [r.get("is_abnormal") for r in entries]
+    range_flags = evaluate_reference_ranges(entries)
+
+    for i, item in enumerate(items):
+        start, end = offsets[i], offsets[i + 1]
+        item_range_flags = range_flags[start:end]
+        item["out_of_range"] = _out_of_range_codes(entries[start:end], item_range_flags)
+        # any() usa la misma regla de verdad que bool()
+        item["has_abnormal"] = any(flags[start:end]) or any(item_range_flags)
+
+    return items
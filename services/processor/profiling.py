@@ -0,0 +1,136 @@
+"""
+Profiler por muestreo para diagnosticar lentitud en producción.
+
+Un hilo toma cada `interval` segundos la pila de todos los hilos del
+proceso (sys._current_frames) y cuenta cada pila. No instrumenta cada
+llamada como cProfile, así que el overhead es bajo y constante, y ve
+también lo que hacen los hilos del pool y el heartbeat.
+
+Se arma para los próximos N mensajes (WORKER_PROFILE_MESSAGES al arrancar
+o SIGUSR1 con el worker corriendo). El handler de la señal solo deja el
+pedido (request_arm); el loop del worker lo arma en el próximo ciclo
+(arm_requested), porque la señal puede llegar mientras el hilo principal
+tiene tomado el lock del profiler. Al completarse escribe las pilas en
+formato "collapsed" (una línea `f1;f2;f3 N`, lo que consume flamegraph.pl
+o speedscope) en WORKER_PROFILE_DIR y loguea las funciones más vistas.
+"""
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Counter, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 15):
+        """Funciones más vistas en la punta de la pila (tiempo propio)."""
+        leaf = collections.Counter()
+        for stack, n in self.stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += n
+        return leaf.most_common(limit)
+
+
+class MessageProfiler:
+    """Arma el SamplingProfiler para N mensajes y lo vuelca al terminar."""
+
+    def __init__(self, output_dir: str, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._profiler: Optional[SamplingProfiler] = None
+        # Pedido pendiente desde un signal handler (0 = ninguno)
+        self._requested = 0
+
+    @property
+    def active(self) -> bool:
+        return self._profiler is not None
+
+    def arm(self, messages: int):
+        with self._lock:
+            if self._profiler is not None or messages <= 0:
+                return
+            self._remaining = messages
+            self._profiler = SamplingProfiler(self.interval)
+            self._profiler.start()
+        logging.info(f"Profiler por muestreo activo para los próximos {messages} mensajes")
+
+    def request_arm(self, messages: int):
+        """
+        Seguro desde un signal handler: solo asigna un atributo (sin
+        locks ni logging) y arm_requested() lo completa después.
+        """
+        self._requested = messages
+
+    def arm_requested(self) -> bool:
+        """Arma el profiler si hay un pedido de request_arm pendiente."""
+        messages = self._requested
+        if not messages:
+            return False
+        self._requested = 0
+        self.arm(messages)
+        return True
+
+    def message_done(self, count: int = 1) -> Optional[str]:
+        """Descuenta mensajes; al llegar a 0 vuelca el perfil y devuelve la ruta."""
+        if self._profiler is None:
+            return None
+        with self._lock:
+            if self._profiler is None:
+                return None
+            self._remaining -= count
+            if self._remaining > 0:
+                return None
+            profiler, self._profiler = self._profiler, None
+        return self._dump(profiler)
+
+    def _dump(self, profiler: SamplingProfiler) -> str:
+        profiler.stop()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"worker-profile-{os.getpid()}-{int(time.time())}.txt")
+        with open(path, "w") as f:
+            f.write(profiler.collapsed())
+        top = ", ".join(f"{name}={n}" for name, n in profiler.top_functions())
+        logging.info(f"Perfil escrito en {path} ({profiler.samples} muestras). Top: {top}")
+        return path
@@ -0,0 +1,179 @@
+"""
+Supervisor multi-proceso para el worker de resultados.
+
+Levanta WORKER_PROCESSES procesos hijos, cada uno con su propio
+services.processor.worker (y por tanto sus propios clientes boto3 y su
+propio GIL). Reinicia los hijos que mueren, los drena con SIGTERM al
+apagarse y reporta el throughput de cada uno.
+
+Uso (en lugar de `python3 -m services.processor.worker`):
+    python3 -m services.processor.supervisor
+"""
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing as mp
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(processName)s] %(message)s",
+)
+
+WORKER_PROCESSES = max(1, int(os.environ.get("WORKER_PROCESSES", str(os.cpu_count() or 1))))
+# Cada cuántos segundos se reporta el throughput por hijo
+SUPERVISOR_STATS_INTERVAL = int(os.environ.get("SUPERVISOR_STATS_INTERVAL", "60"))
+# Tiempo máximo para que un hijo termine su lote tras SIGTERM
+# (un long-poll de 20 s + el lote en curso)
+SUPERVISOR_DRAIN_TIMEOUT = int(os.environ.get("SUPERVISOR_DRAIN_TIMEOUT", "90"))
+# Si un hijo muere antes de este tiempo, esperamos antes de reiniciarlo
+# para no entrar en un bucle de reinicios (p.ej. config rota).
+MIN_CHILD_UPTIME = 10
+
+# fork es más barato; el supervisor nunca importa boto3, así que los
+# hijos crean sus clientes desde cero de todos modos.
+_ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+
+
+def _child_main(index: int, processed, failed):
+    """Punto de entrada de cada proceso hijo."""
+    # Con fork se heredan los handlers del supervisor; el worker instala
+    # los suyos en main_loop.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Cada hijo expone sus métricas HTTP en su propio puerto (base + índice)
+    base_port = int(os.environ.get("WORKER_METRICS_PORT", "9102"))
+    os.environ["WORKER_METRICS_PORT"] = str(base_port + index)
+
+    # Importar aquí: cada hijo construye sus propios clientes boto3
+    from services.processor import worker
+
+    def _sync_stats():
+        while True:
+            processed.value = worker.stats["processed"]
+            failed.value = worker.stats["failed"]
+            if worker.stop_event.wait(1):
+                break
+        processed.value = worker.stats["processed"]
+        failed.value = worker.stats["failed"]
+
+    threading.Thread(target=_sync_stats, name="stats-sync", daemon=True).start()
+
+    logging.info(f"Hijo {index} iniciado (pid={os.getpid()})")
+    worker.main_loop()
+
+    processed.value = worker.stats["processed"]
+    failed.value = worker.stats["failed"]
+
+
+class _Child:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        # Totales de encarnaciones anteriores (los contadores compartidos
+        # se recrean en cada reinicio)
+        self.base_processed = 0
+        self.base_failed = 0
+        self.processed = None
+        self.failed = None
+        self.last_reported = 0
+
+    def start(self):
+        self.processed = _ctx.Value("Q", 0, lock=False)
+        self.failed = _ctx.Value("Q", 0, lock=False)
+        self.process = _ctx.Process(
+            target=_child_main,
+            args=(self.index, self.processed, self.failed),
+            name=f"worker-{self.index}",
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+
+    def totals(self):
+        processed = self.base_processed + (self.processed.value if self.processed else 0)
+        failed = self.base_failed + (self.failed.value if self.failed else 0)
+        return processed, failed
+
+    def retire(self):
+        """Acumula los contadores de la encarnación que acaba de morir."""
+        self.base_processed, self.base_failed = self.totals()
+        self.processed = self.failed = None
+
+
+def run_supervisor(processes: int = WORKER_PROCESSES):
+    stopping = threading.Event()
+
+    def _on_signal(signum, _frame):
+        logging.info(f"Señal {signum} recibida, drenando hijos...")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+
+    children = [_Child(i) for i in range(processes)]
+    for child in children:
+        child.start()
+    logging.info(f"Supervisor iniciado con {processes} proceso(s) worker")
+
+    last_report = time.monotonic()
+
+    while not stopping.wait(1):
+        for child in children:
+            if child.process.is_alive():
+                continue
+
+            uptime = time.monotonic() - child.started_at
+            logging.error(
+                f"Hijo {child.index} (pid={child.process.pid}) terminó con "
+                f"código {child.process.exitcode} tras {uptime:.0f}s; reiniciando"
+            )
+            child.retire()
+            child.restarts += 1
+            if uptime < MIN_CHILD_UPTIME:
+                stopping.wait(MIN_CHILD_UPTIME - uptime)
+                if stopping.is_set():
+                    break
+            child.start()
+
+        now = time.monotonic()
+        if now - last_report >= SUPERVISOR_STATS_INTERVAL:
+            _report(children, now - last_report)
+            last_report = now
+
+    # Drenado: SIGTERM a los hijos (terminan su lote) y espera acotada
+    for child in children:
+        if child.process.is_alive():
+            child.process.terminate()
+
+    deadline = time.monotonic() + SUPERVISOR_DRAIN_TIMEOUT
+    for child in children:
+        child.process.join(max(0.0, deadline - time.monotonic()))
+        if child.process.is_alive():
+            logging.error(f"Hijo {child.index} no terminó a tiempo, se mata")
+            child.process.kill()
+            child.process.join()
+
+    _report(children, time.monotonic() - last_report)
+    logging.info("Supervisor detenido")
+
+
+def _report(children, elapsed: float):
+    """Loguea mensajes/s de cada hijo desde el último reporte."""
+    total_rate = 0.0
+    for child in children:
+        processed, failed = child.totals()
+        rate = (processed - child.last_reported) / elapsed if elapsed > 0 else 0.0
+        child.last_reported = processed
+        total_rate += rate
+        logging.info(
+            f"Hijo {child.index} pid={child.process.pid}: {rate:.2f} msg/s, "
+            f"{processed} procesados, {failed} fallidos, {child.restarts} reinicio(s)"
+        )
+    logging.info(f"Throughput total: {total_rate:.2f} msg/s")
+
+
+if __name__ == "__main__":
+    run_supervisor()
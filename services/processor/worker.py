@@ -1,19 +1,46 @@
 import os
 import json
-import time
+import signal
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from decimal import Decimal
 
-import boto3
 from botocore.exceptions import ClientError
 
+from services.processor.adaptive import AdaptiveController
+from services.processor.dedup import CompletedCache
+from services.common.audit import AUDIT_KEY_ATTRS, AuditSink, build_audit_item
+from services.common.aws import add_pool_observer, client, install_pool_metrics, pool_stats, resource
+from services.common.dynamo_batch import (
+    CONNECTION_ERRORS,
+    batch_get_keys,
+    batch_write_items,
+    serialization_errors,
+)
+from services.processor.metrics import StageTimers, build_reporter
+from services.processor.profiling import MessageProfiler
+from services.processor.heartbeat import (
+    VisibilityHeartbeat,
+    is_throttling_error,
+    is_throttling_write_error,
+    is_transient_error,
+    is_transient_write_error,
+)
+from services.processor.payload import PayloadTooLarge, decode_payload, load_json_stream
 from services.processor.process_utils import process_lab_result
+from services.common.sqs_batch import delete_message_batch, send_message_batch
 
 def _convert_floats_to_decimal(obj):
     """
     Convierte todos los float de un dict/list anidado a Decimal,
     porque DynamoDB no acepta floats de Python nativos.
+
+    El worker ya no lo usa en el camino caliente: los payloads se
+    decodifican con Decimal directamente (payload.decode_payload). Se
+    mantiene para datos que vengan de otra fuente y como referencia en
+    benchmarks/bench_decode.py.
     """
     if isinstance(obj, dict):
         return {k: _convert_floats_to_decimal(v) for k, v in obj.items()}
@@ -38,65 +65,174 @@ RAW_BUCKET = os.environ["RAW_BUCKET"]
 LAB_RESULTS_TABLE = os.environ["LAB_RESULTS_TABLE"]
 ACCESS_AUDIT_TABLE: Optional[str] = os.environ.get("ACCESS_AUDIT_TABLE")
 
-sqs = boto3.client("sqs", region_name=REGION_NAME)
-s3 = boto3.client("s3", region_name=REGION_NAME)
-dynamo = boto3.resource("dynamodb", region_name=REGION_NAME)
+# Concurrencia del worker:
+#   WORKER_CONCURRENCY = hilos que procesan mensajes en paralelo
+#   WORKER_RECEIVERS   = long-polls (receive_message) en vuelo al mismo tiempo
+# Con ambos en 1 se conserva el loop secuencial original.
+WORKER_CONCURRENCY = max(1, int(os.environ.get("WORKER_CONCURRENCY", "1")))
+WORKER_RECEIVERS = max(1, int(os.environ.get("WORKER_RECEIVERS", "1")))
+
+# Motor de ejecución: "threads" (loop clásico / pool de hilos) o
+# "async" (ver services/processor/async_worker.py)
+WORKER_ENGINE = os.environ.get("WORKER_ENGINE", "threads")
+
+# Concurrencia adaptativa (solo motor "threads"): WORKER_CONCURRENCY pasa
+# a ser el máximo y el controlador la mueve entre el mínimo y ese valor
+# según la cola, la latencia y el throttling de DynamoDB.
+WORKER_ADAPTIVE = os.environ.get("WORKER_ADAPTIVE", "false").lower() == "true"
+WORKER_MIN_CONCURRENCY = max(1, int(os.environ.get("WORKER_MIN_CONCURRENCY", "1")))
+WORKER_TARGET_LATENCY = float(os.environ.get("WORKER_TARGET_LATENCY", "2.0"))
+
+# Visibilidad de los mensajes recibidos; con el heartbeat activo se va
+# extendiendo mientras el mensaje sigue en proceso.
+VISIBILITY_TIMEOUT = int(os.environ.get("WORKER_VISIBILITY_TIMEOUT", "60"))
+WORKER_HEARTBEAT = os.environ.get("WORKER_HEARTBEAT", "true").lower() == "true"
+# Backoff (s) al liberar mensajes que fallaron por throttling: se duplica
+# con cada recepción (ApproximateReceiveCount) hasta el tope
+WORKER_THROTTLE_BACKOFF = int(os.environ.get("WORKER_THROTTLE_BACKOFF", "10"))
+WORKER_THROTTLE_MAX_BACKOFF = int(os.environ.get("WORKER_THROTTLE_MAX_BACKOFF", "300"))
+
+# Tope de bytes por payload raw leído de S3 (acota la memoria por mensaje)
+WORKER_MAX_PAYLOAD_BYTES = int(os.environ.get("WORKER_MAX_PAYLOAD_BYTES", str(20 * 1024 * 1024)))
+
+# Idempotencia ante re-entregas: LRU de result_id ya guardados + chequeo
+# contra lab_results (BatchGetItem) de lo que no esté en el LRU.
+WORKER_DEDUP = os.environ.get("WORKER_DEDUP", "true").lower() == "true"
+WORKER_DEDUP_CACHE_SIZE = int(os.environ.get("WORKER_DEDUP_CACHE_SIZE", "10000"))
+
+# Tiempos por etapa (ver services/processor/metrics.py): reporters
+# "log", "http" y/o "emf" separados por coma, o "none".
+WORKER_METRICS_REPORTER = os.environ.get("WORKER_METRICS_REPORTER", "log")
+WORKER_METRICS_INTERVAL = float(os.environ.get("WORKER_METRICS_INTERVAL", "60"))
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "9102"))
+# Checkouts del pool de conexiones (pool_wait / pool_starved); envuelve
+# métodos privados de urllib3, ver services/common/aws.py
+WORKER_POOL_METRICS = os.environ.get("WORKER_POOL_METRICS", "true").lower() == "true"
+
+# Profiler por muestreo para los próximos N mensajes: al arrancar si
+# WORKER_PROFILE_MESSAGES > 0, o en caliente con SIGUSR1 (N = ese valor,
+# o 100 si no está definido).
+WORKER_PROFILE_MESSAGES = int(os.environ.get("WORKER_PROFILE_MESSAGES", "0"))
+WORKER_PROFILE_DIR = os.environ.get("WORKER_PROFILE_DIR", "/tmp/labsecure-profiles")
+
+# El pool por defecto de botocore es de 10 conexiones; con más hilos
+# abrirían conexiones nuevas en cada llamada en vez de reusarlas. Por cada
+# receiver contamos su long-poll más la escritura/ack de sus lotes en vuelo.
+_POOL_CONCURRENCY = WORKER_CONCURRENCY + 3 * WORKER_RECEIVERS
+
+sqs = client("sqs", _POOL_CONCURRENCY, region_name=REGION_NAME)
+s3 = client("s3", _POOL_CONCURRENCY, region_name=REGION_NAME)
+dynamo = resource("dynamodb", _POOL_CONCURRENCY, region_name=REGION_NAME)
 
 lab_results_table = dynamo.Table(LAB_RESULTS_TABLE)
-audit_table = dynamo.Table(ACCESS_AUDIT_TABLE) if ACCESS_AUDIT_TABLE else None
 
+timers = StageTimers()
 
-def put_audit_event(action: str, result_id: str, patient_id: str, details: str = ""):
-    """
-    Registra en la tabla de auditoría que el worker procesó algo.
-    Si no hay tabla configurada, no hace nada (escenario dev).
-    """
-    if not audit_table:
-        return
 
-    import uuid
-    from datetime import datetime, timezone
+def _observe_pool(seconds: float, starved: bool):
+    # pool_starved cuenta los checkouts con el pool agotado (ver services/common/aws.py)
+    timers.record("pool_wait", seconds)
+    if starved:
+        timers.record("pool_starved", seconds)
 
-    now = datetime.now(timezone.utc).isoformat()
-    audit_id = str(uuid.uuid4())
 
-    item = {
-        "audit_id": audit_id,
-        "timestamp": now,
-        "action": action,  # e.g. WORKER_PROCESSED, WORKER_FAILED
-        "actor_id": "processor_worker",
-        "patient_id": patient_id,
-        "result_id": result_id,
-        "details": details,
-        "source": "worker_ec2",
-    }
+add_pool_observer(_observe_pool)
+profiler = MessageProfiler(WORKER_PROFILE_DIR)
+
+# Auditoría: WORKER_PROCESSED se escribe en lote antes del item (ver
+# _write_results); el resto de eventos pasa por el buffer del sink.
+audit = AuditSink(
+    ACCESS_AUDIT_TABLE,
+    dynamo,
+    max_delay=2.0,
+    on_flush=lambda seconds: timers.record("audit", seconds),
+)
+
+# Se activa con SIGTERM/SIGINT: los loops terminan el lote en curso
+# (drenado) y salen en vez de pedir más mensajes.
+stop_event = threading.Event()
+
+# Contadores del proceso (los lee el supervisor para el throughput)
+stats = {"processed": 0, "failed": 0, "duplicates": 0}
+_stats_lock = threading.Lock()
+
+
+# Se crea en main_loop si WORKER_ADAPTIVE está activo
+controller: Optional[AdaptiveController] = None
+
+# Se crea en main_loop si WORKER_HEARTBEAT está activo
+heartbeat: Optional[VisibilityHeartbeat] = None
+
+# Resultado de _process_one cuando el fallo es transitorio: el mensaje
+# se libera para reintentarlo enseguida.
+RETRY = object()
+
+# Igual, pero por throttling: se libera con backoff (VisibilityHeartbeat.backoff_for)
+THROTTLED = object()
+
+# Resultado para mensajes cuyo result_id ya está en lab_results: se
+# borran de la cola sin volver a escribir ni notificar.
+DUPLICATE = object()
+
+# result_id que este proceso ya guardó en lab_results
+completed = CompletedCache(WORKER_DEDUP_CACHE_SIZE)
+
+
+def request_stop(*_args):
+    """Pide a los loops que terminen después del lote en curso."""
+    if not stop_event.is_set():
+        logging.info("Deteniendo worker: se termina el lote en curso...")
+    stop_event.set()
+
 
-    audit_table.put_item(Item=item)
+def _record_stats(processed: int, failed: int, duplicates: int = 0):
+    with _stats_lock:
+        stats["processed"] += processed
+        stats["failed"] += failed
+        stats["duplicates"] += duplicates
 
 
-def process_message(message: dict) -> None:
+def _worker_audit_item(action: str, result_id: str, patient_id: str, details: str = "") -> dict:
+    """Arma el registro de auditoría del worker (sin escribirlo)."""
+    return build_audit_item(
+        action,  # e.g. WORKER_PROCESSED, WORKER_FAILED
+        "processor_worker",
+        patient_id=patient_id,
+        result_id=result_id,
+        details=details,
+        source="worker_ec2",
+    )
+
+
+def put_audit_event(action: str, result_id: str, patient_id: str, details: str = ""):
     """
-    Procesa un mensaje de la cola lab_results_queue:
-      1. Lee el body (result_id, s3_key, patient_id).
-      2. Descarga JSON raw de S3.
-      3. Normaliza usando process_lab_result.
-      4. Guarda en DynamoDB lab_results.
-      5. Envía notificación a notify_queue.
+    Registra en la tabla de auditoría que el worker procesó algo
+    (vía buffer). Si no hay tabla configurada, no hace nada (escenario dev).
     """
-    body_str = message.get("Body", "{}")
-    body = json.loads(body_str)
-
-    result_id = body["result_id"]
-    s3_key = body["s3_key"]
-    patient_id = body["patient_id"]
+    audit.emit(
+        action,
+        "processor_worker",
+        patient_id=patient_id,
+        result_id=result_id,
+        details=details,
+        source="worker_ec2",
+    )
 
-    logging.info(f"Procesando mensaje result_id={result_id} patient_id={patient_id}")
 
-    # 1) Descargamos el JSON raw de S3
+def _load_raw_from_s3(s3_key: str, result_id: str, patient_id: str) -> dict:
+    """
+    Descarga el JSON raw guardado por el ingest y lo parsea en streaming
+    (números como Decimal, memoria acotada a WORKER_MAX_PAYLOAD_BYTES).
+    """
     try:
-        obj = s3.get_object(Bucket=RAW_BUCKET, Key=s3_key)
-        raw_str = obj["Body"].read().decode("utf-8")
-        raw_data = json.loads(raw_str)
+        with timers.stage("s3_get"):
+            obj = s3.get_object(Bucket=RAW_BUCKET, Key=s3_key)
+        with timers.stage("parse"):
+            return load_json_stream(
+                obj["Body"],
+                WORKER_MAX_PAYLOAD_BYTES,
+                content_length=obj.get("ContentLength"),
+            )
     except ClientError as e:
         logging.error(f"Error al leer de S3 {RAW_BUCKET}/{s3_key}: {e}")
         put_audit_event(
@@ -107,36 +243,63 @@ def process_message(message: dict) -> None:
         )
         # NO borramos el mensaje para que DLQ lo capture tras varios intentos
         raise
-
-    # 2) Normalizar usando process_lab_result (usa lógica del proyecto)
-    try:
-        item = process_lab_result(raw_data, result_id=result_id)
-    except Exception as e:
-        logging.error(f"Error en process_lab_result para {result_id}: {e}")
+    except PayloadTooLarge as e:
+        logging.error(f"Payload demasiado grande en S3 {RAW_BUCKET}/{s3_key}: {e}")
         put_audit_event(
             "WORKER_FAILED",
             result_id=result_id,
             patient_id=patient_id,
-            details=f"process_lab_result failed: {e}",
+            details=f"S3 payload rejected: {e}",
         )
         raise
 
-    # 3) Guardar en DynamoDB
-    try:
-        item = _convert_floats_to_decimal(item)
-        lab_results_table.put_item(Item=item)
 
-    except ClientError as e:
-        logging.error(f"Error al guardar en DynamoDB lab_results: {e}")
+def process_message(message: dict, body: Optional[dict] = None) -> dict:
+    """
+    Procesa un mensaje de la cola lab_results_queue:
+      1. Lee el body (result_id, s3_key, patient_id y opcionalmente
+         payload, si el ingest lo mandó inline).
+      2. Descarga JSON raw de S3 (solo si no vino inline).
+      3. Normaliza usando process_lab_result.
+
+    No escribe nada: devuelve las filas para DynamoDB (item y auditoría)
+    y el mensaje para notify_queue. process_batch las escribe en lote
+    y solo borra el mensaje de SQS cuando quedaron guardadas.
+
+    body: el Body ya decodificado (find_duplicates lo decodifica una vez
+    por lote); si no viene, se decodifica aquí.
+    """
+    if body is None:
+        # Decimal desde el parseo: el payload inline queda listo para DynamoDB
+        with timers.stage("parse"):
+            body = decode_payload(message.get("Body", "{}"))
+
+    result_id = body["result_id"]
+    s3_key = body["s3_key"]
+    patient_id = body["patient_id"]
+
+    logging.info(f"Procesando mensaje result_id={result_id} patient_id={patient_id}")
+
+    # 1) Payload inline (claim-check) o, si no vino, JSON raw de S3
+    raw_data = body.get("payload")
+    if raw_data is None:
+        raw_data = _load_raw_from_s3(s3_key, result_id, patient_id)
+
+    # 2) Normalizar usando process_lab_result (usa lógica del proyecto)
+    try:
+        with timers.stage("normalize"):
+            item = process_lab_result(raw_data, result_id=result_id)
+    except Exception as e:
+        logging.error(f"Error en process_lab_result para {result_id}: {e}")
         put_audit_event(
             "WORKER_FAILED",
             result_id=result_id,
             patient_id=patient_id,
-            details=f"DynamoDB put_item failed: {e}",
+            details=f"process_lab_result failed: {e}",
         )
         raise
 
-    # 4) Enviar mensaje a cola de notificación (para Lambda notify)
+    # 3) Mensaje para la cola de notificación (para Lambda notify)
     notify_msg = {
         "result_id": result_id,
         "patient_id": patient_id,
@@ -145,38 +308,413 @@ def process_message(message: dict) -> None:
         "test_date": item.get("test_date"),
     }
 
+    # 4) Auditoría de éxito (se escribe en lote antes del item)
+    audit_item = _worker_audit_item(
+        "WORKER_PROCESSED",
+        result_id=result_id,
+        patient_id=patient_id,
+        details="Resultado procesado y almacenado en lab_results",
+    )
+
+    return {"item": item, "audit": audit_item, "notify": notify_msg}
+
+
+def receive_messages() -> list:
+    """
+    Hace un long polling sobre lab_results_queue y devuelve la lista
+    de mensajes (vacía si no hubo nada o si falló la llamada).
+    """
+    # Pedido de SIGUSR1 (ver _arm_profiler)
+    profiler.arm_requested()
+
+    if controller:
+        controller.maybe_refresh()
+        params = controller.receive_params()
+    else:
+        params = {
+            "MaxNumberOfMessages": 10,
+            "WaitTimeSeconds": 20,   # long polling
+        }
+    # ApproximateReceiveCount: backoff al liberar mensajes throttleados
+    params["AttributeNames"] = [*params.get("AttributeNames", []), "ApproximateReceiveCount"]
+
     try:
-        sqs.send_message(
-            QueueUrl=NOTIFY_QUEUE_URL,
-            MessageBody=json.dumps(notify_msg),
+        with timers.stage("receive"):
+            resp = sqs.receive_message(
+                QueueUrl=LAB_RESULTS_QUEUE_URL,
+                VisibilityTimeout=VISIBILITY_TIMEOUT,
+                **params,
+            )
+    except (ClientError, *CONNECTION_ERRORS) as e:
+        logging.error(f"Error recibiendo mensajes de SQS: {e}")
+        stop_event.wait(5)
+        return []
+
+    messages = resp.get("Messages", [])
+    if controller and messages:
+        controller.record_received(messages)
+    return messages
+
+
+def _process_one(msg: dict, body: Optional[dict] = None):
+    """
+    Envuelve process_message: devuelve su resultado, None si falló
+    (el mensaje se queda en la cola hasta que venza su visibilidad),
+    THROTTLED si AWS pidió bajar el ritmo o RETRY si el fallo fue
+    transitorio (red / 5xx).
+    """
+    try:
+        if controller:
+            # El controlador limita cuántos mensajes van en paralelo y
+            # mide la latencia de cada uno.
+            with controller.slot():
+                return process_message(msg, body)
+        return process_message(msg, body)
+    except Exception as e:
+        logging.error(f"Error procesando mensaje, se mantendrá en la cola: {e}")
+        # NO borramos el mensaje → SQS + DLQ se encargan
+        if is_throttling_error(e):
+            return THROTTLED
+        return RETRY if is_transient_error(e) else None
+
+
+def _send_notifications(notify_msgs: dict) -> dict:
+    """
+    Encola las notificaciones del ciclo con SendMessageBatch. Devuelve
+    {MessageId: error} de las que no se pudieron encolar; esos mensajes
+    NO se borran de la cola, así la re-entrega vuelve a notificar.
+    """
+    with timers.stage("notify"):
+        failed = send_message_batch(
+            sqs,
+            NOTIFY_QUEUE_URL,
+            {key: json.dumps(m) for key, m in notify_msgs.items()},
         )
-    except ClientError as e:
-        logging.error(f"Error al enviar mensaje a NOTIFY_QUEUE: {e}")
+
+    for key, error in failed.items():
+        m = notify_msgs[key]
+        logging.error(f"Error al enviar mensaje a NOTIFY_QUEUE para result_id={m['result_id']}: {error}")
         put_audit_event(
             "WORKER_FAILED",
-            result_id=result_id,
-            patient_id=patient_id,
-            details=f"SQS send to notify failed: {e}",
+            result_id=m["result_id"],
+            patient_id=m["patient_id"],
+            details=f"SQS send to notify failed: {error}",
         )
-        # No es crítico para el status, pero lo dejamos registrado
-        # No hacemos raise aquí para no reintentar todo el mensaje.
-    else:
-        logging.info(
-            f"Notificación encolada correctamente para result_id={result_id}, queue={NOTIFY_QUEUE_URL}"
+
+    sent = len(notify_msgs) - len(failed)
+    if sent:
+        logging.info(f"{sent} notificación(es) encoladas correctamente, queue={NOTIFY_QUEUE_URL}")
+    return failed
+
+
+def _delete_messages(receipt_handles: dict):
+    """Borra de la cola los mensajes ya procesados con DeleteMessageBatch."""
+    with timers.stage("ack"):
+        failed = delete_message_batch(sqs, LAB_RESULTS_QUEUE_URL, receipt_handles)
+    for key, error in failed.items():
+        # El mensaje volverá a ser visible y se reprocesará (at-least-once)
+        logging.error(f"Error al borrar mensaje {key} de la cola: {error}")
+
+
+# Claves primarias de las tablas que escribe el worker
+_KEY_ATTRS = {LAB_RESULTS_TABLE: ("result_id", "patient_id")}
+if ACCESS_AUDIT_TABLE:
+    _KEY_ATTRS[ACCESS_AUDIT_TABLE] = AUDIT_KEY_ATTRS
+
+
+def _result_rows(outcomes: dict) -> tuple:
+    """Filas de DynamoDB de los mensajes procesados: (auditorías, items)."""
+    audits = []
+    if audit.enabled:
+        audits = [(key, ACCESS_AUDIT_TABLE, out["audit"]) for key, out in outcomes.items()]
+    items = [(key, LAB_RESULTS_TABLE, out["item"]) for key, out in outcomes.items()]
+    return audits, items
+
+
+def _log_write_failures(outcomes: dict, failed: dict):
+    for key, error in failed.items():
+        notify_msg = outcomes[key]["notify"]
+        logging.error(
+            f"Error al guardar en DynamoDB lab_results result_id={notify_msg['result_id']}: {error}"
+        )
+        put_audit_event(
+            "WORKER_FAILED",
+            result_id=notify_msg["result_id"],
+            patient_id=notify_msg["patient_id"],
+            details=f"DynamoDB batch write failed: {error}",
         )
 
-    # 5) Auditoría de éxito
-    put_audit_event(
-        "WORKER_PROCESSED",
-        result_id=result_id,
-        patient_id=patient_id,
-        details="Resultado procesado y almacenado en lab_results",
+
+def _reject_unserializable(outcomes: dict) -> dict:
+    """
+    Serializa las filas antes de notificar: un resultado que DynamoDB no
+    va a aceptar (NaN, float, ...) no se notifica. Devuelve {MessageId:
+    error} de esos mensajes, que NO se borran de la cola.
+    """
+    audits, items = _result_rows(outcomes)
+    with timers.stage("put"):
+        failed = serialization_errors(audits + items)
+    _log_write_failures(outcomes, failed)
+    return failed
+
+
+def _write_results(outcomes: dict) -> dict:
+    """
+    Escribe en lote (BatchWriteItem) las auditorías y después los items
+    de los mensajes ya notificados. Devuelve {MessageId: error} de los
+    que no quedaron guardados; esos NO se borran de la cola.
+
+    El item va último: si está en lab_results, el resultado ya se
+    notificó y quedó auditado, que es lo que find_duplicates da por
+    terminado. Sin tabla de auditoría es un solo BatchWriteItem.
+    """
+    audits, items = _result_rows(outcomes)
+    on_throttle = controller.record_throttle if controller else None
+
+    with timers.stage("put"):
+        failed = batch_write_items(dynamo, audits, _KEY_ATTRS, on_throttle=on_throttle, validate=False)
+        items = [row for row in items if row[0] not in failed]
+        failed.update(batch_write_items(dynamo, items, _KEY_ATTRS, on_throttle=on_throttle, validate=False))
+
+    _log_write_failures(outcomes, failed)
+    return failed
+
+
+def find_duplicates(messages: list) -> tuple:
+    """
+    Decodifica el Body de cada mensaje (una sola vez por lote) y detecta
+    re-entregas: result_id en el LRU de completados, repetido dentro del
+    mismo lote o ya en lab_results (un BatchGetItem para los que no
+    estaban en el LRU). El item se escribe después de notificar y
+    auditar (ver _write_results), así que si existe el resultado está
+    terminado.
+
+    Devuelve (bodies, duplicates): {MessageId: body} de los que se
+    pudieron decodificar y el set de MessageId duplicados. Si la lectura
+    de DynamoDB falla se procesa todo (comportamiento sin dedup).
+    """
+    bodies = {}
+    duplicates = set()
+    to_check = {}
+    seen = set()
+    for msg in messages:
+        try:
+            with timers.stage("parse"):
+                body = decode_payload(msg.get("Body", "{}"))
+            rid, pid = body["result_id"], body["patient_id"]
+        except Exception:
+            # process_message lo vuelve a intentar y registra el error
+            continue
+        bodies[msg["MessageId"]] = body
+        if not WORKER_DEDUP:
+            continue
+        if rid in seen or rid in completed:
+            duplicates.add(msg["MessageId"])
+        else:
+            to_check[msg["MessageId"]] = (rid, pid)
+        seen.add(rid)
+
+    if to_check:
+        keys = [{"result_id": rid, "patient_id": pid} for rid, pid in to_check.values()]
+        try:
+            with timers.stage("dedup"):
+                existing = batch_get_keys(dynamo, LAB_RESULTS_TABLE, keys, projection=("result_id", "patient_id"))
+        except (ClientError, *CONNECTION_ERRORS) as e:
+            logging.warning(f"No se pudo verificar duplicados en lab_results: {e}")
+            existing = []
+        done = {(item["result_id"], item["patient_id"]) for item in existing}
+        if done:
+            completed.add(rid for rid, _ in done)
+            duplicates.update(key for key, rid_pid in to_check.items() if rid_pid in done)
+
+    if duplicates:
+        logging.info(f"{len(duplicates)} mensaje(s) duplicado(s): ya estaban en lab_results, se confirman sin reprocesar")
+    return bodies, duplicates
+
+
+def begin_batch(messages: list):
+    """Registra los mensajes como en vuelo (el heartbeat los extiende)."""
+    if heartbeat:
+        heartbeat.track(messages)
+
+
+def end_batch(messages: list):
+    if heartbeat:
+        heartbeat.untrack(messages)
+
+
+def complete_batch(messages: list, results: list) -> int:
+    """
+    Segunda mitad de un lote: recibe los mensajes y lo que devolvió
+    _process_one para cada uno y
+      1. Descarta los que DynamoDB no aceptaría (_reject_unserializable).
+      2. Encola las notificaciones con un solo SendMessageBatch.
+      3. Escribe auditorías y luego items con BatchWriteItem.
+      4. Borra con DeleteMessageBatch solo los mensajes cuya notificación
+         salió y cuyas filas quedaron escritas, y los DUPLICATE. Si la
+         escritura falla, la re-entrega vuelve a notificar
+         (at-least-once).
+      5. Libera los que fallaron por algo transitorio: visibilidad 0 si
+         fue red / 5xx, con backoff si fue throttling.
+    Devuelve cuántos mensajes quedaron confirmados (procesados o duplicados).
+    """
+    by_id = {msg["MessageId"]: msg for msg in messages}
+    outcomes = {}
+    receipt_handles = {}
+    duplicates = {}
+    retry = []
+    throttled = []
+
+    def _release_later(key: str, error: str):
+        if is_throttling_write_error(error):
+            throttled.append(by_id[key])
+        elif is_transient_write_error(error):
+            retry.append(by_id[key])
+
+    for msg, out in zip(messages, results):
+        if out is RETRY:
+            retry.append(msg)
+        if out is THROTTLED:
+            throttled.append(msg)
+        if out is DUPLICATE:
+            duplicates[msg["MessageId"]] = msg["ReceiptHandle"]
+        if out is None or out is RETRY or out is THROTTLED or out is DUPLICATE:
+            continue
+        outcomes[msg["MessageId"]] = out
+        receipt_handles[msg["MessageId"]] = msg["ReceiptHandle"]
+
+    def _drop(failed: dict, release: bool = True):
+        for key, error in failed.items():
+            del outcomes[key]
+            del receipt_handles[key]
+            if release:
+                _release_later(key, error)
+
+    if outcomes:
+        # No es transitorio: se queda en la cola hasta la DLQ
+        _drop(_reject_unserializable(outcomes), release=False)
+    if outcomes:
+        _drop(_send_notifications({key: out["notify"] for key, out in outcomes.items()}))
+    if outcomes:
+        _drop(_write_results(outcomes))
+        completed.add(out["notify"]["result_id"] for out in outcomes.values())
+
+    # Los duplicados se confirman junto con los procesados
+    receipt_handles.update(duplicates)
+    if receipt_handles:
+        _delete_messages(receipt_handles)
+
+    if heartbeat:
+        heartbeat.release(retry, throttled)
+
+    _record_stats(
+        len(receipt_handles) - len(duplicates),
+        len(messages) - len(receipt_handles),
+        len(duplicates),
     )
+    profiler.message_done(len(messages))
+    return len(receipt_handles)
+
 
-    logging.info(f"Procesamiento completado para result_id={result_id}")
+def process_batch(messages: list, executor: Optional[ThreadPoolExecutor] = None) -> int:
+    """
+    Procesa un lote recibido en un ciclo de polling: descarta las
+    re-entregas (find_duplicates), process_message para el resto (en
+    paralelo si hay executor) y luego complete_batch. Devuelve cuántos
+    mensajes quedaron confirmados.
+    """
+    begin_batch(messages)
+    try:
+        bodies, duplicates = find_duplicates(messages)
+        fresh = [msg for msg in messages if msg["MessageId"] not in duplicates]
+        fresh_bodies = [bodies.get(msg["MessageId"]) for msg in fresh]
+        if executor is not None:
+            processed = iter(list(executor.map(_process_one, fresh, fresh_bodies)))
+        else:
+            processed = iter([_process_one(msg, body) for msg, body in zip(fresh, fresh_bodies)])
+
+        results = [DUPLICATE if msg["MessageId"] in duplicates else next(processed) for msg in messages]
+        return complete_batch(messages, results)
+    finally:
+        end_batch(messages)
+
+
+def _run_sequential():
+    while not stop_event.is_set():
+        try:
+            messages = receive_messages()
+
+            if not messages:
+                logging.info("No hay mensajes en la cola, esperando...")
+                continue
+
+            process_batch(messages)
+        except Exception as e:
+            # Red de seguridad: en EC2 nadie reinicia el proceso si el loop
+            # se cae. Los mensajes del lote vuelven a la cola al vencer su
+            # visibilidad.
+            logging.error(f"Error inesperado en el loop del worker, se continúa: {e}")
+            stop_event.wait(5)
+            continue
+
+        # pequeña pausa entre lotes (ninguna si el controlador ve backlog)
+        stop_event.wait(controller.pause_after_batch() if controller else 1)
+
+
+def _receiver_loop(executor: ThreadPoolExecutor):
+    """
+    Cada receiver mantiene su propio long polling y reparte el lote
+    recibido entre los hilos del pool. Mientras un lote se procesa,
+    los demás receivers siguen trayendo mensajes.
+    """
+    while not stop_event.is_set():
+        try:
+            messages = receive_messages()
+
+            if not messages:
+                logging.info("No hay mensajes en la cola, esperando...")
+                continue
+
+            # process_batch bloquea hasta que termina el lote, así cada
+            # receiver tiene como máximo 10 mensajes en vuelo.
+            process_batch(messages, executor)
+        except Exception as e:
+            # Igual que en _run_sequential: que un lote roto no mate el hilo
+            logging.error(f"Error inesperado en {threading.current_thread().name}, se continúa: {e}")
+            stop_event.wait(5)
+
+
+def _run_concurrent():
+    with ThreadPoolExecutor(
+        max_workers=WORKER_CONCURRENCY, thread_name_prefix="processor"
+    ) as executor:
+        receivers = [
+            threading.Thread(
+                target=_receiver_loop,
+                args=(executor,),
+                name=f"receiver-{i}",
+                daemon=True,
+            )
+            for i in range(WORKER_RECEIVERS)
+        ]
+        for t in receivers:
+            t.start()
+        for t in receivers:
+            t.join()
+
+
+def _arm_profiler(*_args):
+    """
+    Handler de SIGUSR1: pide perfilar los próximos mensajes. No arma acá:
+    en el motor secuencial el hilo principal puede estar dentro de
+    profiler.message_done() con el lock tomado; receive_messages lo arma.
+    """
+    profiler.request_arm(WORKER_PROFILE_MESSAGES or 100)
 
 
 def main_loop():
+    global controller, heartbeat
+
     logging.info("Iniciando worker LabSecure (cola de resultados)...")
     logging.info(f"REGION_NAME={REGION_NAME}")
     logging.info(f"LAB_RESULTS_QUEUE_URL={LAB_RESULTS_QUEUE_URL}")
@@ -184,47 +722,71 @@ def main_loop():
     logging.info(f"RAW_BUCKET={RAW_BUCKET}")
     logging.info(f"LAB_RESULTS_TABLE={LAB_RESULTS_TABLE}")
     logging.info(f"ACCESS_AUDIT_TABLE={ACCESS_AUDIT_TABLE}")
+    logging.info(f"WORKER_CONCURRENCY={WORKER_CONCURRENCY}")
+    logging.info(f"WORKER_RECEIVERS={WORKER_RECEIVERS}")
+    logging.info(f"WORKER_ENGINE={WORKER_ENGINE}")
+    logging.info(f"WORKER_ADAPTIVE={WORKER_ADAPTIVE}")
+    logging.info(f"VISIBILITY_TIMEOUT={VISIBILITY_TIMEOUT} (heartbeat={WORKER_HEARTBEAT})")
+    logging.info(f"WORKER_METRICS_REPORTER={WORKER_METRICS_REPORTER} (cada {WORKER_METRICS_INTERVAL:.0f}s)")
+
+    # Solo se pueden instalar handlers desde el hilo principal
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, _arm_profiler)
+
+    if WORKER_PROFILE_MESSAGES > 0:
+        profiler.arm(WORKER_PROFILE_MESSAGES)
+
+    if WORKER_POOL_METRICS:
+        install_pool_metrics()
+
+    reporter = build_reporter(timers, WORKER_METRICS_REPORTER, WORKER_METRICS_INTERVAL, WORKER_METRICS_PORT)
+    if reporter:
+        reporter.start()
+
+    if WORKER_ADAPTIVE and WORKER_ENGINE != "async":
+        controller = AdaptiveController(
+            sqs,
+            LAB_RESULTS_QUEUE_URL,
+            min_concurrency=WORKER_MIN_CONCURRENCY,
+            max_concurrency=WORKER_CONCURRENCY,
+            target_latency=WORKER_TARGET_LATENCY,
+        )
 
-    while True:
-        try:
-            resp = sqs.receive_message(
-                QueueUrl=LAB_RESULTS_QUEUE_URL,
-                MaxNumberOfMessages=10,
-                WaitTimeSeconds=20,   # long polling
-                VisibilityTimeout=60,
-            )
-        except ClientError as e:
-            logging.error(f"Error recibiendo mensajes de SQS: {e}")
-            time.sleep(5)
-            continue
-
-        messages = resp.get("Messages", [])
-
-        if not messages:
-            logging.info("No hay mensajes en la cola, esperando...")
-            continue
-
-        for msg in messages:
-            receipt_handle = msg["ReceiptHandle"]
+    if WORKER_HEARTBEAT:
+        heartbeat = VisibilityHeartbeat(
+            sqs,
+            LAB_RESULTS_QUEUE_URL,
+            VISIBILITY_TIMEOUT,
+            throttle_backoff=WORKER_THROTTLE_BACKOFF,
+            max_backoff=WORKER_THROTTLE_MAX_BACKOFF,
+        )
+        heartbeat.start()
 
-            try:
-                process_message(msg)
-            except Exception as e:
-                logging.error(f"Error procesando mensaje, se mantendrá en la cola: {e}")
-                # NO borramos el mensaje → SQS + DLQ se encargan
-                continue
+    if WORKER_ENGINE == "async":
+        # Import diferido: async_worker importa este módulo
+        from services.processor.async_worker import run_async
 
-            # Si todo fue bien, borramos el mensaje
-            try:
-                sqs.delete_message(
-                    QueueUrl=LAB_RESULTS_QUEUE_URL,
-                    ReceiptHandle=receipt_handle,
-                )
-            except ClientError as e:
-                logging.error(f"Error al borrar mensaje de la cola: {e}")
-
-        # pequeña pausa entre lotes
-        time.sleep(1)
+        run_async()
+    elif WORKER_CONCURRENCY == 1 and WORKER_RECEIVERS == 1:
+        _run_sequential()
+    else:
+        _run_concurrent()
+
+    if heartbeat:
+        heartbeat.stop()
+    audit.flush()
+    if reporter:
+        reporter.stop()
+
+    pool = pool_stats.snapshot()
+    logging.info(
+        f"Worker detenido: {stats['processed']} procesados, {stats['failed']} fallidos; "
+        f"pool: {pool['checkouts']} checkouts, {pool['starved']} sin conexión libre, "
+        f"{pool['discarded']} descartadas"
+    )
 
 
 if __name__ == "__main__":
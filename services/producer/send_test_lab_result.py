@@ -1,17 +1,22 @@
 import os
+import sys
 import json
 import uuid
 from datetime import datetime, timezone
 
-import boto3
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.aws import client  # noqa: E402
 
 # Configuración desde variables de entorno
 REGION_NAME = os.environ.get("REGION_NAME", "us-east-1")
 RAW_BUCKET = os.environ["RAW_BUCKET"]
 LAB_RESULTS_QUEUE_URL = os.environ["LAB_RESULTS_QUEUE_URL"]
 
-s3 = boto3.client("s3", region_name=REGION_NAME)
-sqs = boto3.client("sqs", region_name=REGION_NAME)
+s3 = client("s3", region_name=REGION_NAME)
+sqs = client("sqs", region_name=REGION_NAME)
 
 
 def main():
@@ -76,10 +81,11 @@ def main():
     )
     print("✅ Archivo subido a S3.")
 
-    # Mensaje que el worker espera
+    # Mensaje que el worker espera (process_message necesita patient_id)
     message_body = {
         "result_id": result_id,
         "s3_key": s3_key,
+        "patient_id": patient_id,
     }
 
     print("\n=== ENVIANDO MENSAJE A SQS (LAB_RESULTS_QUEUE) ===")
@@ -36,6 +36,56 @@ resource "aws_api_gateway_integration" "ingest_post" {
   uri                     = aws_lambda_function.ingest.invoke_arn
 }
 
+resource "aws_api_gateway_resource" "ingest_batch" {
+  rest_api_id = aws_api_gateway_rest_api.lab_api.id
+  parent_id   = aws_api_gateway_resource.ingest.id
+  path_part   = "batch"
+}
+
+resource "aws_api_gateway_method" "ingest_batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.lab_api.id
+  resource_id   = aws_api_gateway_resource.ingest_batch.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "ingest_batch_post" {
+  rest_api_id             = aws_api_gateway_rest_api.lab_api.id
+  resource_id             = aws_api_gateway_resource.ingest_batch.id
+  http_method             = aws_api_gateway_method.ingest_batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.ingest.invoke_arn
+}
+
+resource "aws_api_gateway_resource" "status" {
+  rest_api_id = aws_api_gateway_rest_api.lab_api.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "status"
+}
+
+resource "aws_api_gateway_resource" "status_batch" {
+  rest_api_id = aws_api_gateway_rest_api.lab_api.id
+  parent_id   = aws_api_gateway_resource.status.id
+  path_part   = "batch"
+}
+
+resource "aws_api_gateway_method" "status_batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.lab_api.id
+  resource_id   = aws_api_gateway_resource.status_batch.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "status_batch_post" {
+  rest_api_id             = aws_api_gateway_rest_api.lab_api.id
+  resource_id             = aws_api_gateway_resource.status_batch.id
+  http_method             = aws_api_gateway_method.status_batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.ingest.invoke_arn
+}
+
 resource "aws_lambda_permission" "apigw_invoke_ingest" {
   statement_id  = "AllowAPIGatewayInvokeIngest"
   action        = "lambda:InvokeFunction"
@@ -49,7 +99,11 @@ resource "aws_api_gateway_deployment" "lab_api_deploy" {
 
   depends_on = [
     aws_api_gateway_method.ingest_post,
-    aws_api_gateway_integration.ingest_post
+    aws_api_gateway_integration.ingest_post,
+    aws_api_gateway_method.ingest_batch_post,
+    aws_api_gateway_integration.ingest_batch_post,
+    aws_api_gateway_method.status_batch_post,
+    aws_api_gateway_integration.status_batch_post
   ]
 
   lifecycle {
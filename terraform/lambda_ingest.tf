@@ -61,7 +61,8 @@ resource "aws_iam_role_policy" "lambda_ingest_policy" {
       {
         Effect = "Allow"
         Action = [
-          "dynamodb:PutItem"
+          "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem"
         ]
         Resource = [
           aws_dynamodb_table.access_audit.arn
@@ -87,9 +88,12 @@ resource "aws_lambda_function" "ingest" {
   role          = aws_iam_role.lambda_ingest_role.arn
   runtime       = "python3.11"
   handler       = "app.lambda_handler"
+  # Los lotes de /ingest/batch (hasta 500 resultados) no caben en los 3 s por defecto
+  timeout     = 30
+  memory_size = 512
 
-  filename         = "${path.module}/../lambda/ingest.zip"
-  source_code_hash = filebase64sha256("${path.module}/../lambda/ingest.zip")
+  filename         = data.archive_file.lambda["ingest"].output_path
+  source_code_hash = data.archive_file.lambda["ingest"].output_base64sha256
 
   environment {
     variables = {
@@ -97,6 +101,17 @@ resource "aws_lambda_function" "ingest" {
       LAB_RESULTS_QUEUE_URL = aws_sqs_queue.lab_results_queue.id
       LAB_RESULTS_TABLE     = aws_dynamodb_table.lab_results.name
       ACCESS_AUDIT_TABLE    = aws_dynamodb_table.access_audit.name
+      # Payloads de hasta 64 KiB viajan inline en el mensaje SQS
+      INLINE_PAYLOAD_MAX_BYTES = "65536"
+      # POST /api/v1/ingest/batch
+      INGEST_BATCH_MAX_ENTRIES = "500"
+      INGEST_BATCH_CONCURRENCY = "16"
+      # GET /api/v1/status: caché de PROCESSED y ventana de auditoría
+      STATUS_CACHE_TTL    = "300"
+      STATUS_AUDIT_WINDOW = "60"
+      # POST /api/v1/status/batch
+      STATUS_BATCH_MAX_IDS     = "500"
+      STATUS_BATCH_CONCURRENCY = "16"
     }
   }
 }
@@ -42,6 +42,7 @@ resource "aws_iam_role_policy" "lambda_data_lifecycle_policy" {
           "dynamodb:Scan",
           "dynamodb:UpdateItem",
           "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:GetItem"
         ]
         Resource = [
@@ -71,11 +72,10 @@ resource "aws_lambda_function" "data_lifecycle" {
   function_name = "${var.project_name}-data-lifecycle"
   description   = "Lambda para manejo de ciclo de vida de datos (HIPAA/GDPR) - Scenario F"
 
-  # IMPORTANTE: este zip lo generas tú con:
-  #   cd lambda/data_lifecycle
-  #   zip data_lifecycle.zip app.py
-  filename         = "${path.module}/../lambda/data_lifecycle/data_lifecycle.zip"
-  source_code_hash = filebase64sha256("${path.module}/../lambda/data_lifecycle.zip")
+  # Zip armado en lambda_packages.tf: app.py + services/common (lo importa
+  # app.py; un zip con solo app.py falla con "No module named 'services'")
+  filename         = data.archive_file.lambda["data_lifecycle"].output_path
+  source_code_hash = data.archive_file.lambda["data_lifecycle"].output_base64sha256
 
   handler = "app.lambda_handler"
   runtime = "python3.12"
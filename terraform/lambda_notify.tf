@@ -31,7 +31,8 @@ resource "aws_iam_role_policy" "lambda_notify_policy" {
         Effect = "Allow",
         Action = [
           "dynamodb:GetItem",
-          "dynamodb:PutItem"
+          "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem"
         ],
         Resource = [
           aws_dynamodb_table.patients.arn,
@@ -69,8 +70,8 @@ resource "aws_lambda_function" "notify" {
   runtime       = "python3.11"
   handler       = "app.lambda_handler"
 
-  filename         = "${path.module}/../lambda/notify.zip"
-  source_code_hash = filebase64sha256("${path.module}/../lambda/notify.zip")
+  filename         = data.archive_file.lambda["notify"].output_path
+  source_code_hash = data.archive_file.lambda["notify"].output_base64sha256
 
   environment {
     variables = {
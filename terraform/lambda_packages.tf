@@ -0,0 +1,40 @@
+########################################
+# Paquetes (zip) de las Lambdas
+########################################
+
+# Cada Lambda importa services.common (aws, audit, models, ...), así que su
+# zip lleva app.py en la raíz y, al lado, el paquete services/common tal
+# como está en el repo. terraform plan/apply arma los zips en
+# terraform/build/ y source_code_hash cambia con cualquier archivo incluido,
+# no solo con app.py. boto3 / botocore / urllib3 los trae el runtime.
+
+locals {
+  lambda_packages = ["ingest", "notify", "report", "data_lifecycle"]
+
+  # archive_file no acepta contenido vacío: los __init__.py vacíos se
+  # omiten y services / services.common quedan como namespace packages
+  lambda_common_files = [
+    for f in concat(["__init__.py"], tolist(fileset("${path.module}/../services", "common/*.py"))) :
+    f if length(file("${path.module}/../services/${f}")) > 0
+  ]
+}
+
+data "archive_file" "lambda" {
+  for_each = toset(local.lambda_packages)
+
+  type        = "zip"
+  output_path = "${path.module}/build/${each.key}.zip"
+
+  source {
+    content  = file("${path.module}/../lambda/${each.key}/app.py")
+    filename = "app.py"
+  }
+
+  dynamic "source" {
+    for_each = local.lambda_common_files
+    content {
+      content  = file("${path.module}/../services/${source.value}")
+      filename = "services/${source.value}"
+    }
+  }
+}
@@ -52,9 +52,9 @@ resource "aws_lambda_function" "report" {
   runtime       = "python3.11"
   handler       = "app.lambda_handler"
 
-  # IMPORTANTE → RUTA ARREGLADA
-  filename         = "${path.module}/../lambda/report.zip"
-  source_code_hash = filebase64sha256("${path.module}/../lambda/report.zip")
+  # Zip armado en lambda_packages.tf (app.py + services/common)
+  filename         = data.archive_file.lambda["report"].output_path
+  source_code_hash = data.archive_file.lambda["report"].output_base64sha256
 
   environment {
     variables = {
@@ -0,0 +1,73 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.processor.adaptive import AdaptiveController
+
+
+class FakeSQS:
+    def __init__(self, backlog):
+        self.backlog = backlog
+
+    def get_queue_attributes(self, QueueUrl, AttributeNames):
+        return {"Attributes": {"ApproximateNumberOfMessages": str(self.backlog)}}
+
+
+def _controller(backlog, **kwargs):
+    c = AdaptiveController(
+        FakeSQS(backlog), "q", min_concurrency=2, max_concurrency=32, refresh_interval=0, **kwargs
+    )
+    return c
+
+
+def test_scales_up_with_backlog_and_down_when_idle():
+    c = _controller(backlog=5000)
+
+    for _ in range(20):
+        c.maybe_refresh()
+    assert c.limiter.limit == 32
+    assert c.receive_params()["WaitTimeSeconds"] == 1
+    assert c.pause_after_batch() == 0.0
+
+    c.sqs.backlog = 0
+    c.maybe_refresh()
+    assert c.limiter.limit == 2
+    assert c.receive_params()["WaitTimeSeconds"] == 20
+
+
+def test_backlog_grows_concurrency_by_half_per_refresh():
+    c = _controller(backlog=5000)
+
+    limits = []
+    for _ in range(5):
+        c.maybe_refresh()
+        limits.append(c.limiter.limit)
+
+    # Multiplicativo (x1.5, al menos +1) hasta el máximo
+    assert limits == [3, 4, 6, 9, 13]
+
+
+def test_throttling_halves_concurrency():
+    c = _controller(backlog=5000)
+    for _ in range(20):
+        c.maybe_refresh()
+
+    c.record_throttle()
+    c.maybe_refresh()
+
+    assert c.limiter.limit == 16
+
+
+def test_high_latency_holds_back_growth():
+    c = _controller(backlog=5000, target_latency=0.5)
+    c.maybe_refresh()
+    limit = c.limiter.limit
+
+    c.record_latency(5.0)
+    c.maybe_refresh()
+
+    assert c.limiter.limit == limit - 1
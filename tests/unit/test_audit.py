@@ -0,0 +1,154 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.audit import AuditSink, flush_after
+
+
+class FakeTable:
+    def __init__(self, dynamo):
+        self.dynamo = dynamo
+
+    def put_item(self, Item):
+        if self.dynamo.fail_put:
+            raise RuntimeError("dynamo down")
+        self.dynamo.put_calls += 1
+        self.dynamo.rows.append(Item)
+
+
+class FakeDynamo:
+    def __init__(self):
+        self.rows = []
+        self.put_calls = 0
+        self.batch_calls = 0
+        self.fail_put = False
+
+    def Table(self, name):
+        return FakeTable(self)
+
+    def batch_write_item(self, RequestItems):
+        self.batch_calls += 1
+        for reqs in RequestItems.values():
+            self.rows.extend(r["PutRequest"]["Item"] for r in reqs)
+        return {"UnprocessedItems": {}}
+
+
+def test_buffered_events_are_written_in_batches_of_25():
+    dynamo = FakeDynamo()
+    sink = AuditSink("access_audit", dynamo)
+
+    for i in range(30):
+        sink.emit("RESULT_STATUS_READ", "external_lab", result_id=f"R{i}", patient_id=None)
+
+    # 25 se escriben al llenarse el buffer; el resto queda pendiente
+    assert dynamo.batch_calls == 1
+    assert len(dynamo.rows) == 25
+
+    assert sink.flush() == 5
+    assert len(dynamo.rows) == 30
+    assert "patient_id" not in dynamo.rows[0]
+    assert dynamo.put_calls == 0
+
+
+def test_strict_events_are_written_immediately():
+    dynamo = FakeDynamo()
+    sink = AuditSink("access_audit", dynamo)
+
+    item = sink.emit("INGEST_CREATE", "external_lab:LAB001", strict=True, result_id="R1")
+
+    assert dynamo.put_calls == 1
+    assert dynamo.rows == [item]
+    assert item["audit_id"] and item["timestamp"]
+
+
+def test_flush_after_flushes_at_end_of_invocation():
+    dynamo = FakeDynamo()
+    sink = AuditSink("access_audit", dynamo)
+
+    @flush_after(sink)
+    def handler(event, context):
+        sink.emit("NOTIFICATION_SENT", "system_notify")
+        return "ok"
+
+    assert handler({}, None) == "ok"
+    assert len(dynamo.rows) == 1
+
+
+def test_disabled_sink_is_a_no_op():
+    sink = AuditSink(None)
+
+    assert sink.emit("PORTAL_LOGIN", "portal_user:P1", strict=True) is None
+    assert sink.flush() == 0
+
+
+def test_long_lived_sink_flushes_at_exit(monkeypatch):
+    registered = []
+    monkeypatch.setattr("services.common.audit.atexit.register", registered.append)
+    dynamo = FakeDynamo()
+
+    sink = AuditSink("access_audit", dynamo, max_delay=3600)
+    sink.emit("PORTAL_LOGIN", "patient:P1")
+    assert dynamo.rows == []
+
+    for callback in registered:
+        callback()
+    assert [r["action"] for r in dynamo.rows] == ["PORTAL_LOGIN"]
+
+
+class FakeLabResults:
+    def __init__(self, items):
+        self.items = items
+        self.updated = []
+
+    def scan(self, **kwargs):
+        return {"Items": self.items}
+
+    def update_item(self, Key, **kwargs):
+        self.updated.append(Key["result_id"])
+
+
+def _lifecycle(monkeypatch):
+    monkeypatch.setenv("LAB_RESULTS_TABLE", "lab_results")
+    monkeypatch.setenv("ACCESS_AUDIT_TABLE", "access_audit")
+    spec = importlib.util.spec_from_file_location(
+        "lifecycle_app", os.path.join(PROJECT_ROOT, "lambda", "data_lifecycle", "app.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    dynamo = FakeDynamo()
+    table = FakeLabResults(
+        [
+            {"result_id": "R1", "patient_id": "P1", "jurisdiction": "EU"},
+            {"result_id": "R2", "patient_id": "P2", "jurisdiction": "US"},
+        ]
+    )
+    monkeypatch.setattr(module, "audit", AuditSink("access_audit", dynamo))
+    monkeypatch.setattr(module, "lab_results_table", table)
+    return module, dynamo, table
+
+
+def test_lifecycle_delete_audits_are_strict(monkeypatch):
+    lifecycle, dynamo, _ = _lifecycle(monkeypatch)
+
+    lifecycle.lambda_handler({}, None)
+
+    assert dynamo.put_calls == 2 and dynamo.batch_calls == 0
+    assert [r["action"] for r in dynamo.rows] == ["DATA_GDPR_DELETE", "DATA_HIPAA_DELETE"]
+
+
+def test_lifecycle_stops_when_the_delete_audit_fails(monkeypatch):
+    lifecycle, dynamo, table = _lifecycle(monkeypatch)
+    dynamo.fail_put = True
+
+    with pytest.raises(RuntimeError):
+        lifecycle.lambda_handler({}, None)
+
+    # No sigue con el resto de los items sin registro
+    assert table.updated == ["R1"]
@@ -0,0 +1,146 @@
+import importlib.util
+import os
+import sys
+import threading
+
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.common.aws import Lazy, lazy_table
+
+
+class FakeResource:
+    def __init__(self):
+        self.tables = []
+
+    def Table(self, name):
+        self.tables.append(name)
+        return f"table:{name}"
+
+
+def test_lazy_builds_once_on_first_attribute_access():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return FakeResource()
+
+    lazy = Lazy(factory)
+    assert not lazy.resolved and calls == []
+
+    assert lazy.Table("a") == "table:a"
+    assert lazy.Table("b") == "table:b"
+    assert lazy.resolved and len(calls) == 1
+
+
+def test_lazy_is_built_once_under_concurrent_first_use():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return FakeResource()
+
+    lazy = Lazy(factory)
+
+    def use():
+        barrier.wait()
+        lazy.Table("x")
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_lazy_table_does_not_build_the_resource_until_used():
+    resource = Lazy(FakeResource)
+    table = lazy_table(resource, "lab_results")
+    assert not resource.resolved
+
+    assert table.upper() == "TABLE:LAB_RESULTS"
+    assert resource.resolved and resource.tables == ["lab_results"]
+
+
+def test_lambdas_do_not_build_clients_at_import(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    for var in ("LAB_RESULTS_TABLE", "PATIENTS_TABLE", "REPORT_BUCKET", "ACCESS_AUDIT_TABLE", "NOTIFY_TOPIC_ARN"):
+        monkeypatch.setenv(var, "test")
+
+    for name in ("report", "notify", "data_lifecycle"):
+        spec = importlib.util.spec_from_file_location(
+            f"lazy_{name}_app", os.path.join(PROJECT_ROOT, "lambda", name, "app.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        lazies = [v for v in vars(module).values() if isinstance(v, Lazy)]
+        assert lazies, name
+        assert not any(v.resolved for v in lazies), name
+
+
+def test_client_config_sizes_pool_and_enables_adaptive_retries():
+    from services.common.aws import client_config
+
+    small = client_config()
+    assert small.max_pool_connections == 10
+    assert small.retries["mode"] == "adaptive"
+    assert small.tcp_keepalive is True
+
+    assert client_config(concurrency=40).max_pool_connections == 40
+    assert client_config(concurrency=4, connect_timeout=2).connect_timeout == 2
+
+
+def test_clients_share_one_session_per_process(monkeypatch):
+    from services.common import aws
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    a = aws.client("sqs")
+    b = aws.client("s3", concurrency=32)
+    assert aws.get_session() is aws.get_session()
+    assert b.meta.config.max_pool_connections == 32
+    assert a.meta.config.retries["mode"] == "adaptive"
+
+
+def test_clients_do_not_patch_urllib3(monkeypatch):
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    from services.common import aws
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setattr(aws, "_pool_patched", False)
+    get_conn = HTTPConnectionPool._get_conn
+    monkeypatch.setattr(HTTPConnectionPool, "_get_conn", get_conn)
+
+    aws.client("sqs")
+    aws.resource("dynamodb")
+    assert HTTPConnectionPool._get_conn is get_conn
+
+
+def test_pool_metrics_count_starved_checkouts_and_discards():
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    from services.common import aws
+
+    assert aws.install_pool_metrics()
+    seen = []
+    aws.add_pool_observer(lambda seconds, starved: seen.append(starved))
+    before = aws.pool_stats.snapshot()
+
+    # Pool de 1: el segundo checkout lo encuentra vacío y el segundo
+    # _put_conn lo encuentra lleno (sin abrir sockets: las conexiones de
+    # urllib3 conectan recién al primer request)
+    pool = HTTPConnectionPool("example.invalid", maxsize=1)
+    first = pool._get_conn()
+    second = pool._get_conn()
+    pool._put_conn(first)
+    pool._put_conn(second)
+
+    after = aws.pool_stats.snapshot()
+    assert after["checkouts"] - before["checkouts"] == 2
+    assert after["starved"] - before["starved"] == 1
+    assert after["discarded"] - before["discarded"] == 1
+    assert seen[-2:] == [False, True]
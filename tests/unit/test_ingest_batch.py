@@ -0,0 +1,309 @@
+import importlib.util
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# app.py lee la configuración del entorno al importarse
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("RAW_BUCKET", "raw-bucket")
+os.environ.setdefault("LAB_RESULTS_QUEUE_URL", "https://sqs.local/lab-results")
+
+from services.common.audit import AuditSink  # noqa: E402
+
+# El directorio `lambda` no es un paquete importable
+_spec = importlib.util.spec_from_file_location(
+    "ingest_app", os.path.join(PROJECT_ROOT, "lambda", "ingest", "app.py")
+)
+ingest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ingest)
+
+
+def _result(patient_id="P001", **overrides):
+    body = {
+        "patient_id": patient_id,
+        "lab_id": "LAB001",
+        "lab_name": "Lab Central",
+        "test_type": "blood",
+        "test_date": "2024-01-15",
+        "results": [{"test_code": "GLU", "value": 95}],
+    }
+    body.update(overrides)
+    return body
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.fail_patient = None
+        self.fail_times = None   # None = siempre que coincida fail_patient
+        self.puts = 0
+        self.before_put = None
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.puts += 1
+        if self.before_put:
+            self.before_put()
+        if self.fail_patient and json.loads(Body)["patient_id"] == self.fail_patient:
+            if self.fail_times is None or self.fail_times > 0:
+                if self.fail_times:
+                    self.fail_times -= 1
+                raise RuntimeError("s3 down")
+        self.objects[Key] = Body
+
+
+class FakeSQS:
+    def __init__(self):
+        self.batches = []
+        self.sent = []
+        self.sending = threading.Event()
+
+    def send_message(self, QueueUrl, MessageBody):
+        self.sending.set()
+        self.sent.append(json.loads(MessageBody))
+        return {"MessageId": "m1"}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([json.loads(e["MessageBody"]) for e in Entries])
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+
+class FakeTable:
+    def __init__(self, dynamo):
+        self.dynamo = dynamo
+
+    def put_item(self, Item):
+        if self.dynamo.fail_put:
+            raise RuntimeError("dynamo down")
+        self.dynamo.written.append(Item)
+
+
+class FakeDynamo:
+    def __init__(self):
+        self.batch_calls = 0
+        self.written = []
+        self.fail_put = False
+
+    def Table(self, name):
+        return FakeTable(self)
+
+    def batch_write_item(self, RequestItems):
+        self.batch_calls += 1
+        for reqs in RequestItems.values():
+            self.written.extend(r["PutRequest"]["Item"] for r in reqs)
+        return {"UnprocessedItems": {}}
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    s3, sqs, dynamo = FakeS3(), FakeSQS(), FakeDynamo()
+    monkeypatch.setattr(ingest, "s3", s3)
+    monkeypatch.setattr(ingest, "sqs", sqs)
+    monkeypatch.setattr(ingest, "audit", AuditSink("access_audit", dynamo))
+    return s3, sqs, dynamo
+
+
+def _event(body: str, b64=False):
+    return {"httpMethod": "POST", "path": "/prod/api/v1/ingest/batch", "body": body, "isBase64Encoded": b64}
+
+
+def test_batch_array_validates_each_entry(fakes):
+    s3, sqs, dynamo = fakes
+    body = json.dumps([_result("P1"), {"patient_id": "P2"}, _result("P3")])
+
+    resp = ingest.lambda_handler(_event(body), None)
+    out = json.loads(resp["body"])
+
+    assert resp["statusCode"] == 202
+    assert (out["accepted"], out["rejected"]) == (2, 1)
+    assert [r["status"] for r in out["results"]] == ["QUEUED", "REJECTED", "QUEUED"]
+    assert out["results"][1]["details"][0].startswith("Missing fields")
+    assert len(s3.objects) == 2
+    # Un SendMessageBatch y un BatchWriteItem para todo el lote
+    assert len(sqs.batches) == 1 and len(sqs.batches[0]) == 2
+    assert dynamo.batch_calls == 1
+    assert {i["result_id"] for i in dynamo.written} == {out["results"][0]["result_id"], out["results"][2]["result_id"]}
+
+
+def test_batch_ndjson_with_broken_line(fakes):
+    _, sqs, _ = fakes
+    body = json.dumps(_result("P1")) + "\n{no-json\n\n" + json.dumps(_result("P2")) + "\n"
+
+    out = json.loads(ingest.lambda_handler(_event(body), None)["body"])
+
+    assert [r["status"] for r in out["results"]] == ["QUEUED", "REJECTED", "QUEUED"]
+    assert out["results"][1]["error"].startswith("invalid_json")
+    assert [m["patient_id"] for m in sqs.batches[0]] == ["P1", "P2"]
+
+
+def test_batch_s3_failure_is_not_queued(fakes):
+    s3, sqs, _ = fakes
+    s3.fail_patient = "P1"
+
+    out = json.loads(ingest.lambda_handler(_event(json.dumps([_result("P1"), _result("P2")])), None)["body"])
+
+    assert [r["status"] for r in out["results"]] == ["FAILED", "QUEUED"]
+    assert out["results"][0]["error"] == "storage_failed"
+    assert [m["patient_id"] for m in sqs.batches[0]] == ["P2"]
+    assert (out["accepted"], out["rejected"], out["failed"]) == (1, 0, 1)
+
+
+def test_batch_s3_failure_is_audited(fakes):
+    s3, _, dynamo = fakes
+    s3.fail_patient = "P1"
+
+    out = json.loads(ingest.lambda_handler(_event(json.dumps([_result("P1"), _result("P2")])), None)["body"])
+    ingest.audit.flush()
+
+    failed = [i for i in dynamo.written if i["action"] == "INGEST_FAILED"]
+    assert [(i["result_id"], i["patient_id"]) for i in failed] == [(out["results"][0]["result_id"], "P1")]
+    assert json.loads(failed[0]["details"]) == {"errors": ["storage_failed"], "enqueued": False}
+    # El INGEST_CREATE es solo de la entrada que quedó en S3
+    assert [i["patient_id"] for i in dynamo.written if i["action"] == "INGEST_CREATE"] == ["P2"]
+
+
+def test_batch_returns_503_when_nothing_was_queued_by_server_failure(fakes):
+    s3, sqs, _ = fakes
+    s3.fail_patient = "P1"
+
+    resp = ingest.lambda_handler(_event(json.dumps([_result("P1"), {"patient_id": "P2"}])), None)
+    out = json.loads(resp["body"])
+
+    assert resp["statusCode"] == 503
+    assert (out["accepted"], out["rejected"], out["failed"]) == (0, 1, 1)
+    assert [r["status"] for r in out["results"]] == ["FAILED", "REJECTED"]
+
+
+def test_batch_limits(fakes, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_BATCH_MAX_ENTRIES", 2)
+    resp = ingest.lambda_handler(_event(json.dumps([_result()] * 3)), None)
+    assert resp["statusCode"] == 413
+
+    resp = ingest.lambda_handler(_event("[]"), None)
+    assert resp["statusCode"] == 400
+
+    resp = ingest.lambda_handler(_event(json.dumps([{"x": 1}])), None)
+    assert resp["statusCode"] == 400
+
+
+def test_batch_entries_without_audit_row_are_not_queued(fakes, monkeypatch):
+    _, sqs, dynamo = fakes
+    monkeypatch.setattr("services.common.dynamo_batch.time.sleep", lambda s: None)
+
+    def audit_table_down(RequestItems):
+        raise RuntimeError("dynamodb down")
+
+    dynamo.batch_write_item = audit_table_down
+    resp = ingest.lambda_handler(_event(json.dumps([_result("P1"), _result("P2")])), None)
+    out = json.loads(resp["body"])
+
+    assert resp["statusCode"] == 503
+    assert [(r["status"], r["error"]) for r in out["results"]] == [("FAILED", "audit_failed")] * 2
+    assert sqs.batches == []
+
+
+def test_batch_enqueue_failure_is_audited(fakes, monkeypatch):
+    _, sqs, dynamo = fakes
+
+    def sqs_down(QueueUrl, Entries):
+        return {"Successful": [], "Failed": [{"Id": e["Id"], "Code": "AccessDenied", "SenderFault": True} for e in Entries]}
+
+    monkeypatch.setattr(sqs, "send_message_batch", sqs_down)
+    out = json.loads(ingest.lambda_handler(_event(json.dumps([_result("P1")])), None)["body"])
+    ingest.audit.flush()
+
+    assert out["results"][0]["error"] == "enqueue_failed"
+    assert [i["action"] for i in dynamo.written] == ["INGEST_CREATE", "INGEST_FAILED"]
+
+
+# ---------------------------------------------------------------------------
+# POST /api/v1/ingest (un resultado)
+# ---------------------------------------------------------------------------
+
+def _single(body: dict):
+    event = {"httpMethod": "POST", "path": "/prod/api/v1/ingest", "body": json.dumps(body)}
+    return ingest.lambda_handler(event, None)
+
+
+def test_ingest_inline_runs_s3_and_sqs_in_parallel(fakes, capsys):
+    s3, sqs, dynamo = fakes
+    # El PUT espera a que arranque el SendMessage: si fueran en serie, no llega
+    s3.before_put = lambda: sqs.sending.wait(timeout=2) or pytest.fail("SQS no corrió en paralelo")
+
+    resp = _single(_result("P1"))
+
+    assert resp["statusCode"] == 202
+    result_id = json.loads(resp["body"])["result_id"]
+    assert list(s3.objects) == [f"raw/{result_id}.json"]
+    assert sqs.sent[0]["payload"]["patient_id"] == "P1"
+    assert [i["action"] for i in dynamo.written] == ["INGEST_CREATE"]
+
+    line = next(l for l in capsys.readouterr().out.splitlines() if l.startswith("INGEST_LATENCY "))
+    breakdown = json.loads(line.split(" ", 1)[1])
+    assert breakdown["mode"] == "inline" and breakdown["ok"] is True
+    assert {"validate_ms", "s3_ms", "sqs_ms", "audit_ms", "total_ms"} <= set(breakdown)
+
+
+def test_ingest_by_reference_does_not_queue_when_s3_fails(fakes, monkeypatch):
+    s3, sqs, dynamo = fakes
+    monkeypatch.setattr(ingest, "INLINE_PAYLOAD_MAX_BYTES", 0)
+    s3.fail_patient = "P1"
+
+    resp = _single(_result("P1"))
+    ingest.audit.flush()
+
+    out = json.loads(resp["body"])
+    assert resp["statusCode"] == 500
+    assert (out["error"], out["enqueued"]) == ("storage_failed", False)
+    assert sqs.sent == []
+    assert [i["action"] for i in dynamo.written] == ["INGEST_CREATE", "INGEST_FAILED"]
+
+
+def test_ingest_by_reference_does_not_queue_when_audit_fails(fakes, monkeypatch):
+    s3, sqs, dynamo = fakes
+    monkeypatch.setattr(ingest, "INLINE_PAYLOAD_MAX_BYTES", 0)
+    dynamo.fail_put = True
+
+    resp = _single(_result("P1"))
+    ingest.audit.flush()
+
+    out = json.loads(resp["body"])
+    assert resp["statusCode"] == 500
+    # Mismo error que la entrada de un batch sin auditar
+    assert (out["error"], out["enqueued"]) == ("audit_failed", False)
+    assert sqs.sent == []
+    assert len(s3.objects) == 1
+    assert [i["action"] for i in dynamo.written] == ["INGEST_FAILED"]
+
+
+def test_ingest_inline_s3_failure_reports_it_was_queued(fakes):
+    s3, sqs, _ = fakes
+    s3.fail_patient = "P1"
+
+    out = json.loads(_single(_result("P1"))["body"])
+
+    assert (out["error"], out["enqueued"]) == ("storage_failed", True)
+    assert len(sqs.sent) == 1
+    # Reintentó el PUT antes de responder
+    assert s3.puts == 2
+
+
+def test_ingest_inline_retries_s3_put_after_enqueue(fakes):
+    s3, sqs, dynamo = fakes
+    s3.fail_patient = "P1"
+    s3.fail_times = 1
+
+    resp = _single(_result("P1"))
+
+    assert resp["statusCode"] == 202
+    result_id = json.loads(resp["body"])["result_id"]
+    assert list(s3.objects) == [f"raw/{result_id}.json"]
+    assert s3.puts == 2 and len(sqs.sent) == 1
+    assert [i["action"] for i in dynamo.written] == ["INGEST_CREATE"]
@@ -0,0 +1,240 @@
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# app.py lee la configuración del entorno al importarse
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("RAW_BUCKET", "raw-bucket")
+os.environ.setdefault("LAB_RESULTS_QUEUE_URL", "https://sqs.local/lab-results")
+
+from services.common.audit import AuditSink, AuditThrottle  # noqa: E402
+from services.common.ttl_cache import TTLCache  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location(
+    "ingest_status_app", os.path.join(PROJECT_ROOT, "lambda", "ingest", "app.py")
+)
+ingest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ingest)
+
+
+class FakeTable:
+    def __init__(self, items):
+        self.items = items
+        self.queries = 0
+
+    def query(self, KeyConditionExpression, **kwargs):
+        self.queries += 1
+        result_id = KeyConditionExpression.get_expression()["values"][1]
+        return {"Items": [i for i in self.items if i["result_id"] == result_id]}
+
+
+class FakeDynamo:
+    def __init__(self, items):
+        self.table = FakeTable(items)
+        self.audited = []
+
+    def Table(self, name):
+        return self.table
+
+    def batch_write_item(self, RequestItems):
+        for reqs in RequestItems.values():
+            self.audited.extend(r["PutRequest"]["Item"] for r in reqs)
+        return {"UnprocessedItems": {}}
+
+
+ITEMS = [
+    {
+        "result_id": "R1",
+        "patient_id": "P1",
+        "status": "PROCESSED",
+        "test_type": "blood",
+        "test_date": "2024-01-15",
+        "has_abnormal": True,
+        "updated_at": "2024-01-15T10:30:00+00:00",
+    },
+    {"result_id": "R2", "patient_id": "P2", "status": "RECEIVED", "updated_at": "2024-01-15T10:00:00+00:00"},
+]
+
+
+@pytest.fixture
+def dynamo(monkeypatch):
+    fake = FakeDynamo([dict(i) for i in ITEMS])
+    monkeypatch.setattr(ingest, "LAB_RESULTS_TABLE", "lab_results")
+    monkeypatch.setattr(ingest, "dynamo", fake)
+    monkeypatch.setattr(ingest, "audit", AuditSink("access_audit", fake))
+    monkeypatch.setattr(ingest, "status_cache", TTLCache(100, 300))
+    monkeypatch.setattr(ingest, "status_audit_throttle", AuditThrottle(60))
+    return fake
+
+
+def _get(result_id, headers=None, ip="10.0.0.1"):
+    event = {
+        "httpMethod": "GET",
+        "path": f"/prod/api/v1/status/{result_id}",
+        "headers": headers or {},
+        "requestContext": {"identity": {"sourceIp": ip}},
+    }
+    return ingest.lambda_handler(event, None)
+
+
+def test_status_has_etag_and_last_modified(dynamo):
+    resp = _get("R1")
+
+    assert resp["statusCode"] == 200
+    assert resp["headers"]["ETag"].startswith('"')
+    assert resp["headers"]["Last-Modified"] == "Mon, 15 Jan 2024 10:30:00 GMT"
+    assert resp["headers"]["Cache-Control"].startswith("private, max-age=")
+
+
+def test_if_none_match_returns_304(dynamo):
+    etag = _get("R2")["headers"]["ETag"]
+
+    resp = _get("R2", headers={"if-none-match": f"W/{etag}"})
+
+    assert resp["statusCode"] == 304 and resp["body"] == ""
+    assert resp["headers"]["ETag"] == etag
+
+
+def test_etag_changes_when_item_changes(dynamo):
+    before = _get("R2")["headers"]["ETag"]
+    dynamo.table.items[1].update(status="PROCESSED", updated_at="2024-01-15T11:00:00+00:00")
+
+    resp = _get("R2", headers={"If-None-Match": before})
+
+    assert resp["statusCode"] == 200
+    assert resp["headers"]["ETag"] != before
+
+
+def test_processed_is_served_from_cache(dynamo):
+    for _ in range(5):
+        assert _get("R1")["statusCode"] == 200
+    # Solo el primero va a DynamoDB; los no terminales no se cachean
+    assert dynamo.table.queries == 1
+
+    _get("R2")
+    _get("R2")
+    assert dynamo.table.queries == 3
+
+
+def test_repeated_polls_are_audited_once_per_window(dynamo):
+    for _ in range(4):
+        _get("R1")
+    _get("R1", ip="10.0.0.2")
+    # flush_after quedó atado al sink original del módulo
+    ingest.audit.flush()
+
+    reads = [a for a in dynamo.audited if a["action"] == "RESULT_STATUS_READ"]
+    assert [(a["source_ip"], a.get("suppressed_reads")) for a in reads] == [("10.0.0.1", None), ("10.0.0.2", None)]
+
+
+def test_throttle_reports_suppressed_count_on_new_window():
+    now = [0.0]
+    throttle = AuditThrottle(60, clock=lambda: now[0])
+
+    assert throttle.admit("k") == 0
+    assert throttle.admit("k") is None
+    assert throttle.admit("k") is None
+    now[0] = 61
+    assert throttle.admit("k") == 2
+
+
+def test_sweep_reports_suppressed_reads_of_closed_windows():
+    now = [0.0]
+    reported = []
+    throttle = AuditThrottle(60, clock=lambda: now[0], on_expire=lambda key, n: reported.append((key, n)))
+
+    for _ in range(59):
+        throttle.admit("polled")
+    throttle.admit("once")
+    now[0] = 30
+    throttle.admit("late")
+    throttle.admit("late")
+
+    # Ninguna ventana cerró todavía
+    assert throttle.sweep() == 0
+    now[0] = 61
+    assert throttle.sweep() == 1
+    assert reported == [("polled", 58)]
+    # La ventana de "late" sigue abierta y conserva su conteo
+    now[0] = 91
+    throttle.sweep()
+    assert reported[-1] == ("late", 1)
+
+
+def test_flush_after_emits_counts_when_polling_stops(dynamo, monkeypatch):
+    now = [0.0]
+    throttle = AuditThrottle(60, clock=lambda: now[0], on_expire=ingest._audit_suppressed_reads)
+    monkeypatch.setattr(ingest, "status_audit_throttle", throttle)
+    for _ in range(59):
+        _get("R1")
+
+    now[0] = 61
+    # Cualquier invocación posterior del contenedor barre la ventana vencida
+    handler = ingest.flush_after(ingest.audit, throttle)(lambda event, context: None)
+    handler({}, None)
+
+    reads = [(a["action"], a.get("suppressed_reads")) for a in dynamo.audited]
+    assert reads == [("RESULT_STATUS_READ", None), ("RESULT_STATUS_READS_SUPPRESSED", 58)]
+
+
+def test_ttl_cache_expires_and_evicts_oldest_entry():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None and cache.get("c") == 3
+
+    now[0] = 11
+    assert cache.get("b") is None and len(cache) == 1
+
+
+def _post_batch(payload):
+    event = {
+        "httpMethod": "POST",
+        "path": "/prod/api/v1/status/batch",
+        "body": json.dumps(payload),
+        "requestContext": {"identity": {"sourceIp": "10.0.0.1"}},
+    }
+    return ingest.lambda_handler(event, None)
+
+
+def test_status_batch_returns_compact_map(dynamo):
+    resp = _post_batch({"result_ids": ["R1", "R2", "R9", "R1"]})
+    ingest.audit.flush()
+
+    assert resp["statusCode"] == 200
+    assert json.loads(resp["body"]) == {"statuses": {"R1": "PROCESSED", "R2": "RECEIVED", "R9": "PENDING"}}
+    # Ids repetidos se consultan una vez; un solo registro de auditoría
+    assert dynamo.table.queries == 3
+    assert [a["action"] for a in dynamo.audited] == ["RESULT_STATUS_BATCH_READ"]
+    assert dynamo.audited[0]["result_ids"] == ["R1", "R2", "R9"]
+
+
+def test_status_batch_reports_failures_per_id(dynamo, monkeypatch):
+    query = dynamo.table.query
+
+    def flaky(KeyConditionExpression, **kwargs):
+        if KeyConditionExpression.get_expression()["values"][1] == "R2":
+            raise RuntimeError("throttled")
+        return query(KeyConditionExpression, **kwargs)
+
+    monkeypatch.setattr(dynamo.table, "query", flaky)
+    out = json.loads(_post_batch({"result_ids": ["R1", "R2"]})["body"])
+
+    assert out == {"statuses": {"R1": "PROCESSED"}, "errors": {"R2": "lookup_failed"}}
+
+
+def test_status_batch_validates_body(dynamo, monkeypatch):
+    assert _post_batch({"result_ids": []})["statusCode"] == 400
+    assert _post_batch({"result_ids": ["R1", 3]})["statusCode"] == 400
+    monkeypatch.setattr(ingest, "STATUS_BATCH_MAX_IDS", 2)
+    assert _post_batch({"result_ids": ["R1", "R2", "R3"]})["statusCode"] == 413
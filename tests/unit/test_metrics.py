@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+
+from services.processor.metrics import EmfReporter, Histogram, HttpReporter, StageTimers  # noqa: E402
+from services.processor.profiling import MessageProfiler  # noqa: E402
+
+
+def test_histogram_percentiles_by_bucket():
+    hist = Histogram()
+    for _ in range(90):
+        hist.observe(0.002)   # 2 ms -> bucket 2.5
+    for _ in range(10):
+        hist.observe(0.2)     # 200 ms -> bucket 250
+
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 2.5
+    assert summary["p99_ms"] == 250
+    assert summary["max_ms"] == 200.0
+
+
+def test_stage_timers_snapshot_with_reset():
+    timers = StageTimers()
+    with timers.stage("normalize"):
+        pass
+    timers.record("put", 0.01)
+
+    first = timers.snapshot(reset=True)
+    assert set(first) == {"normalize", "put"}
+    assert first["put"]["count"] == 1
+    assert timers.snapshot()["put"]["count"] == 0
+
+
+def test_emf_reporter_emits_cloudwatch_document():
+    stream = io.StringIO()
+    timers = StageTimers()
+    timers.record("s3_get", 0.03)
+
+    EmfReporter(stream=stream).report(timers.snapshot())
+
+    doc = json.loads(stream.getvalue())
+    assert doc["Stage"] == "s3_get"
+    assert doc["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Stage"]]
+    assert doc["Count"] == 1
+
+
+def test_http_reporter_exposes_text():
+    timers = StageTimers()
+    timers.record("receive", 0.001)
+    http = HttpReporter(timers, port=0)
+    http.start()
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{http.port}/metrics", timeout=5).read().decode()
+    finally:
+        http.stop()
+    assert 'worker_stage_count{stage="receive"} 1' in body
+
+
+def test_profiler_dumps_after_n_messages(tmp_path):
+    profiler = MessageProfiler(str(tmp_path), interval=0.001)
+    profiler.arm(2)
+    time.sleep(0.02)
+
+    assert profiler.message_done() is None
+    path = profiler.message_done()
+
+    assert path and os.path.exists(path)
+    assert not profiler.active
+
+
+def test_sigusr1_only_requests_arming_and_the_loop_arms(tmp_path):
+    import threading
+
+    profiler = MessageProfiler(str(tmp_path), interval=0.001)
+    profiler.arm(1)
+    # Como en el motor secuencial: la señal llega con el lock tomado
+    with profiler._lock:
+        done = threading.Event()
+        threading.Thread(target=lambda: (profiler.request_arm(3), done.set())).start()
+        assert done.wait(1)
+    assert profiler.message_done() is not None
+
+    assert not profiler.active
+    assert profiler.arm_requested() is True
+    assert profiler.active and profiler._remaining == 3
+    assert profiler.arm_requested() is False
+    profiler.message_done(3)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+
+from services.common.models import LabResult, ResultEntry  # noqa: E402
+from services.processor.process_utils import process_lab_result  # noqa: E402
+
+
+RAW = {
+    "patient_id": "P001",
+    "lab_id": "LAB001",
+    "lab_name": "Lab Central",
+    "test_type": "blood",
+    "test_date": "2025-01-01",
+    "results": [
+        {"test_code": "GLU", "test_name": "Glucose", "value": 180, "unit": "mg/dL",
+         "reference_range": "70-100", "is_abnormal": False},
+        {"test_code": "HGB", "value": 14, "custom": "x"},
+    ],
+}
+
+
+def test_raw_round_trip_is_lossless():
+    lab = LabResult.from_raw(RAW)
+    assert isinstance(lab.results[0], ResultEntry)
+    assert lab.to_raw() == RAW
+    # Campos ausentes siguen ausentes; los desconocidos se conservan
+    assert "unit" not in lab.results[1]
+    assert lab.results[1]["custom"] == "x"
+
+
+def test_dict_style_access():
+    lab = LabResult.from_raw(RAW)
+    assert lab["patient_id"] == "P001"
+    assert lab.get("notes", "") == ""
+    assert "status" not in lab
+    assert not hasattr(lab.results[0], "__dict__")
+
+
+def test_process_lab_result_with_model_matches_dict():
+    from_dict = process_lab_result(dict(RAW), "R1")
+    from_model = process_lab_result(LabResult.from_raw(RAW), "R1")
+
+    assert isinstance(from_model, LabResult)
+    item = from_model.to_item()
+    for key in ("created_at", "updated_at"):
+        item.pop(key)
+        from_dict.pop(key)
+    assert item == from_dict
+    assert item["out_of_range"] == ["GLU"]
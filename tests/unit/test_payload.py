@@ -0,0 +1,55 @@
+import io
+import json
+import os
+import sys
+from decimal import Decimal
+
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+
+from services.processor import payload
+from services.processor.payload import PayloadTooLarge, load_json_stream
+
+RAW = {
+    "patient_id": "P123456",
+    "results": [{"test_code": "GLU", "value": 95.6, "count": 3, "is_abnormal": False}],
+}
+
+
+@pytest.fixture(params=["ijson", "fallback"])
+def parser(request, monkeypatch):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(payload, "ijson", None)
+    return request.param
+
+
+def test_numbers_are_decoded_as_decimal(parser):
+    data = load_json_stream(io.BytesIO(json.dumps(RAW).encode("utf-8")), max_bytes=1024)
+
+    entry = data["results"][0]
+    assert entry["value"] == Decimal("95.6")
+    assert isinstance(entry["value"], Decimal)
+    assert entry["count"] == 3
+    assert entry["is_abnormal"] is False
+
+
+def test_payload_over_cap_is_rejected(parser):
+    body = json.dumps({"results": [RAW] * 200}).encode("utf-8")
+
+    with pytest.raises(PayloadTooLarge):
+        load_json_stream(io.BytesIO(body), max_bytes=1024)
+
+
+def test_declared_length_over_cap_is_rejected_without_reading():
+    class Unreadable:
+        def read(self, size):
+            raise AssertionError("no debería leerse")
+
+    with pytest.raises(PayloadTooLarge):
+        load_json_stream(Unreadable(), max_bytes=10, content_length=11)
@@ -39,3 +39,77 @@ def test_process_lab_result_has_abnormal_flag_and_status():
     assert "created_at" in item
     assert "updated_at" in item
 
+
+
+def _payload(i, n_results):
+    return {
+        "patient_id": f"P{i}",
+        "lab_id": "LAB001",
+        "lab_name": "Quest Diagnostics",
+        "test_type": "cbc",
+        "test_date": "2024-01-15T10:30:00Z",
+        "results": [
+            {
+                "test_code": f"T{j}",
+                "value": j,
+                "reference_range": "0-40" if j % 2 else None,
+                "is_abnormal": (i + j) % 7 == 0,
+            }
+            for j in range(n_results)
+        ],
+    }
+
+
+def _without_timestamps(item):
+    return {k: v for k, v in item.items() if k not in ("created_at", "updated_at")}
+
+
+def test_process_lab_results_batch_matches_single_item_function():
+    from services.processor.process_utils import process_lab_results_batch
+
+    payloads = [_payload(i, n) for i, n in enumerate([0, 1, 3, 6, 50, 200])]
+    payloads.append({**_payload(99, 0), "results": "not-a-list"})
+    result_ids = [f"R{i}" for i in range(len(payloads))]
+
+    batch = process_lab_results_batch(payloads, result_ids)
+    single = [process_lab_result(p, result_id=r) for p, r in zip(payloads, result_ids)]
+
+    assert [_without_timestamps(i) for i in batch] == [_without_timestamps(i) for i in single]
+    assert {i["has_abnormal"] for i in batch} == {True, False}
+    assert len({i["created_at"] for i in batch}) == 1
+
+
+def test_parse_reference_range_formats():
+    from services.processor.process_utils import parse_reference_range
+
+    assert parse_reference_range("4.5-11.0") == (4.5, 11.0, True, True, None)
+    assert parse_reference_range("<100") == (None, 100.0, False, False, None)
+    assert parse_reference_range("<= 5.7 %") == (None, 5.7, False, True, "%")
+    assert parse_reference_range(">=60") == (60.0, None, True, False, None)
+    assert parse_reference_range("70 - 99 mg/dL") == (70.0, 99.0, True, True, "mg/dl")
+    assert parse_reference_range("negative") is None
+    assert parse_reference_range(None) is None
+
+
+def test_process_lab_result_flags_values_outside_reference_range():
+    from decimal import Decimal
+
+    data = {
+        "patient_id": "P123456",
+        "lab_id": "LAB001",
+        "lab_name": "Quest Diagnostics",
+        "test_type": "cbc",
+        "test_date": "2024-01-15T10:30:00Z",
+        "results": [
+            # El laboratorio no lo marcó, pero 12.3 está fuera de 4.5-11.0
+            {"test_code": "WBC", "value": Decimal("12.3"), "reference_range": "4.5-11.0", "is_abnormal": False},
+            {"test_code": "LDL", "value": "100", "reference_range": "<100"},
+            {"test_code": "GLU", "value": 90, "unit": "mmol/L", "reference_range": "70-99 mg/dL"},
+            {"test_code": "HIV", "value": "negative", "reference_range": "negative"},
+        ],
+    }
+
+    item = process_lab_result(data, result_id="TEST-RANGE")
+
+    assert item["out_of_range"] == ["WBC", "LDL"]
+    assert item["has_abnormal"] is True
@@ -0,0 +1,121 @@
+import os
+import signal
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.processor import supervisor  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    supervisor._ctx.get_start_method() != "fork", reason="los stubs de _child_main necesitan fork"
+)
+
+
+# ---------------------------------------------------------------------------
+# Stubs de _child_main (corren en el proceso hijo, heredados por fork)
+# ---------------------------------------------------------------------------
+
+def _crashing_child(log_path):
+    """Anota cuándo arrancó, cuenta 5 procesados y muere con código 1."""
+    def target(index, processed, failed):
+        with open(log_path, "a") as f:
+            f.write(f"{time.monotonic()}\n")
+        processed.value = 5
+        failed.value = 1
+        os._exit(1)
+    return target
+
+
+def _draining_child(index, processed, failed):
+    # El hijo 0 termina con SIGTERM (lo normal); el 1 lo ignora y se cuelga
+    if index == 1:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    else:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    while True:
+        time.sleep(0.1)
+
+
+@pytest.fixture
+def children(monkeypatch):
+    """Registra los _Child que crea run_supervisor y restaura los handlers."""
+    created = []
+
+    class RecordingChild(supervisor._Child):
+        def __init__(self, index):
+            super().__init__(index)
+            created.append(self)
+
+    monkeypatch.setattr(supervisor, "_Child", RecordingChild)
+    monkeypatch.setattr(supervisor, "SUPERVISOR_STATS_INTERVAL", 3600)
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    yield created
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+    for child in created:
+        if child.process is not None and child.process.is_alive():
+            child.process.kill()
+            child.process.join()
+
+
+def _sigterm_after(seconds: float):
+    timer = threading.Timer(seconds, os.kill, args=(os.getpid(), signal.SIGTERM))
+    timer.start()
+    return timer
+
+
+def test_crashed_child_is_restarted_after_min_uptime(children, monkeypatch, tmp_path):
+    log_path = tmp_path / "starts.txt"
+    monkeypatch.setattr(supervisor, "_child_main", _crashing_child(str(log_path)))
+    monkeypatch.setattr(supervisor, "MIN_CHILD_UPTIME", 2.5)
+
+    _sigterm_after(3.5)
+    supervisor.run_supervisor(processes=1)
+
+    starts = [float(line) for line in log_path.read_text().split()]
+    child = children[0]
+    assert len(starts) >= 2 and child.restarts >= 1
+    # Murió enseguida: el reinicio espera MIN_CHILD_UPTIME, no solo el
+    # ciclo de 1 s del supervisor
+    assert starts[1] - starts[0] >= 2.4
+    # Lo procesado por cada encarnación se acumula (retire)
+    assert child.totals() == (5 * len(starts), len(starts))
+
+
+def test_sigterm_drains_children_and_kills_the_stuck_one(children, monkeypatch):
+    monkeypatch.setattr(supervisor, "_child_main", _draining_child)
+    monkeypatch.setattr(supervisor, "SUPERVISOR_DRAIN_TIMEOUT", 0.5)
+
+    _sigterm_after(1.0)
+    start = time.monotonic()
+    supervisor.run_supervisor(processes=2)
+
+    polite, stuck = children
+    assert polite.process.exitcode == -signal.SIGTERM
+    assert stuck.process.exitcode == -signal.SIGKILL
+    assert time.monotonic() - start < 5
+    # Sin reinicios: el supervisor ya estaba drenando
+    assert polite.restarts == stuck.restarts == 0
+
+
+def test_retire_carries_counters_over_to_the_next_incarnation():
+    child = supervisor._Child(0)
+    child.processed, child.failed = SimpleNamespace(value=7), SimpleNamespace(value=2)
+
+    child.retire()
+    assert child.totals() == (7, 2)
+
+    # La nueva encarnación arranca sus contadores compartidos en 0
+    child.processed, child.failed = SimpleNamespace(value=3), SimpleNamespace(value=0)
+    assert child.totals() == (10, 2)
+    child.retire()
+    assert (child.base_processed, child.base_failed) == (10, 2)
+    assert child.processed is None and child.totals() == (10, 2)
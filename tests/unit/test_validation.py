@@ -0,0 +1,111 @@
+import os
+import sys
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+
+from services.common.models import LabResult  # noqa: E402
+from services.common.validation import PayloadValidator, validate_lab_result  # noqa: E402
+
+
+def _payload(**overrides):
+    body = {
+        "patient_id": "P001",
+        "lab_id": "LAB001",
+        "lab_name": "Lab Central",
+        "test_type": "blood",
+        "test_date": "2024-01-15T10:30:00Z",
+        "results": [
+            {"test_code": "GLU", "test_name": "Glucose", "value": 95.5, "unit": "mg/dL",
+             "reference_range": "70-100", "is_abnormal": False},
+            {"test_code": "HIV", "value": "negative"},
+        ],
+    }
+    body.update(overrides)
+    return body
+
+
+def test_valid_payload():
+    assert validate_lab_result(_payload()) == []
+    assert validate_lab_result(_payload(test_date="2024-01-15")) == []
+    assert validate_lab_result(LabResult.from_raw(_payload())) == []
+
+
+def test_reports_all_errors_at_once():
+    body = _payload(
+        test_date="15/01/2024",
+        lab_name="x" * 500,
+        results=[
+            {"test_code": "GLU", "value": True},
+            {"value": float("nan"), "is_abnormal": "yes"},
+            "no-es-objeto",
+        ],
+    )
+    del body["lab_id"]
+
+    errors = validate_lab_result(body)
+
+    assert errors == [
+        "Missing fields: lab_id",
+        "lab_name: must be at most 128 characters",
+        "test_date: must be an ISO-8601 date (YYYY-MM-DD[THH:MM[:SS]][Z])",
+        "results[0].value: must be a number or a non-empty string",
+        "results[1].test_code: is required",
+        "results[1].value: must be a number or a non-empty string",
+        "results[1].is_abnormal: must be a boolean",
+        "results[2]: must be an object",
+    ]
+
+
+def test_impossible_date_and_empty_results():
+    errors = validate_lab_result(_payload(test_date="2024-02-30", results=[]))
+    assert errors == ["test_date: is not a valid date", "Field 'results' must be a non-empty list"]
+
+
+def test_error_cap():
+    validator = PayloadValidator(max_errors=3)
+    errors = validator.errors(_payload(results=[{"value": 1}] * 100))
+    assert len(errors) == 4
+    assert errors[-1] == "... more errors omitted"
+
+
+def test_fast_path_matches_detailed_checks():
+    validator = PayloadValidator()
+    samples = [
+        1, 0.5, 0.0, 10 ** 37, -(10 ** 38), int("9" * 400), 1e126, 1e-131, float("inf"), float("nan"),
+        Decimal("95.5"), Decimal("0"), Decimal("NaN"), Decimal("1e200"), Decimal("1." + "1" * 40),
+        True, None, "", " ", "ok", "x" * 200, [], {},
+    ]
+    for field in ("test_code", "test_name", "value", "unit", "reference_range", "is_abnormal"):
+        for sample in samples:
+            entry = {"test_code": "GLU", "value": 1, field: sample}
+            detailed_ok = all(check(entry[name]) is None for name, check in validator._entry_checks if name in entry)
+            assert validator._entry_ok(entry) == detailed_ok, (field, sample)
+
+
+def test_numbers_outside_dynamodb_range_are_rejected():
+    huge = {"test_code": "GLU", "value": int("9" * 400)}
+    too_precise = {"test_code": "GLU", "value": 10 ** 50}
+    tiny = {"test_code": "GLU", "value": 1e-200}
+    big = {"test_code": "GLU", "value": 1e200}
+
+    # Sin OverflowError: un error de validación (400), no un 500
+    errors = validate_lab_result(_payload(results=[huge, too_precise, tiny, big]))
+
+    assert errors == [
+        f"results[{i}].value: is out of range (at most 38 digits, magnitude between 1e-130 and 1e126)"
+        for i in range(4)
+    ]
+    assert validate_lab_result(_payload(results=[{"test_code": "GLU", "value": 10 ** 38 - 1}])) == []
+    assert validate_lab_result(_payload(results=[{"test_code": "GLU", "value": -9.99e125}])) == []
+
+
+def test_dynamodb_item_with_decimals_is_valid():
+    # Como lo devuelve DynamoDB: números como Decimal
+    item = _payload(results=[{"test_code": "GLU", "value": Decimal("95.5")}, {"test_code": "K", "value": Decimal("4")}])
+
+    assert validate_lab_result(item) == []
+    assert validate_lab_result(LabResult.from_item(item)) == []
+    errors = validate_lab_result(_payload(results=[{"test_code": "GLU", "value": Decimal("NaN")}]))
+    assert errors == ["results[0].value: must be a number or a non-empty string"]
@@ -0,0 +1,546 @@
+import io
+import json
+import os
+import sys
+import threading
+from decimal import Decimal
+
+# Igual que en test_process_utils: raíz del proyecto en sys.path
+CURRENT_DIR = os.path.dirname(__file__)                     # .../tests/unit
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# worker.py lee la configuración del entorno al importarse
+os.environ.setdefault("LAB_RESULTS_QUEUE_URL", "https://sqs.local/lab-results")
+os.environ.setdefault("NOTIFY_QUEUE_URL", "https://sqs.local/notify")
+os.environ.setdefault("RAW_BUCKET", "raw-bucket")
+os.environ.setdefault("LAB_RESULTS_TABLE", "lab_results")
+
+import pytest
+
+from services.common.audit import AuditSink
+from services.processor import worker
+from services.processor.dedup import CompletedCache
+
+
+RAW = {
+    "patient_id": "P123456",
+    "lab_id": "LAB001",
+    "lab_name": "Quest Diagnostics",
+    "test_type": "lipid_panel",
+    "test_date": "2024-01-15T10:30:00Z",
+    "results": [
+        {
+            "test_code": "LDL",
+            "test_name": "LDL Cholesterol",
+            "value": 160.5,
+            "unit": "mg/dL",
+            "reference_range": "<100",
+            "is_abnormal": True,
+        }
+    ],
+}
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+
+class FakeSQS:
+    def __init__(self, fail_once=()):
+        self.sent = []
+        self.deleted = []
+        self.visibility = []
+        self.calls = 0
+        # Ids de entrada que fallan (error de SQS) la primera vez
+        self.fail_once = set(fail_once)
+
+    def _failures(self, Entries):
+        failed = [
+            {"Id": e["Id"], "Code": "InternalError", "SenderFault": False}
+            for e in Entries
+            if e["Id"] in self.fail_once
+        ]
+        self.fail_once -= {f["Id"] for f in failed}
+        return failed
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        failed = self._failures(Entries)
+        failed_ids = {f["Id"] for f in failed}
+        for e in Entries:
+            if e["Id"] not in failed_ids:
+                self.sent.append((QueueUrl, json.loads(e["MessageBody"])))
+        return {"Successful": [], "Failed": failed}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        self.visibility.extend((e["ReceiptHandle"], e["VisibilityTimeout"]) for e in Entries)
+        return {"Successful": [], "Failed": []}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        self.deleted.extend(e["ReceiptHandle"] for e in Entries)
+        return {"Successful": [], "Failed": []}
+
+
+class FakeDynamo:
+    """BatchWriteItem en memoria; puede devolver filas como UnprocessedItems."""
+
+    def __init__(self, unprocessed_rounds=0, error=None):
+        self.tables = {}
+        self.calls = 0
+        self.get_calls = 0
+        self.unprocessed_rounds = unprocessed_rounds
+        self.error = error
+        self.unprocessed_tables = set()
+        # Los tests de concurrencia escriben desde varios hilos
+        self._lock = threading.Lock()
+
+    @property
+    def items(self):
+        return self.tables.get("lab_results", [])
+
+    def batch_write_item(self, RequestItems):
+        with self._lock:
+            return self._batch_write_item(RequestItems)
+
+    def _batch_write_item(self, RequestItems):
+        from botocore.exceptions import ClientError
+
+        self.calls += 1
+        if isinstance(self.error, Exception):
+            raise self.error
+        if self.error:
+            raise ClientError({"Error": {"Code": self.error, "Message": "boom"}}, "BatchWriteItem")
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return {"UnprocessedItems": RequestItems}
+        unprocessed = {}
+        for table, reqs in RequestItems.items():
+            # Las filas de estas tablas se quedan sin escribir
+            if table in self.unprocessed_tables:
+                unprocessed[table] = reqs
+                continue
+            rows = self.tables.setdefault(table, [])
+            for r in reqs:
+                item = r["PutRequest"]["Item"]
+                # PutItem reemplaza el item con la misma clave
+                if table == "lab_results":
+                    rows[:] = [row for row in rows if row["result_id"] != item["result_id"]]
+                rows.append(item)
+        return {"UnprocessedItems": unprocessed}
+
+    def batch_get_item(self, RequestItems):
+        self.get_calls += 1
+        responses = {}
+        for table, spec in RequestItems.items():
+            rows = self.tables.get(table, [])
+            projection = spec["ProjectionExpression"].split(", ")
+            responses[table] = [
+                {attr: r[attr] for attr in projection if attr in r}
+                for r in rows
+                if {"result_id": r["result_id"], "patient_id": r["patient_id"]} in spec["Keys"]
+            ]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    s3 = FakeS3({"raw/R1.json": json.dumps(RAW).encode("utf-8")})
+    sqs = FakeSQS()
+    table = FakeDynamo()
+    monkeypatch.setattr(worker, "s3", s3)
+    monkeypatch.setattr(worker, "sqs", sqs)
+    monkeypatch.setattr(worker, "dynamo", table)
+    monkeypatch.setattr(worker, "audit", AuditSink(None))
+    monkeypatch.setattr(worker, "completed", CompletedCache())
+    monkeypatch.setattr("services.common.dynamo_batch.time.sleep", lambda s: None)
+    return s3, sqs, table
+
+
+def _message(result_id="R1", receipt="rh-1"):
+    body = {"result_id": result_id, "s3_key": f"raw/{result_id}.json", "patient_id": "P123456"}
+    return {"Body": json.dumps(body), "ReceiptHandle": receipt, "MessageId": f"m-{receipt}"}
+
+
+def test_process_batch_stores_notifies_and_deletes(fakes):
+    _, sqs, table = fakes
+
+    assert worker.process_batch([_message()]) == 1
+
+    assert table.items[0]["result_id"] == "R1"
+    assert table.items[0]["has_abnormal"] is True
+    assert sqs.sent[0][1]["result_id"] == "R1"
+    assert sqs.deleted == ["rh-1"]
+
+
+def test_process_batch_keeps_failed_message_in_queue(fakes):
+    _, sqs, table = fakes
+
+    processed = worker.process_batch([_message(result_id="MISSING"), _message(receipt="rh-2")])
+
+    assert processed == 1
+    assert [i["result_id"] for i in table.items] == ["R1"]
+    assert sqs.deleted == ["rh-2"]
+
+
+def _raw_objects(s3, count):
+    for i in range(count):
+        s3.objects[f"raw/R{i}.json"] = json.dumps(RAW).encode("utf-8")
+
+
+def test_process_batch_with_thread_pool(fakes):
+    from concurrent.futures import ThreadPoolExecutor
+
+    s3, sqs, table = fakes
+    _raw_objects(s3, 8)
+    msgs = [_message(result_id=f"R{i}", receipt=f"rh-{i}") for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert worker.process_batch(msgs, executor) == 8
+
+    assert sorted(i["result_id"] for i in table.items) == [f"R{i}" for i in range(8)]
+    assert sorted(body["result_id"] for _, body in sqs.sent) == [f"R{i}" for i in range(8)]
+    assert sorted(sqs.deleted) == sorted(f"rh-{i}" for i in range(8))
+    # El pool solo reparte process_message: el lote sigue siendo un BatchWriteItem
+    assert table.calls == 1
+
+
+def test_run_concurrent_receivers_share_the_pool(fakes, monkeypatch):
+    s3, sqs, table = fakes
+    _raw_objects(s3, 12)
+    batches = [
+        [_message(result_id=f"R{i}", receipt=f"rh-{i}") for i in range(start, start + 3)]
+        for start in range(0, 12, 3)
+    ]
+    lock = threading.Lock()
+    receivers = set()
+    # Los dos receivers hacen su primer long-poll a la vez
+    both_polling = threading.Barrier(2, timeout=5)
+
+    def receive():
+        name = threading.current_thread().name
+        if name not in receivers:
+            receivers.add(name)
+            both_polling.wait()
+        with lock:
+            if batches:
+                return batches.pop(0)
+        # Cola vacía: se pide el drenado como lo haría SIGTERM
+        worker.request_stop()
+        return []
+
+    monkeypatch.setattr(worker, "receive_messages", receive)
+    monkeypatch.setattr(worker, "WORKER_CONCURRENCY", 4)
+    monkeypatch.setattr(worker, "WORKER_RECEIVERS", 2)
+    try:
+        worker._run_concurrent()
+    finally:
+        worker.stop_event.clear()
+
+    assert sorted(sqs.deleted) == sorted(f"rh-{i}" for i in range(12))
+    assert len(table.items) == 12 and len(sqs.sent) == 12
+    assert receivers == {"receiver-0", "receiver-1"}
+
+
+def test_process_batch_uses_one_sqs_call_per_api(fakes):
+    s3, sqs, _ = fakes
+    # result_id distintos: con el mismo id serían re-entregas
+    _raw_objects(s3, 10)
+
+    worker.process_batch([_message(result_id=f"R{i}", receipt=f"rh-{i}") for i in range(10)])
+
+    # 1 SendMessageBatch + 1 DeleteMessageBatch para 10 mensajes
+    assert sqs.calls == 2
+    assert len(sqs.sent) == 10
+    assert len(sqs.deleted) == 10
+
+
+def test_inline_payload_skips_s3(fakes):
+    s3, sqs, table = fakes
+    s3.objects = {}  # cualquier GET fallaría con KeyError
+
+    msg = _message(result_id="INLINE")
+    body = json.loads(msg["Body"])
+    body["payload"] = RAW
+    msg["Body"] = json.dumps(body)
+
+    assert worker.process_batch([msg]) == 1
+    assert table.items[0]["result_id"] == "INLINE"
+    # Decimal desde el parseo, sin pasar por _convert_floats_to_decimal
+    assert table.items[0]["results"][0]["value"] == Decimal("160.5")
+
+
+def test_process_batch_writes_rows_in_one_batch_call(fakes):
+    _, _, table = fakes
+
+    worker.process_batch([_message(receipt=f"rh-{i}") for i in range(10)])
+
+    # El mismo result_id repetido se deduplica dentro del batch
+    assert table.calls == 1
+    assert len(table.items) == 1
+
+
+def test_process_batch_retries_unprocessed_items(fakes):
+    _, sqs, table = fakes
+    table.unprocessed_rounds = 2
+
+    assert worker.process_batch([_message()]) == 1
+
+    # 2 rondas de UnprocessedItems + la que escribe
+    assert table.calls == 3
+    assert sqs.deleted == ["rh-1"]
+
+
+def test_process_batch_does_not_ack_unwritten_messages(fakes):
+    _, sqs, table = fakes
+    table.error = "ValidationException"
+
+    assert worker.process_batch([_message()]) == 0
+
+    # La notificación ya salió (va antes de la escritura); el mensaje queda
+    assert sqs.deleted == []
+    assert table.items == []
+
+
+def test_unserializable_row_fails_only_its_message(fakes):
+    _, sqs, table = fakes
+    bad = _message(result_id="NAN", receipt="rh-bad")
+    body = json.loads(bad["Body"])
+    body["payload"] = dict(RAW, results=[dict(RAW["results"][0], value=float("nan"))])
+    bad["Body"] = json.dumps(body)
+
+    assert worker.process_batch([bad, _message(receipt="rh-1")]) == 1
+
+    assert [i["result_id"] for i in table.items] == ["R1"]
+    assert sqs.deleted == ["rh-1"]
+
+
+def test_connection_error_on_write_releases_the_batch(fakes, monkeypatch):
+    from botocore.exceptions import EndpointConnectionError
+
+    from services.processor.heartbeat import VisibilityHeartbeat
+
+    _, sqs, table = fakes
+    monkeypatch.setattr(worker, "heartbeat", VisibilityHeartbeat(sqs, "q", visibility_timeout=90))
+    table.error = EndpointConnectionError(endpoint_url="https://dynamodb.local")
+
+    assert worker.process_batch([_message()]) == 0
+
+    # Se reintenta como el throttling y, si sigue sin red, se libera
+    assert table.calls == 6
+    assert sqs.visibility == [("rh-1", 0)]
+    assert sqs.deleted == []
+
+
+def test_sqs_connection_error_is_retried():
+    from botocore.exceptions import ReadTimeoutError
+
+    from services.common.sqs_batch import delete_message_batch
+
+    sqs = FakeSQS()
+    delete = sqs.delete_message_batch
+    errors = [ReadTimeoutError(endpoint_url="https://sqs.local")]
+
+    def flaky(QueueUrl, Entries):
+        if errors:
+            raise errors.pop()
+        return delete(QueueUrl, Entries)
+
+    sqs.delete_message_batch = flaky
+    assert delete_message_batch(sqs, "q", {"k": "rh-1"}) == {}
+    assert sqs.deleted == ["rh-1"]
+
+
+def test_loop_survives_unexpected_errors(monkeypatch):
+    batches = [[_message(receipt="rh-1")], [_message(receipt="rh-2")]]
+    handled = []
+
+    def receive():
+        if not batches:
+            worker.stop_event.set()
+            return []
+        return batches.pop(0)
+
+    def process(messages, executor=None):
+        handled.append(messages[0]["ReceiptHandle"])
+        if len(handled) == 1:
+            raise TypeError("boom")
+        return 1
+
+    monkeypatch.setattr(worker, "receive_messages", receive)
+    monkeypatch.setattr(worker, "process_batch", process)
+    monkeypatch.setattr(worker.stop_event, "wait", lambda timeout=None: False)
+    try:
+        worker._run_sequential()
+    finally:
+        worker.stop_event.clear()
+
+    assert handled == ["rh-1", "rh-2"]
+
+
+def test_heartbeat_extends_in_flight_and_releases_transient_failures(fakes, monkeypatch):
+    from services.processor.heartbeat import VisibilityHeartbeat
+
+    _, sqs, table = fakes
+    hb = VisibilityHeartbeat(sqs, "q", visibility_timeout=90)
+    monkeypatch.setattr(worker, "heartbeat", hb)
+
+    msgs = [_message(receipt="rh-1")]
+    worker.begin_batch(msgs)
+    hb.extend_now()
+    assert sqs.visibility == [("rh-1", 90)]
+
+    # 5xx al escribir: el mensaje se libera en vez de esperar 90 s
+    table.error = "InternalServerError"
+    assert worker.complete_batch(msgs, [worker._process_one(msgs[0])]) == 0
+    worker.end_batch(msgs)
+
+    assert sqs.visibility[-1] == ("rh-1", 0)
+    assert sqs.deleted == []
+
+    hb.extend_now()
+    assert len(sqs.visibility) == 2
+
+
+def test_async_engine_processes_batch_and_releases_slot(fakes):
+    import asyncio
+
+    from services.processor import async_worker
+
+    _, sqs, _ = fakes
+
+    async def run():
+        stage_slots = asyncio.Semaphore(2)
+        batch_slots = asyncio.Semaphore(1)
+        await batch_slots.acquire()
+        await async_worker._handle_batch(
+            [_message(receipt=f"rh-{i}") for i in range(3)], stage_slots, batch_slots
+        )
+        return batch_slots.locked()
+
+    assert asyncio.run(run()) is False
+    assert sorted(sqs.deleted) == ["rh-0", "rh-1", "rh-2"]
+
+
+def test_send_message_batch_retries_transient_entry_failures():
+    from services.common.sqs_batch import send_message_batch
+
+    sqs = FakeSQS(fail_once={"1"})
+    failed = send_message_batch(sqs, "q", {f"k{i}": json.dumps({"i": i}) for i in range(12)})
+
+    assert failed == {}
+    assert sorted(body["i"] for _, body in sqs.sent) == list(range(12))
+    # 2 trozos (10 + 2) más el reintento de la entrada fallida
+    assert sqs.calls == 3
+
+
+def test_redelivered_message_is_acked_without_rework(fakes):
+    s3, sqs, table = fakes
+
+    assert worker.process_batch([_message(receipt="rh-1")]) == 1
+    created_at = table.items[0]["created_at"]
+    s3.objects = {}  # un segundo GET fallaría
+
+    # Re-entrega tras vencer la visibilidad: mismo result_id, otro receipt
+    assert worker.process_batch([_message(receipt="rh-2")]) == 1
+
+    assert sqs.deleted == ["rh-1", "rh-2"]
+    assert len(sqs.sent) == 1            # sin notificación duplicada
+    assert len(table.items) == 1         # sin reescritura
+    assert table.items[0]["created_at"] == created_at
+    assert table.get_calls == 1          # el LRU no llega a consultar
+
+
+def test_duplicate_detected_in_table_after_restart(fakes):
+    _, sqs, table = fakes
+    worker.process_batch([_message(receipt="rh-1")])
+    # Otro proceso (LRU vacío) recibe la re-entrega junto con uno nuevo
+    worker.completed = CompletedCache()
+    get_calls = table.get_calls
+
+    msgs = [_message(receipt="rh-2"), _message(receipt="rh-3")]
+    assert worker.process_batch(msgs) == 2
+
+    assert table.get_calls == get_calls + 1
+    assert len(table.items) == 1
+    assert len(sqs.sent) == 1
+    assert worker.stats["duplicates"] >= 2
+
+
+def test_partial_write_is_reprocessed_on_redelivery(fakes, monkeypatch):
+    _, sqs, table = fakes
+    monkeypatch.setattr(worker, "ACCESS_AUDIT_TABLE", "access_audit")
+    monkeypatch.setitem(worker._KEY_ATTRS, "access_audit", worker.AUDIT_KEY_ATTRS)
+    monkeypatch.setattr(worker, "audit", AuditSink("access_audit", table))
+    # La notificación sale pero WORKER_PROCESSED se queda en UnprocessedItems
+    table.unprocessed_tables = {"access_audit"}
+
+    assert worker.process_batch([_message(receipt="rh-1")]) == 0
+    # Sin auditoría no se escribe el item: la re-entrega no es un duplicado
+    assert table.items == [] and sqs.deleted == []
+
+    table.unprocessed_tables = set()
+    assert worker.process_batch([_message(receipt="rh-2")]) == 1
+
+    # At-least-once: la notificación sale de nuevo
+    assert [body["result_id"] for _, body in sqs.sent] == ["R1", "R1"]
+    assert sqs.deleted == ["rh-2"]
+    assert [i["result_id"] for i in table.items] == ["R1"]
+    assert any(a["action"] == "WORKER_PROCESSED" for a in table.tables["access_audit"])
+
+
+def test_failed_notification_keeps_message_for_redelivery(fakes):
+    _, sqs, table = fakes
+    sqs_send = sqs.send_message_batch
+
+    def failing_send(QueueUrl, Entries):
+        # Todos los reintentos del lote fallan
+        sqs.fail_once = {e["Id"] for e in Entries}
+        return sqs_send(QueueUrl, Entries)
+
+    sqs.send_message_batch = failing_send
+    assert worker.process_batch([_message(receipt="rh-1")]) == 0
+    # Sin notificación no se escribe nada
+    assert sqs.deleted == [] and table.items == []
+
+    sqs.send_message_batch = sqs_send
+    assert worker.process_batch([_message(receipt="rh-2")]) == 1
+    assert len(sqs.sent) == 1 and sqs.deleted == ["rh-2"]
+
+
+def test_throttled_messages_are_released_with_backoff(fakes, monkeypatch):
+    from services.processor.heartbeat import VisibilityHeartbeat
+
+    _, sqs, table = fakes
+    hb = VisibilityHeartbeat(sqs, "q", visibility_timeout=90, throttle_backoff=10, max_backoff=300)
+    monkeypatch.setattr(worker, "heartbeat", hb)
+
+    first = _message(receipt="rh-1")
+    first["Attributes"] = {"ApproximateReceiveCount": "1"}
+    fourth = _message(result_id="R2", receipt="rh-2")
+    fourth["Attributes"] = {"ApproximateReceiveCount": "4"}
+    worker.s3.objects["raw/R2.json"] = worker.s3.objects["raw/R1.json"]
+
+    # Throttling al escribir (UnprocessedItems tras los reintentos)
+    table.unprocessed_rounds = 10
+    assert worker.process_batch([first, fourth]) == 0
+
+    visibility = dict(sqs.visibility)
+    assert 5 <= visibility["rh-1"] <= 10
+    assert 40 <= visibility["rh-2"] <= 80
+    assert sqs.deleted == []
+
+
+def test_backoff_is_capped():
+    from services.processor.heartbeat import VisibilityHeartbeat
+
+    hb = VisibilityHeartbeat(None, "q", throttle_backoff=10, max_backoff=60)
+    assert hb.backoff_for({"Attributes": {"ApproximateReceiveCount": "9"}}) <= 60
+    assert hb.backoff_for({}) <= 10